@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+
+import fnmatch
+from importlib import import_module
+from steam.enums.emsg import EMsg
+
+_proto_modules = [
+    'steammessages_clientserver_pb2',
+    'steammessages_clientserver_2_pb2',
+    'steammessages_clientserver_friends_pb2',
+    'steammessages_clientserver_login_pb2',
+    'steammessages_clientserver_appinfo_pb2',
+    'steammessages_clientserver_gameservers_pb2',
+    'steammessages_clientserver_lbs_pb2',
+    'steammessages_clientserver_mms_pb2',
+    'steammessages_clientserver_ucm_pb2',
+    'steammessages_clientserver_uds_pb2',
+    'steammessages_clientserver_ufs_pb2',
+    'steammessages_clientserver_userstats_pb2',
+]
+
+predefined = {
+    EMsg.Multi: ('steammessages_base_pb2', 'CMsgMulti'),
+    EMsg.ClientToGC: ('steammessages_clientserver_2_pb2', 'CMsgGCClient'),
+    EMsg.ClientFromGC: ('steammessages_clientserver_2_pb2', 'CMsgGCClient'),
+    EMsg.ClientServiceMethodLegacy: ('steammessages_clientserver_2_pb2', 'CMsgClientServiceMethodLegacy'),
+    EMsg.ClientServiceMethodLegacyResponse: ('steammessages_clientserver_2_pb2', 'CMsgClientServiceMethodLegacyResponse'),
+    EMsg.ClientGetNumberOfCurrentPlayersDP: ('steammessages_clientserver_2_pb2', 'CMsgDPGetNumberOfCurrentPlayers'),
+    EMsg.ClientGetNumberOfCurrentPlayersDPResponse: ('steammessages_clientserver_2_pb2', 'CMsgDPGetNumberOfCurrentPlayersResponse'),
+#   EMsg.ClientEmailChange4: ('steammessages_clientserver_2_pb2', 'CMsgClientEmailChange'),
+#   EMsg.ClientEmailChangeResponse4: ('steammessages_clientserver_2_pb2', 'CMsgClientEmailChangeResponse'),
+    EMsg.ClientLogonGameServer: ('steammessages_clientserver_login_pb2', 'CMsgClientLogon'),
+    EMsg.ClientCurrentUIMode: ('steammessages_clientserver_2_pb2', 'CMsgClientUIMode'),
+    EMsg.ClientChatOfflineMessageNotification: ('steammessages_clientserver_2_pb2', 'CMsgClientOfflineMessageNotification'),
+}
+
+# lowercase message name -> (module, message name)
+cmsg_names = {}
+
+for module_name in _proto_modules:
+    proto_module = import_module('steam.protobufs.' + module_name)
+
+    for cmsg_name in fnmatch.filter(proto_module.__dict__, 'CMsg*'):
+        cmsg_names[cmsg_name.lower()] = (module_name, cmsg_name)
+
+lookup = {}
+
+for emsg in EMsg:
+    if emsg in predefined:
+        lookup[emsg] = predefined[emsg]
+        continue
+
+    enum_name = emsg.name.lower()
+    if enum_name.startswith("econ"):  # special case for 'EconTrading_'
+        enum_name = enum_name[4:]
+
+    if "cmsg" + enum_name in cmsg_names:
+        lookup[emsg] = cmsg_names["cmsg" + enum_name]
+
+print('"""EMsg to protobuf message lookup table')
+print('')
+print('Generated by ``make pb_gen_cmsg_map``. Do not edit by hand.')
+print('"""')
+print('')
+print('emsg_lookup = {')
+
+for emsg, (module_name, cmsg_name) in sorted(lookup.items()):
+    print("    %d: (%r, %r),  # %s" % (emsg, module_name, cmsg_name, emsg.name))
+
+print('}')
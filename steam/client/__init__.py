@@ -115,13 +115,13 @@ class SteamClient(CMClient, BuiltinBase):
             jobid = "job_%d" % jobid
             if msg.body is None and self.count_listeners(jobid):
                 msg.parse()
-            self.emit(jobid, msg)
+            self._emit_message(jobid, msg)
 
         # emit UMs
         if emsg in (EMsg.ServiceMethod, EMsg.ServiceMethodResponse, EMsg.ServiceMethodSendToClient):
             if msg.body is None and self.count_listeners(msg.header.target_job_name):
                 msg.parse()
-            self.emit(msg.header.target_job_name, msg)
+            self._emit_message(msg.header.target_job_name, msg)
 
     def _bootstrap_cm_list_from_file(self):
         if not self.credential_location or self.cm_servers.last_updated > 0:
@@ -1,27 +1,43 @@
-from binascii import hexlify
+from time import time
 import vdf
+from gevent.pool import Pool as GPool
 from steam.enums import EResult, EServerType
 from steam.enums.emsg import EMsg
 from steam.core.msg import MsgProto
 from steam.utils.proto import proto_fill_from_dict
+from steam.client.pics import LazyProductInfo, parse_product_info, product_info_meta
 
 
 class Apps(object):
     licenses = None  #: :class:`dict` Accounts' package licenses
+    product_info_cache = None  #: (optional) :class:`.ProductInfoCache` used by :meth:`get_product_info`
+    product_info_batch_size = 500  #: max number of apps and packages in a single product info request
+    product_info_max_jobs = 4  #: max number of product info requests in flight
+    lazy_product_info = False  #: return :class:`.LazyProductInfo` from :meth:`get_product_info`, which parses buffers on first access
+    access_token_ttl = 3600  #: seconds access tokens are cached for by :meth:`get_access_tokens`, ``0`` disables caching
 
     def __init__(self, *args, **kwargs):
         super(Apps, self).__init__(*args, **kwargs)
         self.licenses = {}
+        self._access_tokens = {'apps': {}, 'packages': {}}
         self.on(self.EVENT_DISCONNECTED, self.__handle_disconnect)
         self.on(EMsg.ClientLicenseList, self._handle_licenses)
 
     def __handle_disconnect(self):
         self.licenses = {}
+        self.clear_access_tokens()
 
     def _handle_licenses(self, message):
         for entry in message.body.licenses:
             self.licenses[entry.package_id] = entry
 
+        # license changes can grant or revoke access tokens
+        self.clear_access_tokens()
+
+    def clear_access_tokens(self):
+        """Clear access tokens cached by :meth:`get_access_tokens`"""
+        self._access_tokens = {'apps': {}, 'packages': {}}
+
     def get_player_count(self, app_id, timeout=5):
         """Get numbers of players for app id
 
@@ -92,17 +108,84 @@ class Apps(object):
             result = client.get_product_info(packages=[{'packageid': 123,
                                                         'access_token': client.licenses[123].access_token,
                                                         }])
+
+        With :attr:`product_info_cache` set, only meta data is requested first, and full info
+        only for entries that changed since they were cached.
+
+        Large requests are split into batches, see :meth:`iter_product_info`.
+        """
+        if not apps and not packages:
+            return
+
+        data = dict(apps={}, packages={})
+
+        for kind, product_id, info in self.iter_product_info(apps, packages, meta_data_only, raw,
+                                                             auto_access_tokens, timeout):
+            data[kind][product_id] = info
+
+        return data
+
+    def iter_product_info(self, apps=[], packages=[], meta_data_only=False, raw=False, auto_access_tokens=True, timeout=15):
+        """Same as :meth:`get_product_info`, but yields entries as they arrive
+
+        Apps and packages are split into requests of up to :attr:`product_info_batch_size`,
+        with up to :attr:`product_info_max_jobs` requests in flight. Access tokens for all
+        of them are requested at once, before the first batch.
+
+        .. code:: python
+
+            for kind, product_id, info in client.iter_product_info(apps=app_ids):
+                print(kind, product_id, info.get('common', {}).get('name'))
+
+        :return: ``(kind, product_id, info)``, where ``kind`` is ``apps`` or ``packages``
+        :rtype: :class:`generator`
+        :raises: ``gevent.Timeout``
         """
         if not apps and not packages:
             return
 
         if auto_access_tokens:
-            tokens = self.get_access_tokens(app_ids=list(map(lambda app: app['appid'] if isinstance(app, dict) else app, apps)),
-                                            package_ids=list(map(lambda pkg: pkg['packageid'] if isinstance(pkg, dict) else pkg, packages))
-                                            )
+            tokens = self.get_access_tokens(
+                app_ids=[app['appid'] if isinstance(app, dict) else app
+                         for app in apps if not (isinstance(app, dict) and 'access_token' in app)],
+                package_ids=[pkg['packageid'] if isinstance(pkg, dict) else pkg
+                             for pkg in packages if not (isinstance(pkg, dict) and 'access_token' in pkg)],
+                )
         else:
             tokens = None
 
+        size = max(1, self.product_info_batch_size)
+        items = [('apps', app) for app in apps] + [('packages', pkg) for pkg in packages]
+        batches = []
+
+        for i in range(0, len(items), size):
+            batch = items[i:i+size]
+            batches.append(([item for kind, item in batch if kind == 'apps'],
+                            [item for kind, item in batch if kind == 'packages']))
+
+        def fetch(batch):
+            if self.product_info_cache is not None and not meta_data_only:
+                return self._get_product_info_cached(batch[0], batch[1], tokens, timeout)
+            else:
+                return self._iter_product_info(batch[0], batch[1], meta_data_only, tokens, timeout)
+
+        if len(batches) == 1:
+            results = [fetch(batches[0])]
+            pool = None
+        else:
+            jobs = max(1, self.product_info_max_jobs)
+            pool = GPool(jobs)
+            results = pool.imap(lambda batch: list(fetch(batch)), batches, maxsize=jobs)
+
+        try:
+            for entries in results:
+                for kind, product_id, info in entries:
+                    yield kind, product_id, self._parse_product_info(kind, product_id, info, raw)
+        finally:
+            if pool is not None:
+                pool.kill()
+
+    def _iter_product_info(self, apps, packages, meta_data_only, tokens, timeout):
         message = MsgProto(EMsg.ClientPICSProductInfoRequest)
 
         for app in apps:
@@ -133,43 +216,68 @@ class Apps(object):
 
         job_id = self.send_job(message)
 
-        data = dict(apps={}, packages={})
-
         while True:
             chunk = self.wait_event(job_id, timeout=timeout, raises=True)
 
             chunk = chunk[0].body
 
             for app in chunk.apps:
-                if app.buffer and not raw:
-                    data['apps'][app.appid] = vdf.loads(app.buffer[:-1].decode('utf-8', 'replace'))['appinfo']
-                else:
-                    data['apps'][app.appid] = {}
+                yield 'apps', app.appid, app
+            for pkg in chunk.packages:
+                yield 'packages', pkg.packageid, pkg
+
+            if not chunk.response_pending:
+                break
 
-                data['apps'][app.appid]['_missing_token'] = app.missing_token
-                data['apps'][app.appid]['_change_number'] = app.change_number
-                data['apps'][app.appid]['_sha'] = hexlify(app.sha).decode('ascii')
-                data['apps'][app.appid]['_size'] = app.size
+    def _get_product_info_cached(self, apps, packages, tokens, timeout):
+        cache = self.product_info_cache
+        requests = {}
 
-                if app.buffer and raw:
-                    data['apps'][app.appid]['_buffer'] = app.buffer
+        for app in apps:
+            requests['apps', app['appid'] if isinstance(app, dict) else app] = app
+        for package in packages:
+            requests['packages', package['packageid'] if isinstance(package, dict) else package] = package
 
-            for pkg in chunk.packages:
-                if pkg.buffer and not raw:
-                    data['packages'][pkg.packageid] = vdf.binary_loads(pkg.buffer[4:]).get(str(pkg.packageid), {})
-                else:
-                    data['packages'][pkg.packageid] = {}
+        entries = []
+        changed = {'apps': [], 'packages': []}
 
-                data['packages'][pkg.packageid]['_missing_token'] = pkg.missing_token
-                data['packages'][pkg.packageid]['_change_number'] = pkg.change_number
-                data['packages'][pkg.packageid]['_sha'] = hexlify(pkg.sha).decode('ascii')
-                data['packages'][pkg.packageid]['_size'] = pkg.size
+        for kind, product_id, info in self._iter_product_info(apps, packages, True, tokens, timeout):
+            if info.missing_token:
+                entries.append((kind, product_id, info))
+                continue
 
-                if pkg.buffer and raw:
-                    data['packages'][pkg.packageid]['_buffer'] = pkg.buffer
+            cached = cache.get(kind, product_id)
 
-            if not chunk.response_pending:
-                break
+            if cached is not None and cached.change_number == info.change_number and cached.sha == info.sha:
+                cache.stats['hits'] += 1
+                entries.append((kind, product_id, cached))
+            else:
+                cache.stats['misses'] += 1
+                changed[kind].append(requests.get((kind, product_id), product_id))
+
+        if changed['apps'] or changed['packages']:
+            fetched = list(self._iter_product_info(changed['apps'], changed['packages'], False, tokens, timeout))
+
+            for kind in changed:
+                cache.put_many(kind, [(product_id, info) for k, product_id, info in fetched if k == kind])
+
+            entries.extend(fetched)
+
+        return entries
+
+    def _parse_product_info(self, kind, product_id, info, raw):
+        if info.buffer and not raw:
+            if self.lazy_product_info:
+                return LazyProductInfo(kind, product_id, info)
+
+            data = parse_product_info(kind, product_id, info.buffer)
+        else:
+            data = {}
+
+        data.update(product_info_meta(info))
+
+        if info.buffer and raw:
+            data['_buffer'] = info.buffer
 
         return data
 
@@ -275,22 +383,58 @@ class Apps(object):
             {'apps':     {123: 8888888886, ...},
              'packages': {456: 6666666666, ...}
             }
+
+        Tokens, and denied ids, are cached for :attr:`access_token_ttl` seconds, and only
+        ids missing from the cache are requested. The cache is cleared when the license list
+        changes, see :meth:`clear_access_tokens`. When the request times out, only the
+        cached tokens are returned.
         """
         if not app_ids and not package_ids:
             return
 
+        now = time()
+        cache = self._access_tokens
+        tokens = {'apps': {}, 'packages': {}}
+        missing = {'apps': [], 'packages': []}
+
+        for kind, ids in (('apps', app_ids), ('packages', package_ids)):
+            for product_id in map(int, ids):
+                entry = cache[kind].get(product_id)
+
+                if entry is not None and entry[1] > now:
+                    if entry[0] is not None:
+                        tokens[kind][product_id] = entry[0]
+                else:
+                    missing[kind].append(product_id)
+
+        if not missing['apps'] and not missing['packages']:
+            return tokens
+
         resp = self.send_job_and_wait(MsgProto(EMsg.ClientPICSAccessTokenRequest),
                                       {
-                                       'appids': map(int, app_ids),
-                                       'packageids': map(int, package_ids),
+                                       'appids': missing['apps'],
+                                       'packageids': missing['packages'],
                                       },
                                       timeout=10
                                       )
 
-        if resp:
-            return {'apps': dict(map(lambda app: (app.appid, app.access_token), resp.app_access_tokens)),
-                    'packages': dict(map(lambda pkg: (pkg.packageid, pkg.access_token), resp.package_access_tokens)),
-                    }
+        if resp is None:
+            return tokens
+
+        tokens['apps'].update(map(lambda app: (app.appid, app.access_token), resp.app_access_tokens))
+        tokens['packages'].update(map(lambda pkg: (pkg.packageid, pkg.access_token), resp.package_access_tokens))
+
+        if self.access_token_ttl > 0:
+            expires = now + self.access_token_ttl
+
+            for kind, denied in (('apps', resp.app_denied_tokens), ('packages', resp.package_denied_tokens)):
+                for product_id in denied:
+                    cache[kind][product_id] = (None, expires)
+                for product_id in missing[kind]:
+                    if product_id in tokens[kind]:
+                        cache[kind][product_id] = (tokens[kind][product_id], expires)
+
+        return tokens
 
     def register_product_key(self, key):
         """Register/Redeem a CD-Key
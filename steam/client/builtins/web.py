@@ -10,6 +10,7 @@ from steam.utils.web import make_requests_session, generate_session_id
 
 class Web(object):
     _web_session = None
+    web_adapter = None  #: (optional) :class:`requests.adapters.HTTPAdapter` to share connection pools between clients
 
     def __init__(self, *args, **kwargs):
         super(Web, self).__init__(*args, **kwargs)
@@ -19,6 +20,15 @@ class Web(object):
     def __handle_disconnect(self):
         self._web_session = None
 
+    def _make_web_session(self):
+        session = make_requests_session()
+
+        if self.web_adapter is not None:
+            session.mount('http://', self.web_adapter)
+            session.mount('https://', self.web_adapter)
+
+        return session
+
     def get_web_session_cookies(self):
         """Get web authentication cookies via WebAPI's ``AuthenticateUser``
 
@@ -43,7 +53,8 @@ class Web(object):
         }
 
         try:
-            resp = webapi.post('ISteamUserAuth', 'AuthenticateUser', 1, params=data)
+            resp = webapi.post('ISteamUserAuth', 'AuthenticateUser', 1, params=data,
+                               session=self._make_web_session())
         except Exception as exp:
             self._LOG.debug("get_web_session_cookies error: %s" % str(exp))
             return None
@@ -76,7 +87,7 @@ class Web(object):
         if cookies is None:
             return None
 
-        self._web_session = session = make_requests_session()
+        self._web_session = session = self._make_web_session()
         session_id = generate_session_id()
 
         for domain in ['store.steampowered.com', 'help.steampowered.com', 'steamcommunity.com']:
@@ -95,15 +95,26 @@ Reading a file directly from SteamPipe
 
 from zipfile import ZipFile
 from io import BytesIO
+from bisect import bisect_right
+import io
 from collections import OrderedDict, deque
 from six import itervalues, iteritems
-from binascii import crc32, unhexlify
+from binascii import crc32, hexlify, unhexlify
+from zlib import adler32
 from datetime import datetime
+from tempfile import mkstemp
+from time import time
+from random import random
 import logging
 import struct
+import os
 
 import vdf
+from requests.adapters import HTTPAdapter
+from gevent import get_hub
+from gevent.lock import Semaphore
 from gevent.pool import Pool as GPool
+from gevent.threadpool import ThreadPoolExecutor as GThreadPoolExecutor
 from cachetools import LRUCache
 from steam import webapi
 from steam.exceptions import SteamError, ManifestError
@@ -111,8 +122,8 @@ from steam.core.msg import MsgProto
 from steam.enums import EResult, EType
 from steam.enums.emsg import EMsg
 from steam.utils.web import make_requests_session
-from steam.core.crypto import symmetric_decrypt, symmetric_decrypt_ecb
-from steam.core.manifest import DepotManifest, DepotFile
+from steam.core.crypto import symmetric_decrypt, symmetric_decrypt_ecb, sha1_hash
+from steam.core.manifest import DepotManifest, DepotFile, CompactFileMapping
 from steam.protobufs.content_manifest_pb2 import ContentManifestPayload
 
 try:
@@ -120,6 +131,29 @@ try:
 except ImportError:
     from backports import lzma
 
+_replace_file = getattr(os, 'replace', os.rename)
+
+def _makedirs(path):
+    if path and not os.path.isdir(path):
+        try:
+            os.makedirs(path)
+        except OSError:
+            if not os.path.isdir(path):
+                raise
+
+def verify_chunk(chunk, data):
+    """Verify chunk data against size, checksum and SHA1 from the manifest
+
+    :param chunk: chunk instance from a file mapping
+    :type  chunk: ContentManifestPayload.FileMapping.ChunkData
+    :param data: decompressed chunk data
+    :type  data: bytes
+    :rtype: bool
+    """
+    return (len(data) == chunk.cb_original
+            and adler32(data, 0) & 0xffffffff == chunk.crc
+            and sha1_hash(data) == chunk.sha)
+
 def decrypt_manifest_gid_2(encrypted_gid, password):
     """Decrypt manifest gid v2 bytes
 
@@ -132,6 +166,40 @@ def decrypt_manifest_gid_2(encrypted_gid, password):
     """
     return struct.unpack('<Q', symmetric_decrypt_ecb(encrypted_gid, password))[0]
 
+def decode_chunk(data, depot_key):
+    """Decrypt and decompress chunk data downloaded from a content server
+
+    :param data: chunk data, as downloaded
+    :type  data: bytes
+    :param depot_key: depot decryption key
+    :type  depot_key: bytes
+    :return: chunk data
+    :rtype: bytes
+    :raises SteamError: when the chunk is invalid
+    """
+    data = symmetric_decrypt(data, depot_key)
+
+    if data[:2] == b'VZ':
+        if data[-2:] != b'zv':
+            raise SteamError("VZ: Invalid footer: %s" % repr(data[-2:]))
+        if data[2:3] != b'a':
+            raise SteamError("VZ: Invalid version: %s" % repr(data[2:3]))
+
+        vzfilter = lzma._decode_filter_properties(lzma.FILTER_LZMA1, data[7:12])
+        vzdec = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[vzfilter])
+        checksum, decompressed_size = struct.unpack('<II', data[-10:-2])
+        # decompress_size is needed since lzma will sometime produce longer output
+        # [12:-9] is need as sometimes lzma will produce shorter output
+        # together they get us the right data
+        data = vzdec.decompress(data[12:-9])[:decompressed_size]
+        if crc32(data) != checksum:
+            raise SteamError("VZ: CRC32 checksum doesn't match for decompressed data")
+    else:
+        with ZipFile(BytesIO(data)) as zf:
+            data = zf.read(zf.filelist[0])
+
+    return data
+
 def get_content_servers_from_cs(cell_id, host='cs.steamcontent.com', port=80, num_servers=20, session=None):
     """Get a list of CS servers from a single CS server
 
@@ -218,6 +286,9 @@ class ContentServer(object):
     cell_id = 0
     load = None
     weighted_load = None
+    failures = 0       #: number of consecutive failed requests
+    backoff_until = 0  #: timestamp until which the server is not used, after failures
+    latency = None     #: smoothed response time of successful requests, in seconds
 
     def __repr__(self):
         return "<%s('%s://%s:%s', type=%s, cell_id=%s)>" % (
@@ -229,19 +300,331 @@ class ContentServer(object):
             repr(self.cell_id),
             )
 
+    @property
+    def is_available(self):
+        """``False`` while backing off after failed requests
+
+        :type: bool
+        """
+        return self.backoff_until <= time()
+
+    def mark_success(self, latency):
+        """Record a successful request
+
+        :param latency: response time in seconds
+        :type  latency: float
+        """
+        self.failures = 0
+        self.backoff_until = 0
+        self.latency = latency if self.latency is None else self.latency * 0.8 + latency * 0.2
+
+    def mark_failure(self):
+        """Record a failed request, and back off from the server exponentially (up to 60 seconds)"""
+        self.failures += 1
+        self.backoff_until = time() + min(60, 0.5 * 2 ** (self.failures - 1))
+
+
+class ChunkStore(object):
+    """Base class for chunk stores used by :class:`CDNClient`
+
+    Chunks are content addressed, so they are stored under their chunk id
+    (hex of the chunk SHA1), regardless of which depot they came from.
+    """
+
+    def get(self, chunk_id):
+        """Get chunk data
+
+        :param chunk_id: chunk id
+        :type  chunk_id: str
+        :returns: chunk data, or ``None`` if not in the store
+        :rtype: bytes
+        """
+        return None
+
+    def put(self, chunk_id, data):
+        """Store chunk data
+
+        :param chunk_id: chunk id
+        :type  chunk_id: str
+        :param data: decompressed chunk data
+        :type  data: bytes
+        """
+        pass
+
+
+class MemoryChunkStore(ChunkStore):
+    def __init__(self, max_bytes=20 * 1024**2):
+        """In-memory LRU chunk store
+
+        :param max_bytes: max total size of stored chunks
+        :type  max_bytes: int
+        """
+        self.cache = LRUCache(max_bytes, getsizeof=len)
+
+    def get(self, chunk_id):
+        return self.cache.get(chunk_id)
+
+    def put(self, chunk_id, data):
+        if len(data) <= self.cache.maxsize:
+            self.cache[chunk_id] = data
+
+
+class _DiskStore(object):
+    """Shared file handling for on-disk stores, with atomic writes and LRU eviction by mtime"""
+    path = None
+    max_bytes = None
+    evict_ratio = 0.9  #: once ``max_bytes`` is exceeded, evict down to this fraction of it
+    _size = None
+
+    def _iter_entries(self):
+        for dirpath, _, filenames in os.walk(self.path):
+            for filename in filenames:
+                if filename.startswith('.tmp'):
+                    continue
+
+                filepath = os.path.join(dirpath, filename)
+
+                try:
+                    stat = os.stat(filepath)
+                except OSError:
+                    continue
+
+                yield filepath, stat.st_size, stat.st_mtime
+
+    def _read(self, filepath):
+        try:
+            with open(filepath, 'rb') as fp:
+                return fp.read()
+        except (IOError, OSError):
+            return None
+
+    def _touch(self, filepath):
+        # mtime is used to track last access for eviction
+        try:
+            os.utime(filepath, None)
+        except OSError:
+            pass
+
+    def _write(self, filepath, data):
+        dirpath = os.path.dirname(filepath)
+        _makedirs(dirpath)
+
+        try:
+            old_size = os.path.getsize(filepath)
+        except OSError:
+            old_size = 0
+
+        fd, tmppath = mkstemp(prefix='.tmp', dir=dirpath)
+
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(data)
+            _replace_file(tmppath, filepath)
+        except Exception:
+            self._remove(tmppath)
+            raise
+
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._iter_entries())
+        else:
+            self._size += len(data) - old_size
+
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        """Remove least recently used entries until the store is within ``max_bytes * evict_ratio``
+
+        Evicting below ``max_bytes`` leaves room for new entries, so a full store
+        isn't scanned again on every write.
+        """
+        entries = sorted(self._iter_entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        target = int(self.max_bytes * self.evict_ratio)
+
+        for filepath, entry_size, _ in entries:
+            if size <= target:
+                break
+
+            self._remove(filepath)
+            size -= entry_size
+
+        self._size = size
+
+    @staticmethod
+    def _remove(filepath):
+        try:
+            os.remove(filepath)
+        except OSError:
+            pass
+
+
+class DiskChunkStore(_DiskStore, ChunkStore):
+    _LOG = logging.getLogger("DiskChunkStore")
+
+    def __init__(self, path, max_bytes=10 * 1024**3):
+        """On-disk LRU chunk store
+
+        Chunks are saved as ``<path>/<chunk_id[:2]>/<chunk_id>`` and verified against
+        their SHA1 when read. Files are written atomically, so multiple processes
+        can safely share the same directory. Once ``max_bytes`` is exceeded,
+        the least recently used chunks are removed.
+
+        :param path: directory to store chunks in
+        :type  path: str
+        :param max_bytes: max total size of stored chunks
+        :type  max_bytes: int
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._size = None
+
+    def _chunk_path(self, chunk_id):
+        return os.path.join(self.path, chunk_id[:2], chunk_id)
+
+    def get(self, chunk_id):
+        filepath = self._chunk_path(chunk_id)
+        data = self._read(filepath)
+
+        if data is None:
+            return None
+
+        if sha1_hash(data) != unhexlify(chunk_id):
+            self._LOG.debug("Chunk %s failed verification. Removing", chunk_id)
+            self._remove(filepath)
+            return None
+
+        self._touch(filepath)
+        return data
+
+    def put(self, chunk_id, data):
+        self._write(self._chunk_path(chunk_id), data)
+
+
+class TieredChunkStore(ChunkStore):
+    def __init__(self, *stores):
+        """Chain multiple chunk stores, fastest first
+
+        Chunks found in a slower store are copied into the faster ones.
+
+        .. code:: python
+
+            store = TieredChunkStore(MemoryChunkStore(100 * 1024**2),
+                                     DiskChunkStore('/var/cache/steam-chunks', 50 * 1024**3))
+            mycdn = CDNClient(mysteam, chunk_store=store)
+
+        :param stores: chunk stores
+        :type  stores: :class:`.ChunkStore`
+        """
+        self.stores = stores
+
+    def get(self, chunk_id):
+        for i, store in enumerate(self.stores):
+            data = store.get(chunk_id)
+
+            if data is not None:
+                for faster_store in self.stores[:i]:
+                    faster_store.put(chunk_id, data)
+                return data
+
+        return None
+
+    def put(self, chunk_id, data):
+        for store in self.stores:
+            store.put(chunk_id, data)
+
+
+class ManifestStore(object):
+    """Base class for manifest stores, used by :class:`.CDNClient` to avoid downloading
+    the same manifest again. Doesn't store anything.
+    """
+
+    def get(self, depot_id, manifest_gid):
+        """Get serialized manifest
+
+        :param depot_id: depot id
+        :type  depot_id: int
+        :param manifest_gid: manifest gid
+        :type  manifest_gid: int
+        :returns: manifest data, or ``None`` if not in the store
+        :rtype: bytes
+        """
+        return None
+
+    def put(self, manifest):
+        """Store manifest
+
+        :param manifest: manifest instance
+        :type  manifest: :class:`.DepotManifest`
+        """
+        pass
+
+
+class DiskManifestStore(_DiskStore, ManifestStore):
+    _LOG = logging.getLogger("DiskManifestStore")
+
+    def __init__(self, path, max_bytes=1024**3, compress=True):
+        """On-disk LRU manifest store
+
+        Manifests are saved as ``<path>/<depot_id>/<manifest_gid>``, in the format of
+        :meth:`.DepotManifest.serialize` prefixed with its SHA1, which is verified when read.
+        Filenames are saved decrypted, when the manifest was decrypted. Like with
+        :class:`.DiskChunkStore`, writes are atomic and the least recently used manifests
+        are removed once ``max_bytes`` is exceeded.
+
+        .. code:: python
+
+            mycdn = CDNClient(mysteam, manifest_store=DiskManifestStore('/var/cache/steam-manifests'))
+
+        :param path: directory to store manifests in
+        :type  path: str
+        :param max_bytes: max total size of stored manifests
+        :type  max_bytes: int
+        :param compress: whether to zip compress manifests, loading uncompressed ones is faster
+        :type  compress: bool
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self._size = None
+
+    def _manifest_path(self, depot_id, manifest_gid):
+        return os.path.join(self.path, str(int(depot_id)), str(int(manifest_gid)))
+
+    def get(self, depot_id, manifest_gid):
+        filepath = self._manifest_path(depot_id, manifest_gid)
+        data = self._read(filepath)
+
+        if data is None:
+            return None
+
+        if sha1_hash(data[20:]) != data[:20]:
+            self._LOG.debug("Manifest %s/%s failed verification. Removing", depot_id, manifest_gid)
+            self._remove(filepath)
+            return None
+
+        self._touch(filepath)
+        return data[20:]
+
+    def put(self, manifest):
+        data = manifest.serialize(compress=self.compress)
+        self._write(self._manifest_path(manifest.depot_id, manifest.gid), sha1_hash(data) + data)
+
 
 class CDNDepotFile(DepotFile):
+    read_ahead = 0  #: number of following chunks to download in the background on each read
+
     def __init__(self, manifest, file_mapping):
         """File-like object proxy for content files located on SteamPipe
 
         :param manifest: parrent manifest instance
         :type  manifest: :class:`.CDNDepotManifest`
         :param file_mapping: file mapping instance from manifest
-        :type  file_mapping: ContentManifestPayload.FileMapping
+        :type  file_mapping: ContentManifestPayload.FileMapping, :class:`.CompactFileMapping`
         """
         if not isinstance(manifest, CDNDepotManifest):
             raise TypeError("Expected 'manifest' to be of type CDNDepotFile")
-        if not isinstance(file_mapping, ContentManifestPayload.FileMapping):
+        if not isinstance(file_mapping, (ContentManifestPayload.FileMapping, CompactFileMapping)):
             raise TypeError("Expected 'file_mapping' to be of type ContentManifestPayload.FileMapping")
 
         DepotFile.__init__(self, manifest, file_mapping)
@@ -249,6 +632,9 @@ class CDNDepotFile(DepotFile):
         self.offset = 0
         self._lc = None
         self._lcbuff = b''
+        self._chunk_offsets = None
+        self._prefetch = {}
+        self._read_end = 0
 
     def __repr__(self):
         return "<%s(%s, %s, %s, %s, %s)>" % (
@@ -294,16 +680,53 @@ class CDNDepotFile(DepotFile):
 
         self.offset = max(0, min(self.size, offset))
 
+    def _fetch_chunk(self, chunk):
+        return self.manifest.cdn_client.get_chunk(
+            self.manifest.app_id,
+            self.manifest.depot_id,
+            chunk.sha.hex(),
+            chunk=chunk,
+            )
+
     def _get_chunk(self, chunk):
         if not self._lc or self._lc.sha != chunk.sha:
-            self._lcbuff = self.manifest.cdn_client.get_chunk(
-                self.manifest.app_id,
-                self.manifest.depot_id,
-                chunk.sha.hex(),
-                )
+            if chunk.sha in self._prefetch:
+                self._lcbuff = self._prefetch.pop(chunk.sha).get()
+            else:
+                self._lcbuff = self._fetch_chunk(chunk)
             self._lc = chunk
         return self._lcbuff
 
+    def _find_chunk(self, offset):
+        """Index of the chunk containing ``offset``, or the last chunk before it"""
+        if self._chunk_offsets is None:
+            self._chunk_offsets = [chunk.offset for chunk in self.chunks]
+        return bisect_right(self._chunk_offsets, offset) - 1
+
+    def _prefetch_chunks(self, index):
+        """Prefetch ``chunks[index:index + read_ahead]``, and drop prefetches outside that window.
+        When ``index`` is ``None``, all prefetches are dropped."""
+        window = self.chunks[index:index + self.read_ahead] if index is not None else []
+        shas = set(chunk.sha for chunk in window)
+
+        for sha in [sha for sha in self._prefetch if sha not in shas]:
+            self._prefetch.pop(sha).kill(block=False)
+
+        pool = self.manifest.cdn_client.gpool
+
+        for chunk in window:
+            if chunk.sha not in self._prefetch:
+                # the pool is shared, so don't make the read wait for a free slot
+                if pool.full():
+                    break
+
+                self._prefetch[chunk.sha] = pool.spawn(self._fetch_chunk, chunk)
+
+    def _read_ahead(self, sequential, index):
+        # only read ahead when reading sequentially, random access would waste downloads
+        if self.read_ahead or self._prefetch:
+            self._prefetch_chunks(index if sequential and self.read_ahead else None)
+
     def __iter__(self):
         return self
 
@@ -335,39 +758,50 @@ class CDNDepotFile(DepotFile):
         if length == 0 or self.offset >= self.size or self.size == 0:
             return b''
 
-        end_offset = self.offset + length
+        end_offset = min(self.size, self.offset + length)
+        sequential = self.offset == self._read_end
+        chunks = self.chunks
+        parts = []
+        offset = self.offset
+        i = max(0, self._find_chunk(offset))
+
+        while offset < end_offset:
+            chunk = chunks[i] if i < len(chunks) else None
+
+            # zero fill any gaps between chunks
+            if chunk is None or chunk.offset > offset:
+                gap_end = end_offset if chunk is None else min(end_offset, chunk.offset)
+                parts.append(b'\0' * (gap_end - offset))
+                offset = gap_end
+                continue
 
-        # we cache last chunk to allow small length reads and local seek
-        if (self._lc
-           and self.offset >= self._lc.offset
-           and end_offset <= self._lc.offset + self._lc.cb_original):
-            data = self._lcbuff[self.offset - self._lc.offset:self.offset - self._lc.offset + length]
-        # if we need to read outside the bounds of the cached chunk
-        # we go to loop over chunks to determine which to download
-        else:
-            data = BytesIO()
-            start_offset = None
+            chunk_end = chunk.offset + chunk.cb_original
 
-            # Manifest orders the chunks by offset in ascending order
-            for chunk in self.chunks:
-                if chunk.offset >= end_offset:
-                    break
+            if chunk_end <= offset:
+                i += 1
+                continue
 
-                chunk_start = chunk.offset
-                chunk_end = chunk_start + chunk.cb_original
+            data = self._get_chunk(chunk)
+            parts.append(memoryview(data)[offset - chunk.offset:min(end_offset, chunk_end) - chunk.offset])
+            offset = min(end_offset, chunk_end)
+            i += 1
 
-                if (     chunk_start <= self.offset <  chunk_end
-                      or (chunk_start > self.offset and end_offset > chunk_end)
-                      or chunk_start <  end_offset  <= chunk_end):
-                    if start_offset is None:
-                        start_offset = chunk.offset
-                    data.write(self._get_chunk(chunk))
+        self._read_ahead(sequential, i)
 
-            data.seek(self.offset - start_offset)
-            data = data.read(length)
+        self.offset = self._read_end = end_offset
+        return bytes(parts[0]) if len(parts) == 1 else b''.join(parts)
 
-        self.offset = min(self.size, end_offset)
-        return data
+    def readinto(self, b):
+        """Read bytes into a pre-allocated, writable bytes-like object
+
+        :param b: buffer to read into
+        :type  b: :class:`bytearray`, :class:`memoryview`
+        :returns: number of bytes read
+        :rtype: int
+        """
+        data = self.read(len(b))
+        memoryview(b)[:len(data)] = data
+        return len(data)
 
     def readline(self):
         """Read a single line
@@ -375,19 +809,73 @@ class CDNDepotFile(DepotFile):
         :return: single file line
         :rtype: bytes
         """
-        buf = b''
+        parts = []
+        sequential = self.offset == self._read_end
+
+        while self.offset < self.size:
+            i = self._find_chunk(self.offset)
+            chunk = self.chunks[i] if i >= 0 else None
+
+            # offset falls in a gap between chunks
+            if chunk is None or chunk.offset + chunk.cb_original <= self.offset:
+                data = self.read(1)
+                parts.append(data)
+
+                if data == b'\n':
+                    break
+                continue
+
+            data = self._get_chunk(chunk)
+            start = self.offset - chunk.offset
+            end = min(len(data), self.size - chunk.offset)
+            pos = data.find(b'\n', start, end)
+            stop = end if pos == -1 else pos + 1
+
+            parts.append(data[start:stop])
+            self.offset = chunk.offset + stop
 
-        for chunk in iter(lambda: self.read(256), b''):
-            pos = chunk.find(b'\n')
             if pos > -1:
-                pos += 1  # include \n
-                buf += chunk[:pos]
-                self.seek(self.offset - (len(chunk) - pos))
                 break
 
-            buf += chunk
+        if self.offset:
+            self._read_ahead(sequential, self._find_chunk(self.offset - 1) + 1)
+
+        self._read_end = self.offset
+        return b''.join(parts)
+
+    def open(self, mode='rb', buffer_size=io.DEFAULT_BUFFER_SIZE, encoding=None, errors=None, newline=None):
+        """Open the file as a standard :mod:`io` file object
 
-        return buf
+        The returned object is independent from this instance, and can be used anywhere
+        a regular file is expected (:class:`zipfile.ZipFile`, :mod:`tarfile`, etc)
+
+        .. code:: python
+
+            with depot_file.open('r', encoding='utf-8') as fp:
+                for line in fp:
+                    pass
+
+        :param mode: ``rb`` for :class:`io.BufferedReader`, or ``r`` for :class:`io.TextIOWrapper`
+        :type  mode: str
+        :param buffer_size: read buffer size
+        :type  buffer_size: int
+        :param encoding: text mode encoding
+        :type  encoding: str
+        :param errors: text mode decoding error handling
+        :type  errors: str
+        :param newline: text mode newline handling
+        :type  newline: str
+        :rtype: :class:`io.BufferedReader`, :class:`io.TextIOWrapper`
+        """
+        if mode not in ('r', 'rb', 'rt'):
+            raise ValueError("Invalid mode: %r" % mode)
+
+        fp = io.BufferedReader(CDNDepotFileIO(self), buffer_size)
+
+        if 'b' in mode:
+            return fp
+
+        return io.TextIOWrapper(fp, encoding=encoding, errors=errors, newline=newline)
 
     def readlines(self):
         """Get file contents as list of lines
@@ -398,6 +886,34 @@ class CDNDepotFile(DepotFile):
         return [line for line in self]
 
 
+class CDNDepotFileIO(io.RawIOBase):
+    def __init__(self, depot_file):
+        """Raw :mod:`io` stream for :class:`.CDNDepotFile`, see :meth:`.CDNDepotFile.open`
+
+        :param depot_file: depot file instance
+        :type  depot_file: :class:`.CDNDepotFile`
+        """
+        io.RawIOBase.__init__(self)
+        self.depot_file = depot_file.__class__(depot_file.manifest, depot_file.file_mapping)
+        self.name = depot_file.filename
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return self.depot_file.seekable
+
+    def readinto(self, b):
+        return self.depot_file.readinto(b)
+
+    def seek(self, offset, whence=0):
+        self.depot_file.seek(offset, whence)
+        return self.depot_file.offset
+
+    def tell(self):
+        return self.depot_file.offset
+
+
 class CDNDepotManifest(DepotManifest):
     DepotFileClass = CDNDepotFile
     name = None  #: set only by :meth:`CDNClient.get_manifests`
@@ -450,22 +966,55 @@ class CDNClient(object):
     DepotManifestClass = CDNDepotManifest
     _LOG = logging.getLogger("CDNClient")
     servers = deque()  #: CS Server list
-    _chunk_cache = LRUCache(20)
+    chunk_store = MemoryChunkStore()  #: :class:`.ChunkStore` for downloaded chunks, shared between instances by default
+    manifest_store = ManifestStore()  #: :class:`.ManifestStore` for downloaded manifests
     cell_id = 0  #: Cell ID to use, initialized from SteamClient instance
+    http_pool_size = 8  #: max number of content servers to keep connections to, and of kept-alive connections per server
+    max_inflight_chunks = 16  #: max number of chunks being downloaded and decoded at the same time
+    compact_manifests = False  #: store file mappings of loaded manifests in columns, see :meth:`.DepotManifest.compact`
 
-    def __init__(self, client):
+    def __init__(self, client, chunk_store=None, chunk_executor=None, manifest_store=None):
         """CDNClient allows loading and reading of manifests for Steam apps are used
         to list and download content
 
+        Chunk decryption and decompression run inline by default, blocking other greenlets.
+        They can be moved off the hub with ``chunk_executor``. Decryption, LZMA and zip
+        decompression release the GIL, so a thread pool is usually enough.
+
+        .. code:: python
+
+            from gevent.threadpool import ThreadPoolExecutor
+            mycdn = CDNClient(mysteam, chunk_executor=ThreadPoolExecutor(4))
+
+            # or, in a separate process
+            from concurrent.futures import ProcessPoolExecutor
+            mycdn = CDNClient(mysteam, chunk_executor=ProcessPoolExecutor(4))
+
         :param client: logged in SteamClient instance
         :type  client: :class:`.SteamClient`
+        :param chunk_store: (optional) store for downloaded chunks, see :class:`.TieredChunkStore`
+        :type  chunk_store: :class:`.ChunkStore`
+        :param chunk_executor: (optional) executor for decoding chunks, see :func:`.decode_chunk`
+        :type  chunk_executor: :class:`concurrent.futures.Executor`
+        :param manifest_store: (optional) store for downloaded manifests, see :class:`.DiskManifestStore`
+        :type  manifest_store: :class:`.ManifestStore`
         """
         self.gpool = GPool(8)            #: task pool
         self.steam = client              #: SteamClient instance
         if self.steam:
             self.cell_id = self.steam.cell_id
+        if chunk_store is not None:
+            self.chunk_store = chunk_store
+        if manifest_store is not None:
+            self.manifest_store = manifest_store
+
+        self.chunk_executor = chunk_executor  #: executor for decoding chunks
+        self._chunk_slots = Semaphore(self.max_inflight_chunks)
 
         self.web = make_requests_session()
+        adapter = HTTPAdapter(pool_connections=self.http_pool_size, pool_maxsize=self.http_pool_size)
+        self.web.mount('http://', adapter)
+        self.web.mount('https://', adapter)
         self.depot_keys = {}             #: depot decryption keys
         self.manifests = {}              #: CDNDepotManifest instances
         self.app_depots = {}             #: app depot info
@@ -523,12 +1072,44 @@ class CDNClient(object):
     def get_content_server(self, rotate=False):
         """Get a CS server for content download
 
+        Servers backing off after failures are skipped. The rest are picked at random,
+        weighted by their reported ``weighted_load`` and measured latency.
+        When all servers are backing off, the one that recovers first is returned.
+
         :param rotate: forcefully rotate server list and get a new server
         :type  rotate: bool
         """
+        servers = [server for server in self.servers if server.is_available]
+
         if rotate:
             self.servers.rotate(-1)
-        return self.servers[0]
+
+            if len(servers) > 1 and self.servers[-1] in servers:
+                servers.remove(self.servers[-1])
+
+        if not servers:
+            return min(self.servers, key=lambda server: server.backoff_until)
+
+        return self._weighted_pick(servers)
+
+    @staticmethod
+    def _weighted_pick(servers):
+        latencies = [server.latency for server in servers if server.latency is not None]
+        default_latency = sum(latencies) / len(latencies) if latencies else 1.0
+
+        weights = [1.0 / (max(float(server.weighted_load or 0), 1.0)
+                          * (server.latency if server.latency is not None else default_latency)
+                          )
+                   for server in servers]
+
+        pick = random() * sum(weights)
+
+        for server, weight in zip(servers, weights):
+            pick -= weight
+            if pick < 0:
+                return server
+
+        return servers[-1]
 
     def get_depot_key(self, app_id, depot_id):
         """Get depot key, which is needed to decrypt files
@@ -552,18 +1133,21 @@ class CDNClient(object):
 
         return self.depot_keys[depot_id]
 
-    def cdn_cmd(self, command, args):
+    def cdn_cmd(self, command, args, server=None):
         """Run CDN command request
 
         :param command: command name
         :type  command: str
         :param args: args
         :type  args: str
+        :param server: (optional) content server to try first, unless it's backing off
+        :type  server: :class:`.ContentServer`
         :returns: requests response
         :rtype: :class:`requests.Response`
         :raises SteamError: on error
         """
-        server = self.get_content_server()
+        if server is None or not server.is_available:
+            server = self.get_content_server()
 
         while True:
             url = "%s://%s:%s/%s/%s" % (
@@ -574,60 +1158,312 @@ class CDNClient(object):
                 args,
                 )
 
+            # wait out the backoff when all servers have failed recently
+            if not server.is_available:
+                self.steam.sleep(server.backoff_until - time())
+
+            start = time()
+
             try:
                 resp = self.web.get(url, timeout=10)
             except Exception as exp:
                 self._LOG.debug("Request error: %s", exp)
             else:
                 if resp.ok:
+                    server.mark_success(time() - start)
                     return resp
                 elif 400 <= resp.status_code < 500:
                     self._LOG.debug("Got HTTP %s", resp.status_code)
                     raise SteamError("HTTP Error %s" % resp.status_code)
-                self.steam.sleep(0.5)
 
-            server = self.get_content_server(rotate=True)
+            server.mark_failure()
+            server = self.get_content_server()
 
-    def get_chunk(self, app_id, depot_id, chunk_id):
+    def get_chunk(self, app_id, depot_id, chunk_id, server=None, chunk=None):
         """Download a single content chunk
 
+        Downloaded data is verified before it is put in :attr:`chunk_store`, with
+        :func:`verify_chunk` when ``chunk`` is given, otherwise against the SHA1 in ``chunk_id``.
+
         :param app_id: App ID
         :type  app_id: int
         :param depot_id: Depot ID
         :type  depot_id: int
         :param chunk_id: Chunk ID
-        :type  chunk_id: int
+        :type  chunk_id: str
+        :param server: (optional) content server to try first
+        :type  server: :class:`.ContentServer`
+        :param chunk: (optional) chunk instance from a file mapping
+        :type  chunk: ContentManifestPayload.FileMapping.ChunkData
         :returns: chunk data
         :rtype: bytes
         :raises SteamError: error message
         """
-        if (depot_id, chunk_id) not in self._chunk_cache:
-            resp = self.cdn_cmd('depot', '%s/chunk/%s' % (depot_id, chunk_id))
-
-            data = symmetric_decrypt(resp.content, self.get_depot_key(app_id, depot_id))
-
-            if data[:2] == b'VZ':
-                if data[-2:] != b'zv':
-                    raise SteamError("VZ: Invalid footer: %s" % repr(data[-2:]))
-                if data[2:3] != b'a':
-                    raise SteamError("VZ: Invalid version: %s" % repr(data[2:3]))
-
-                vzfilter = lzma._decode_filter_properties(lzma.FILTER_LZMA1, data[7:12])
-                vzdec = lzma.LZMADecompressor(lzma.FORMAT_RAW, filters=[vzfilter])
-                checksum, decompressed_size = struct.unpack('<II', data[-10:-2])
-                # decompress_size is needed since lzma will sometime produce longer output
-                # [12:-9] is need as sometimes lzma will produce shorter output
-                # together they get us the right data
-                data = vzdec.decompress(data[12:-9])[:decompressed_size]
-                if crc32(data) != checksum:
-                    raise SteamError("VZ: CRC32 checksum doesn't match for decompressed data")
+        data = self.chunk_store.get(chunk_id)
+
+        if data is None:
+            depot_key = self.get_depot_key(app_id, depot_id)
+
+            # limit the number of raw chunks held in memory
+            with self._chunk_slots:
+                resp = self.cdn_cmd('depot', '%s/chunk/%s' % (depot_id, chunk_id), server=server)
+
+                if self.chunk_executor is None:
+                    data = decode_chunk(resp.content, depot_key)
+                else:
+                    future = self.chunk_executor.submit(decode_chunk, resp.content, depot_key)
+
+                    if isinstance(self.chunk_executor, GThreadPoolExecutor):
+                        data = future.result()
+                    else:
+                        # wait on a native thread, so other greenlets can run meanwhile
+                        data = get_hub().threadpool.apply(future.result)
+
+            if chunk is not None:
+                verified = verify_chunk(chunk, data)
             else:
-                with ZipFile(BytesIO(data)) as zf:
-                    data = zf.read(zf.filelist[0])
+                verified = sha1_hash(data) == unhexlify(chunk_id)
+
+            if not verified:
+                raise SteamError("Chunk %s failed verification" % chunk_id)
+
+            self.chunk_store.put(chunk_id, data)
+
+        return data
+
+    def download_depot(self, manifest, dest_dir, filename_filter=None, max_workers=8, num_servers=4):
+        """Download the files from a manifest into a local directory
+
+        Unique chunks are downloaded concurrently and spread over multiple content servers.
+        Chunks shared between files are only downloaded once. Files are preallocated and each
+        chunk is verified and written at its offset. Chunks that are already present in
+        existing files are skipped, so an interrupted download can be resumed.
+
+        .. code:: python
+
+            >>> manifest = mycdn.get_manifests(570, filter_func=lambda depot_id, info: depot_id == 373301)[0]
+            >>> mycdn.download_depot(manifest, './dota2', 'game/dota/maps/*')
+            {'files': 12, 'chunks': 1022, 'chunks_skipped': 0, 'bytes': 974371043, 'seconds': 21.3, 'bytes_per_second': 45745120.8}
+
+        :param manifest: manifest instance
+        :type  manifest: :class:`.CDNDepotManifest`
+        :param dest_dir: destination directory
+        :type  dest_dir: str
+        :param filename_filter: (optional) wildcard filter for file paths
+        :type  filename_filter: str
+        :param max_workers: number of concurrent chunk downloads
+        :type  max_workers: int
+        :param num_servers: number of content servers to use
+        :type  num_servers: int
+        :returns: download stats
+        :rtype: :class:`dict`
+        :raises SteamError: error message
+        """
+        if manifest.filenames_encrypted:
+            raise SteamError("Manifest filenames are encrypted")
+
+        start = time()
+        stats = {'files': 0, 'chunks': 0, 'chunks_skipped': 0, 'bytes': 0}
+        targets = OrderedDict()  # chunk sha -> (chunk, [(path, offset)])
+
+        for depot_file in manifest.iter_files(filename_filter):
+            path = os.path.join(dest_dir, depot_file.filename)
+
+            if depot_file.is_directory:
+                _makedirs(path)
+                continue
+
+            _makedirs(os.path.dirname(path))
+
+            if depot_file.is_symlink:
+                if hasattr(os, 'symlink') and not os.path.lexists(path):
+                    os.symlink(depot_file.linktarget, path)
+                continue
+
+            stats['files'] += 1
+            exists = os.path.isfile(path)
+            resume = exists and os.path.getsize(path) == depot_file.size
+
+            with open(path, 'r+b' if exists else 'wb') as fp:
+                fp.truncate(depot_file.size)
+
+                for chunk in depot_file.chunks:
+                    if resume:
+                        fp.seek(chunk.offset)
+
+                        if verify_chunk(chunk, fp.read(chunk.cb_original)):
+                            stats['chunks_skipped'] += 1
+                            continue
+
+                    targets.setdefault(chunk.sha, (chunk, []))[1].append((path, chunk.offset))
+
+        stats['chunks'], stats['bytes'] = self._download_chunks(manifest, targets, max_workers, num_servers)
+        stats['seconds'] = time() - start
+        stats['bytes_per_second'] = stats['bytes'] / max(stats['seconds'], 0.001)
+
+        self._LOG.debug("Downloaded %d chunks (%d bytes) for %r at %.1f KiB/s",
+                        stats['chunks'], stats['bytes'], manifest, stats['bytes_per_second'] / 1024)
+
+        return stats
+
+    def _pick_content_servers(self, num_servers):
+        """Pick up to ``num_servers`` distinct servers, the same way as :meth:`get_content_server`
+
+        :rtype: :class:`list`
+        """
+        if not self.servers:
+            return [None]
+
+        available = [server for server in self.servers if server.is_available]
+
+        if not available:
+            return [self.get_content_server()]
+
+        servers = []
+
+        while available and len(servers) < num_servers:
+            server = self._weighted_pick(available)
+            available.remove(server)
+            servers.append(server)
+
+        return servers
+
+    def _download_chunks(self, manifest, targets, max_workers, num_servers):
+        """Download chunks concurrently and write them into local files
+
+        :param targets: ``{sha: (chunk, [(path, offset), ...])}``
+        :returns: number of chunks and bytes downloaded
+        :rtype: :class:`tuple`
+        """
+        servers = self._pick_content_servers(max(1, num_servers))
+        num_chunks = num_bytes = 0
+
+        def fetch_chunk(args):
+            i, (chunk, paths) = args
+            chunk_id = hexlify(chunk.sha).decode('ascii')
+            data = self.get_chunk(manifest.app_id, manifest.depot_id, chunk_id,
+                                  server=servers[i % len(servers)], chunk=chunk)
+
+            return paths, data
+
+        pool = GPool(max_workers)
+
+        for paths, data in pool.imap_unordered(fetch_chunk, enumerate(itervalues(targets)), maxsize=max_workers):
+            for path, offset in paths:
+                with open(path, 'r+b') as fp:
+                    fp.seek(offset)
+                    fp.write(data)
+
+            num_chunks += 1
+            num_bytes += len(data)
+
+        return num_chunks, num_bytes
+
+    def update_depot(self, old_manifest, new_manifest, dest_dir, max_workers=8, num_servers=4):
+        """Update a local copy of a depot from ``old_manifest`` to ``new_manifest``
+
+        Only chunks that are not present in the old files are downloaded. The rest are
+        copied from the local files (after verification). Added and changed files are
+        built next to the originals and moved into place once all of them are complete,
+        then removed files are deleted.
+
+        .. code:: python
+
+            >>> mycdn.update_depot(old_manifest, new_manifest, './dota2')
+            {'files_added': 3, 'files_changed': 41, 'files_removed': 1, 'chunks_reused': 2004, 'chunks': 87, 'bytes': 51031218, 'seconds': 3.1, 'bytes_per_second': 16461683.2}
 
-            self._chunk_cache[(depot_id, chunk_id)] = data
+        :param old_manifest: manifest of the files in ``dest_dir``
+        :type  old_manifest: :class:`.CDNDepotManifest`
+        :param new_manifest: manifest to update to
+        :type  new_manifest: :class:`.CDNDepotManifest`
+        :param dest_dir: directory containing the depot files
+        :type  dest_dir: str
+        :param max_workers: number of concurrent chunk downloads
+        :type  max_workers: int
+        :param num_servers: number of content servers to use
+        :type  num_servers: int
+        :returns: update stats
+        :rtype: :class:`dict`
+        :raises SteamError: error message
+        """
+        if old_manifest.filenames_encrypted or new_manifest.filenames_encrypted:
+            raise SteamError("Manifest filenames are encrypted")
+
+        start = time()
+        diff = old_manifest.diff(new_manifest)
+        stats = {'files_added': len(diff.added),
+                 'files_changed': len(diff.changed),
+                 'files_removed': len(diff.removed),
+                 'chunks_reused': 0,
+                 }
+        targets = OrderedDict()  # chunk sha -> (chunk, [(path, offset)])
+        pending = []             # (temp path, final path)
+
+        for new_file in diff.added + [new_file for _, new_file in diff.changed]:
+            path = os.path.join(dest_dir, new_file.filename)
+
+            if new_file.is_directory:
+                _makedirs(path)
+                continue
+
+            _makedirs(os.path.dirname(path))
+
+            if new_file.is_symlink:
+                if hasattr(os, 'symlink'):
+                    if os.path.lexists(path):
+                        os.remove(path)
+                    os.symlink(new_file.linktarget, path)
+                continue
+
+            tmppath = path + '.tmp'
+            pending.append((tmppath, path))
+
+            with open(tmppath, 'wb') as fp:
+                fp.truncate(new_file.size)
+
+                for chunk in new_file.chunks:
+                    if chunk.sha in diff.reused_chunks:
+                        old_file, old_chunk = diff.reused_chunks[chunk.sha]
+
+                        try:
+                            with open(os.path.join(dest_dir, old_file.filename), 'rb') as old_fp:
+                                old_fp.seek(old_chunk.offset)
+                                data = old_fp.read(old_chunk.cb_original)
+                        except (IOError, OSError):
+                            data = b''
+
+                        if verify_chunk(chunk, data):
+                            fp.seek(chunk.offset)
+                            fp.write(data)
+                            stats['chunks_reused'] += 1
+                            continue
+
+                    targets.setdefault(chunk.sha, (chunk, []))[1].append((tmppath, chunk.offset))
+
+        stats['chunks'], stats['bytes'] = self._download_chunks(new_manifest, targets, max_workers, num_servers)
+
+        for tmppath, path in pending:
+            _replace_file(tmppath, path)
+
+        # deepest paths first, so directories are empty by the time they are removed
+        for old_file in sorted(diff.removed, key=lambda depot_file: len(depot_file.filename_raw), reverse=True):
+            path = os.path.join(dest_dir, old_file.filename)
+
+            try:
+                if old_file.is_directory:
+                    os.rmdir(path)
+                else:
+                    os.remove(path)
+            except OSError:
+                pass
+
+        stats['seconds'] = time() - start
+        stats['bytes_per_second'] = stats['bytes'] / max(stats['seconds'], 0.001)
 
-        return self._chunk_cache[(depot_id, chunk_id)]
+        self._LOG.debug("Updated %r to %r. Downloaded %d chunks (%d bytes), reused %d",
+                        old_manifest, new_manifest, stats['chunks'], stats['bytes'], stats['chunks_reused'])
+
+        return stats
 
     def get_manifest_request_code(self, app_id, depot_id, manifest_gid, branch='public', branch_password_hash=None):
         """Get manifest request code for authenticating manifest download
@@ -686,7 +1522,8 @@ class CDNClient(object):
         :returns: manifest instance
         :rtype: :class:`.CDNDepotManifest`
         """
-        if (app_id, depot_id, manifest_gid) not in self.manifests:
+        if ((app_id, depot_id, manifest_gid) not in self.manifests
+           and self._get_stored_manifest(app_id, depot_id, manifest_gid, decrypt) is None):
             if manifest_request_code:
                 resp = self.cdn_cmd('depot', '%s/manifest/%s/5/%s' % (depot_id, manifest_gid, manifest_request_code))
             else:
@@ -696,10 +1533,43 @@ class CDNClient(object):
                 manifest = self.DepotManifestClass(self, app_id, resp.content)
                 if decrypt:
                     manifest.decrypt_filenames(self.get_depot_key(app_id, depot_id))
+                self.manifest_store.put(manifest)
+                if self.compact_manifests:
+                    manifest.compact()
                 self.manifests[(app_id, depot_id, manifest_gid)] = manifest
 
         return self.manifests[(app_id, depot_id, manifest_gid)]
 
+    def _get_stored_manifest(self, app_id, depot_id, manifest_gid, decrypt=True):
+        """Load manifest from :attr:`manifest_store` into :attr:`manifests`
+
+        :returns: manifest instance, or ``None`` when not stored
+        :rtype: :class:`.CDNDepotManifest`
+        """
+        data = self.manifest_store.get(depot_id, manifest_gid)
+
+        if data is None:
+            return None
+
+        try:
+            manifest = self.DepotManifestClass(self, app_id, data)
+        except Exception as exp:
+            self._LOG.debug("Failed to load stored manifest %s/%s: %s", depot_id, manifest_gid, exp)
+            return None
+
+        if manifest.depot_id != depot_id or manifest.gid != int(manifest_gid):
+            self._LOG.debug("Stored manifest %s/%s doesn't match. Ignoring", depot_id, manifest_gid)
+            return None
+
+        if decrypt and manifest.filenames_encrypted:
+            manifest.decrypt_filenames(self.get_depot_key(app_id, depot_id))
+            self.manifest_store.put(manifest)
+        if self.compact_manifests:
+            manifest.compact()
+
+        self.manifests[(app_id, depot_id, manifest_gid)] = manifest
+        return manifest
+
     def check_beta_password(self, app_id, password):
         """Check branch beta password to unlock encrypted branches
 
@@ -780,6 +1650,18 @@ class CDNClient(object):
         def async_fetch_manifest(
             app_id, depot_id, manifest_gid, decrypt, depot_name, branch_name, branch_pass
         ):
+            try:
+                if (app_id, depot_id, manifest_gid) in self.manifests:
+                    manifest = self.manifests[(app_id, depot_id, manifest_gid)]
+                else:
+                    manifest = self._get_stored_manifest(app_id, depot_id, manifest_gid, decrypt)
+            except Exception as exc:
+                return ManifestError("Failed to load stored manifest", app_id, depot_id, manifest_gid, exc)
+
+            if manifest is not None:
+                manifest.name = depot_name
+                return manifest
+
             try:
                 manifest_code = self.get_manifest_request_code(
                     app_id, depot_id, int(manifest_gid), branch_name, branch_pass
@@ -0,0 +1,462 @@
+"""
+Helpers for PICS (Product Info and Change Stream)
+
+.. code:: python
+
+    from steam.client.pics import ProductInfoCache
+
+    client.product_info_cache = ProductInfoCache('./product_info.db')
+    client.get_product_info(apps=[570])  # full request
+    client.get_product_info(apps=[570])  # meta data request, buffer loaded from cache
+    print(client.product_info_cache.stats)
+
+:class:`PICSWatcher` follows the change stream, and fetches info for changed apps and packages
+
+.. code:: python
+
+    from steam.client.pics import PICSWatcher
+
+    watcher = PICSWatcher(client, cursor_path='./pics_cursor.json')
+
+    @watcher.on(PICSWatcher.EVENT_PRODUCT_INFO)
+    def handle_info(kind, product_id, info):
+        if kind == 'apps':
+            print(product_id, info['common']['name'])
+
+    watcher.start()
+
+With :attr:`.Apps.lazy_product_info` set, product info buffers are parsed on first access,
+see :class:`LazyProductInfo`.
+"""
+import os
+import json
+import logging
+import sqlite3
+from binascii import hexlify
+from collections import Counter, namedtuple
+from tempfile import mkstemp
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
+
+import vdf
+import gevent
+from eventemitter import EventEmitter
+
+
+ProductInfo = namedtuple('ProductInfo', ['change_number', 'missing_token', 'sha', 'size', 'buffer'])
+ProductInfo.__doc__ = "Raw product info entry, with the same fields as in ``CMsgClientPICSProductInfoResponse``"
+
+
+def product_info_meta(info):
+    """Meta data fields for a product info entry
+
+    :param info: :class:`.ProductInfo` or an entry from ``CMsgClientPICSProductInfoResponse``
+    :rtype: :class:`dict`
+    """
+    return {'_missing_token': info.missing_token,
+            '_change_number': info.change_number,
+            '_sha': hexlify(info.sha).decode('ascii'),
+            '_size': info.size,
+            }
+
+
+def parse_product_info(kind, product_id, buffer):
+    """Parse product info buffer
+
+    :param kind: ``apps`` or ``packages``
+    :type  kind: str
+    :param product_id: app or package id
+    :type  product_id: int
+    :param buffer: text VDF for apps, binary VDF for packages
+    :type  buffer: bytes
+    :rtype: :class:`dict`
+    """
+    if kind == 'apps':
+        return vdf.loads(buffer[:-1].decode('utf-8', 'replace'))['appinfo']
+    else:
+        return vdf.binary_loads(buffer[4:]).get(str(product_id), {})
+
+
+class LazyProductInfo(MutableMapping):
+    _header = b'"appinfo"\n{\n\t'
+
+    def __init__(self, kind, product_id, info):
+        """Product info mapping, that parses the buffer on first access
+
+        Meta data keys (``_change_number``, ``_sha``, etc) never trigger parsing.
+        For apps, accessing a single top-level key (e.g. ``info['depots']``) only parses
+        that section of the buffer. Anything that needs all keys, like iteration or
+        modification, parses the whole buffer.
+
+        :param kind: ``apps`` or ``packages``
+        :type  kind: str
+        :param product_id: app or package id
+        :type  product_id: int
+        :param info: :class:`.ProductInfo` or an entry from ``CMsgClientPICSProductInfoResponse``
+        """
+        self.kind = kind
+        self.product_id = product_id
+        self._buffer = info.buffer
+        self._meta = product_info_meta(info)
+        self._sections = {}
+        self._data = None
+
+    def __repr__(self):
+        return "<%s(%r, %d, parsed=%s)>" % (
+            self.__class__.__name__,
+            self.kind,
+            self.product_id,
+            self.parsed,
+            )
+
+    @property
+    def parsed(self):
+        """Whether the whole buffer has been parsed"""
+        return self._data is not None
+
+    @property
+    def data(self):
+        """Fully parsed product info
+
+        :rtype: :class:`dict`
+        """
+        if self._data is None:
+            self._data = parse_product_info(self.kind, self.product_id, self._buffer)
+            self._data.update(self._meta)
+
+            # keep sections already handed out
+            for key, value in self._sections.items():
+                if value is not KeyError:
+                    self._data[key] = value
+
+            self._sections = None
+            self._buffer = None
+
+        return self._data
+
+    def _parse_section(self, key):
+        # Steam formats app info with one tab per level, so top-level keys are found
+        # at the start of lines with a single tab. Returns None when unsure.
+        if self.kind != 'apps' or not self._buffer.startswith(self._header):
+            return None
+
+        try:
+            marker = b'\n\t"' + key.encode('utf-8') + b'"'
+        except AttributeError:
+            return None
+
+        start = self._buffer.find(marker)
+
+        if start == -1:
+            return KeyError
+
+        if self._buffer[start + len(marker):start + len(marker) + 1] == b'\n':
+            end = self._buffer.find(b'\n\t}', start)
+
+            if end == -1:
+                return None
+
+            end += 3
+        else:
+            end = self._buffer.find(b'\n', start + 1)
+
+        # duplicate keys are merged by a full parse
+        if self._buffer.find(marker, end) != -1:
+            return None
+
+        return vdf.loads(self._buffer[start:end].decode('utf-8', 'replace')).get(key, KeyError)
+
+    def __getitem__(self, key):
+        if key in self._meta:
+            return self._meta[key]
+        if self._data is not None:
+            return self._data[key]
+
+        if key not in self._sections:
+            value = self._parse_section(key)
+
+            if value is None:
+                return self.data[key]
+
+            self._sections[key] = value
+
+        value = self._sections[key]
+
+        if value is KeyError:
+            raise KeyError(key)
+
+        return value
+
+    def __setitem__(self, key, value):
+        self.data[key] = value
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return iter(self.data)
+
+    def __len__(self):
+        return len(self.data)
+
+
+class ProductInfoCache(object):
+    _LOG = logging.getLogger("ProductInfoCache")
+
+    def __init__(self, path=':memory:'):
+        """Persistent cache of raw product info buffers, keyed by app or package id
+
+        When set as :attr:`.Apps.product_info_cache`, :meth:`.Apps.get_product_info` first
+        sends a ``meta_data_only`` request, and only requests full info for entries whose
+        change number or SHA differ from the cached ones.
+
+        :param path: SQLite database path
+        :type  path: str
+        """
+        self.path = path
+        self.stats = Counter()  #: ``hits`` and ``misses`` counters
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS product_info ("
+                         " kind TEXT NOT NULL,"
+                         " id INTEGER NOT NULL,"
+                         " change_number INTEGER NOT NULL,"
+                         " sha BLOB NOT NULL,"
+                         " size INTEGER NOT NULL,"
+                         " buffer BLOB NOT NULL,"
+                         " PRIMARY KEY (kind, id))")
+        self._db.commit()
+
+    def __repr__(self):
+        return "<%s(%r, hits=%d, misses=%d)>" % (
+            self.__class__.__name__,
+            self.path,
+            self.stats['hits'],
+            self.stats['misses'],
+            )
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM product_info").fetchone()[0]
+
+    def get(self, kind, product_id):
+        """Get cached entry
+
+        :param kind: ``apps`` or ``packages``
+        :type  kind: str
+        :param product_id: app or package id
+        :type  product_id: int
+        :rtype: :class:`.ProductInfo`, :class:`None`
+        """
+        row = self._db.execute("SELECT change_number, sha, size, buffer FROM product_info"
+                               " WHERE kind = ? AND id = ?", (kind, product_id)).fetchone()
+
+        if row is None:
+            return None
+
+        change_number, sha, size, buffer = row
+        return ProductInfo(change_number, False, bytes(sha), size, bytes(buffer))
+
+    def put_many(self, kind, entries):
+        """Store entries that have a buffer
+
+        :param kind: ``apps`` or ``packages``
+        :type  kind: str
+        :param entries: ``(product_id, info)`` pairs, where ``info`` is :class:`.ProductInfo` or
+                        an entry from ``CMsgClientPICSProductInfoResponse``
+        :type  entries: :class:`list`
+        """
+        rows = [(kind, product_id, info.change_number, info.sha, info.size, info.buffer)
+                for product_id, info in entries
+                if info.buffer and not info.missing_token]
+
+        if rows:
+            self._db.executemany("INSERT OR REPLACE INTO product_info VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self._db.commit()
+
+    def clear(self):
+        """Remove all entries"""
+        self._db.execute("DELETE FROM product_info")
+        self._db.commit()
+
+    def close(self):
+        """Close the database"""
+        self._db.close()
+
+
+_replace_file = getattr(os, 'replace', os.rename)
+
+
+class PICSWatcher(EventEmitter):
+    EVENT_CHANGES = 'changes'
+    """Change number advanced
+
+    :param change_number: new change number
+    :type  change_number: :class:`int`
+    :param app_ids: changed app ids
+    :type  app_ids: :class:`list`
+    :param package_ids: changed package ids
+    :type  package_ids: :class:`list`
+    """
+    EVENT_PRODUCT_INFO = 'product_info'
+    """Product info for a changed app or package, see :meth:`.Apps.iter_product_info`
+
+    :param kind: ``apps`` or ``packages``
+    :type  kind: str
+    :param product_id: app or package id
+    :type  product_id: :class:`int`
+    :param info: product info
+    :type  info: :class:`dict`
+    """
+    EVENT_FULL_UPDATE = 'full_update'
+    """Cursor is too old (or unset) for Steam to list the changes, everything should be refreshed
+
+    :param change_number: current change number
+    :type  change_number: :class:`int`
+    """
+
+    _LOG = logging.getLogger("PICSWatcher")
+    poll_interval = 10     #: seconds between polls
+    timeout = 15           #: product info request timeout
+
+    def __init__(self, client, cursor_path=None, change_number=0,
+                 app_changes=True, package_changes=True, fetch_info=True):
+        """Follow PICS changes via :meth:`.Apps.get_changes_since`
+
+        :param client: logged on client
+        :type  client: :class:`.SteamClient`
+        :param cursor_path: (optional) path to a JSON file where the change number is persisted
+        :type  cursor_path: str
+        :param change_number: starting change number, when there is no persisted cursor
+        :type  change_number: :class:`int`
+        :param app_changes: follow app changes
+        :type  app_changes: :class:`bool`
+        :param package_changes: follow package changes
+        :type  package_changes: :class:`bool`
+        :param fetch_info: request product info for changed apps and packages
+        :type  fetch_info: :class:`bool`
+        """
+        self.client = client
+        self.cursor_path = cursor_path
+        self.change_number = change_number  #: last processed change number
+        self.app_changes = app_changes
+        self.package_changes = package_changes
+        self.fetch_info = fetch_info
+        self._loop = None
+
+        if cursor_path:
+            self.load_cursor()
+
+    def __repr__(self):
+        return "<%s(change_number=%d, running=%s)>" % (
+            self.__class__.__name__,
+            self.change_number,
+            self.running,
+            )
+
+    def emit(self, event, *args):
+        if event is not None:
+            self._LOG.debug("Emit event: %s" % repr(event))
+        EventEmitter.emit(self, event, *args)
+
+    @property
+    def running(self):
+        """Whether the poll loop is running"""
+        return self._loop is not None and not self._loop.dead
+
+    def load_cursor(self):
+        """Load change number from :attr:`cursor_path`, if the file exists"""
+        try:
+            with open(self.cursor_path, 'r') as fp:
+                self.change_number = int(json.load(fp)['change_number'])
+        except (IOError, OSError):
+            pass
+        except (ValueError, KeyError, TypeError):
+            self._LOG.error("Invalid cursor file: %s" % self.cursor_path)
+
+    def save_cursor(self):
+        """Atomically write change number to :attr:`cursor_path`"""
+        if not self.cursor_path:
+            return
+
+        fd, tmppath = mkstemp(prefix='.tmp', dir=os.path.dirname(os.path.abspath(self.cursor_path)))
+
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump({'change_number': self.change_number}, fp)
+            _replace_file(tmppath, self.cursor_path)
+        except Exception:
+            os.remove(tmppath)
+            raise
+
+    def start(self):
+        """Start polling in a greenlet"""
+        if not self.running:
+            self._loop = gevent.spawn(self._run)
+
+    def stop(self):
+        """Stop polling"""
+        if self._loop is not None:
+            self._loop.kill()
+            self._loop = None
+
+    def _run(self):
+        while True:
+            if self.client.logged_on:
+                try:
+                    self.poll()
+                except (Exception, gevent.Timeout) as exp:
+                    self._LOG.error("Poll failed: %r" % exp)
+
+            gevent.sleep(self.poll_interval)
+
+    def poll(self):
+        """Request changes once, fetch product info for them, then advance the cursor
+
+        The cursor is only advanced once all product info has been fetched,
+        so a failed poll is retried from the same change number.
+
+        :return: whether the change number advanced
+        :rtype: :class:`bool`
+        """
+        resp = self.client.get_changes_since(self.change_number, self.app_changes, self.package_changes)
+
+        if resp is None:
+            self._LOG.debug("Timed out waiting for changes")
+            return False
+
+        change_number = resp.current_change_number
+
+        if change_number == self.change_number:
+            return False
+
+        if resp.force_full_update or resp.force_full_app_update or resp.force_full_package_update:
+            self.emit(self.EVENT_FULL_UPDATE, change_number)
+        else:
+            app_ids = sorted(set(change.appid for change in resp.app_changes))
+            package_ids = sorted(set(change.packageid for change in resp.package_changes))
+
+            self.emit(self.EVENT_CHANGES, change_number, app_ids, package_ids)
+
+            if self.fetch_info:
+                self.fetch(app_ids, package_ids)
+
+        self.change_number = change_number
+        self.save_cursor()
+        return True
+
+    def fetch(self, app_ids=[], package_ids=[]):
+        """Request product info, and emit :attr:`EVENT_PRODUCT_INFO` for each entry
+
+        Requests are batched and pipelined by :meth:`.Apps.iter_product_info`,
+        see :attr:`.Apps.product_info_batch_size` and :attr:`.Apps.product_info_max_jobs`.
+
+        :param app_ids: app ids
+        :type  app_ids: :class:`list`
+        :param package_ids: package ids
+        :type  package_ids: :class:`list`
+        """
+        for kind, product_id, info in self.client.iter_product_info(apps=app_ids, packages=package_ids,
+                                                                    timeout=self.timeout):
+            self.emit(self.EVENT_PRODUCT_INFO, kind, product_id, info)
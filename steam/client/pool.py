@@ -0,0 +1,218 @@
+"""
+Run many :class:`.SteamClient` instances in one process
+
+Clients created by the pool share the CM server list (including which servers are bad),
+one heartbeat greenlet, and the HTTP connection pools used for web sessions.
+Logons are spaced out across the whole pool, so starting many accounts at once
+doesn't trip CM rate limits.
+
+.. code:: python
+
+    from steam.client.pool import SteamClientPool
+
+    pool = SteamClientPool(credential_location='./sentries')
+
+    for username, password in accounts:
+        client = pool.create_client()
+        gevent.spawn(pool.login, client, username, password)
+
+    print(pool.get_metrics())
+"""
+import logging
+from collections import Counter
+from time import time
+
+import gevent
+from gevent.lock import Semaphore
+from requests.adapters import HTTPAdapter
+
+from steam.enums import EResult
+from steam.core.cm import CMServerList, HeartbeatTimer
+from steam.client import SteamClient
+
+
+class SteamClientPool(object):
+    _LOG = logging.getLogger("SteamClientPool")
+    logon_interval = 0.5  #: min seconds between logon attempts across the pool
+    http_pool_size = 10   #: max number of kept-alive HTTP connections per host, shared by all clients
+
+    def __init__(self, client_class=SteamClient, credential_location=None):
+        """Manager for many :class:`.SteamClient` instances
+
+        :param client_class: class used by :meth:`create_client`
+        :type  client_class: :class:`.SteamClient`
+        :param credential_location: (optional) sentry location for clients, see :meth:`.SteamClient.set_credential_location`
+        :type  credential_location: str
+        """
+        self.client_class = client_class
+        self.credential_location = credential_location
+        self.clients = []                       #: managed clients
+        self.cm_servers = CMServerList()        #: :class:`.CMServerList` shared by all clients
+        self.heartbeat_timer = HeartbeatTimer() #: :class:`.HeartbeatTimer` shared by all clients
+        self.web_adapter = HTTPAdapter(pool_connections=10, pool_maxsize=self.http_pool_size)
+        self.counters = Counter()               #: event counters, see :meth:`get_metrics`
+
+        self._bootstrap_lock = Semaphore()
+        self._logon_lock = Semaphore()
+        self._next_logon = 0
+        self._listeners = {}
+
+    def __repr__(self):
+        return "<%s(%d clients)>" % (self.__class__.__name__, len(self.clients))
+
+    def __len__(self):
+        return len(self.clients)
+
+    def __iter__(self):
+        return iter(list(self.clients))
+
+    def create_client(self, *args, **kwargs):
+        """Create a new client, and add it to the pool
+
+        :returns: client instance
+        :rtype: :class:`.SteamClient`
+        """
+        client = self.client_class(*args, **kwargs)
+        self.add_client(client)
+        return client
+
+    def add_client(self, client):
+        """Add existing client to the pool
+
+        :param client: disconnected client
+        :type  client: :class:`.SteamClient`
+        """
+        if client in self._listeners:
+            return
+
+        client.cm_servers = self.cm_servers
+        client.heartbeat_timer = self.heartbeat_timer
+        client.web_adapter = self.web_adapter
+
+        if self.credential_location and not client.credential_location:
+            client.set_credential_location(self.credential_location)
+
+        listeners = [
+            (client.EVENT_LOGGED_ON, lambda *args: self.counters.update(['logged_on'])),
+            (client.EVENT_DISCONNECTED, lambda *args: self.counters.update(['disconnected'])),
+            (client.EVENT_ERROR, lambda *args: self.counters.update(['error'])),
+        ]
+
+        for event, callback in listeners:
+            client.on(event, callback)
+
+        self._listeners[client] = listeners
+        self.clients.append(client)
+
+    def remove_client(self, client):
+        """Remove client from the pool. The client keeps its connection, if any.
+
+        :param client: client
+        :type  client: :class:`.SteamClient`
+        """
+        for event, callback in self._listeners.pop(client, ()):
+            client.remove_listener(event, callback)
+
+        if client in self.clients:
+            self.clients.remove(client)
+
+        self.heartbeat_timer.remove(client)
+        client.cm_servers = CMServerList()
+        client.heartbeat_timer = None
+        client.web_adapter = None
+
+    def bootstrap(self):
+        """Populate the shared CM server list once, for all clients
+
+        :return: whether the server list is populated
+        :rtype: :class:`bool`
+        """
+        with self._bootstrap_lock:
+            if len(self.cm_servers) == 0:
+                if self.clients:
+                    self.clients[0]._bootstrap_cm_list_from_file()
+                if len(self.cm_servers) == 0 and not self.cm_servers.bootstrap_from_webapi():
+                    self.cm_servers.bootstrap_from_dns()
+
+            return len(self.cm_servers) > 0
+
+    def _wait_logon_slot(self):
+        with self._logon_lock:
+            delay = self._next_logon - time()
+
+            if delay > 0:
+                gevent.sleep(delay)
+
+            self._next_logon = time() + self.logon_interval
+
+    def _logon(self, func, *args, **kwargs):
+        self.bootstrap()
+        self._wait_logon_slot()
+
+        self.counters['logon_attempts'] += 1
+        result = func(*args, **kwargs)
+
+        if result != EResult.OK:
+            self.counters['logon_failures'] += 1
+            self._LOG.debug("Logon failed: %r", result)
+
+        return result
+
+    def login(self, client, *args, **kwargs):
+        """Rate limited :meth:`.SteamClient.login`
+
+        :param client: client from the pool
+        :type  client: :class:`.SteamClient`
+        :return: logon result
+        :rtype: :class:`.EResult`
+        """
+        return self._logon(client.login, *args, **kwargs)
+
+    def relogin(self, client):
+        """Rate limited :meth:`.SteamClient.relogin`
+
+        :param client: client from the pool
+        :type  client: :class:`.SteamClient`
+        :return: logon result
+        :rtype: :class:`.EResult`
+        """
+        return self._logon(client.relogin)
+
+    def anonymous_login(self, client):
+        """Rate limited :meth:`.SteamClient.anonymous_login`
+
+        :param client: client from the pool
+        :type  client: :class:`.SteamClient`
+        :return: logon result
+        :rtype: :class:`.EResult`
+        """
+        return self._logon(client.anonymous_login)
+
+    def disconnect_all(self):
+        """Disconnect all clients in the pool"""
+        for client in self:
+            client.disconnect()
+
+    def get_metrics(self):
+        """Aggregate state of the pool
+
+        :return: counts of clients, connections, logons and messages sent
+        :rtype: :class:`dict`
+        """
+        metrics = {
+            'clients': len(self.clients),
+            'connected': sum(1 for client in self.clients if client.connected),
+            'logged_on': sum(1 for client in self.clients if client.logged_on),
+            'heartbeats': len(self.heartbeat_timer),
+            'cm_servers': len(self.cm_servers),
+            'cm_servers_bad': sum(1 for meta in self.cm_servers.list.values()
+                                  if meta['quality'] == CMServerList.Bad),
+            'messages_sent': sum(size * count
+                                 for client in self.clients
+                                 for size, count in client.connection.send_batch_sizes.items()),
+        }
+
+        for name in ['logon_attempts', 'logon_failures', 'logged_on', 'disconnected', 'error']:
+            metrics['total_' + name] = self.counters[name]
+
+        return metrics
@@ -1,15 +1,16 @@
 import struct
 import binascii
 import logging
-from gzip import GzipFile
+import zlib
 from time import time
 from collections import defaultdict
 from itertools import cycle, count
 
-from io import BytesIO
-
 import gevent
 import gevent.socket as socket
+from gevent import get_hub
+from gevent.event import AsyncResult
+from gevent.queue import Queue
 from random import shuffle
 
 from steam.steamid import SteamID
@@ -23,6 +24,24 @@ from steam.utils import ip4_from_int
 from steam.utils.proto import is_proto, clear_proto_bit
 
 
+def concurrent(func):
+    """Mark a message handler to run in its own greenlet when :attr:`CMClient.inline_dispatch` is enabled
+
+    Inline handlers run one after another on the dispatcher greenlet, so any handler
+    that blocks (e.g. calls :meth:`wait_event` or sends a job and waits for the response)
+    needs this, or it will wait forever on messages that are queued behind it.
+
+    .. code:: python
+
+        @client.on(EMsg.ClientPersonaState)
+        @concurrent
+        def handle_persona_state(msg):
+            client.wait_event(...)
+    """
+    func.concurrent = True
+    return func
+
+
 class CMClient(EventEmitter):
     """
     CMClient provides a secure message channel to Steam CM servers
@@ -60,9 +79,14 @@ class CMClient(EventEmitter):
     PROTOCOL_TCP = 0                        #: TCP protocol enum
     PROTOCOL_UDP = 1                        #: UDP protocol enum
     verbose_debug = False                   #: print message connects in debug
+    inline_dispatch = False                 #: parse messages and call their handlers in order on one greenlet, see :func:`concurrent`
+    multi_chunk_size = 65536                #: number of compressed bytes inflated at a time when unpacking a Multi
+    parse_queue_size = 64                   #: max number of decrypted messages waiting to be parsed
+    decrypt_thread_min_size = None          #: decrypt messages of at least this size in the hub threadpool, ``None`` to disable
 
     auto_discovery = True                   #: enables automatic CM discovery
     cm_servers = None                       #: a instance of :class:`.CMServerList`
+    heartbeat_timer = None                  #: shared :class:`.HeartbeatTimer`, instead of a heartbeat greenlet per client
     current_server_addr = None              #: (ip, port) tuple
     _seen_logon = False
     _connecting = False
@@ -71,12 +95,14 @@ class CMClient(EventEmitter):
 
     channel_key = None                      #: channel encryption key
     channel_hmac = None                     #: HMAC secret
+    channel_cipher = None                   #: :class:`.ChannelCipher` for the secured channel
 
     steam_id = SteamID()                    #: :class:`.SteamID` of the current user
     session_id = None                       #: session id when logged in
     cell_id = 0                             #: cell id provided by CM
 
     _recv_loop = None
+    _parse_loop = None
     _heartbeat_loop = None
     _LOG = logging.getLogger("CMClient")
 
@@ -169,8 +195,14 @@ class CMClient(EventEmitter):
 
         if self._heartbeat_loop:
             self._heartbeat_loop.kill()
+        if self.heartbeat_timer is not None:
+            self.heartbeat_timer.remove(self)
         self._recv_loop.kill()
 
+        # disconnect may be called by a handler running on the parse greenlet
+        if self._parse_loop and self._parse_loop is not gevent.getcurrent():
+            self._parse_loop.kill()
+
         self._reset_attributes()
 
         self.emit(self.EVENT_DISCONNECTED)
@@ -180,10 +212,12 @@ class CMClient(EventEmitter):
                      'channel_secured',
                      'channel_key',
                      'channel_hmac',
+                     'channel_cipher',
                      'steam_id',
                      'session_id',
                      '_seen_logon',
                      '_recv_loop',
+                     '_parse_loop',
                      '_heartbeat_loop',
                      ]:
             self.__dict__.pop(name, None)
@@ -210,31 +244,34 @@ class CMClient(EventEmitter):
 
         data = message.serialize()
 
-        if self.channel_key:
-            if self.channel_hmac:
-                data = crypto.symmetric_encrypt_HMAC(data, self.channel_key, self.channel_hmac)
-            else:
-                data = crypto.symmetric_encrypt(data, self.channel_key)
+        if self.channel_cipher:
+            data = self.channel_cipher.encrypt(data)
 
         self.connection.put_message(data)
 
     def _recv_messages(self):
+        # receive pipeline:
+        #   connection greenlet  - reads and frames packets, into connection.recv_queue
+        #   this greenlet        - decrypts, into parse_queue
+        #   _parse_messages      - parses and emits, inline or in a greenlet per message
+        parse_queue = Queue(self.parse_queue_size)
+        self._parse_loop = gevent.spawn(self._parse_messages, parse_queue)
+
         for message in self.connection:
             if not self.connected:
                 break
 
-            if self.channel_key:
-                if self.channel_hmac:
-                    try:
-                        message = crypto.symmetric_decrypt_HMAC(message, self.channel_key, self.channel_hmac)
-                    except RuntimeError as e:
-                        self._LOG.exception(e)
-                        break
-                else:
-                    message = crypto.symmetric_decrypt(message, self.channel_key)
+            if self.channel_cipher:
+                try:
+                    message = self._decrypt_message(message)
+                except RuntimeError as e:
+                    self._LOG.exception(e)
+                    break
+
+            parse_queue.put(message)
 
-            gevent.spawn(self._parse_message, message)
-            self.idle()
+        parse_queue.put(StopIteration)
+        self._parse_loop.join()
 
         if not self._seen_logon and self.channel_secured:
             if self.wait_event('disconnected', timeout=5) is not None:
@@ -242,9 +279,72 @@ class CMClient(EventEmitter):
 
         gevent.spawn(self.disconnect)
 
+    def _decrypt_message(self, message):
+        if self.decrypt_thread_min_size is not None and len(message) >= self.decrypt_thread_min_size:
+            return get_hub().threadpool.apply(self.channel_cipher.decrypt, (message,))
+        return self.channel_cipher.decrypt(message)
+
+    def _emit_message(self, event, *args):
+        """Emit an incoming message. With :attr:`inline_dispatch`, handlers are called
+        directly in order, except those marked with :func:`concurrent`"""
+        if not self.inline_dispatch:
+            self.emit(event, *args)
+            return
+
+        callbacks = getattr(self, '_EventEmitter__callbacks', None)
+
+        if not callbacks:
+            return
+
+        self._LOG.debug("Emit event: %s" % repr(event))
+
+        for key, call_args in ((event, args), (None, (event,) + args)):
+            if key not in callbacks:
+                continue
+
+            for callback, once in list(callbacks[key].items()):
+                if once:
+                    self.remove_listener(key, callback)
+
+                if isinstance(callback, AsyncResult):
+                    callback.set(call_args)
+                elif getattr(callback, 'concurrent', False):
+                    gevent.spawn(callback, *call_args)
+                else:
+                    try:
+                        callback(*call_args)
+                    except Exception as e:
+                        self._LOG.exception(e)
+
+    def _parse_messages(self, parse_queue):
+        for message in parse_queue:
+            if self.inline_dispatch:
+                # keep going after a bad message, like a failed greenlet would
+                try:
+                    self._parse_message(message)
+                except Exception as e:
+                    self._LOG.exception(e)
+            else:
+                gevent.spawn(self._parse_message, message)
+
+            if not self.connected:
+                break
+
+            # inline, only yield once caught up, instead of after every message
+            if not self.inline_dispatch or parse_queue.empty():
+                self.idle()
+
     def _parse_message(self, message):
         emsg_id, = struct.unpack_from("<I", message)
-        emsg = EMsg(clear_proto_bit(emsg_id))
+
+        try:
+            emsg = EMsg(clear_proto_bit(emsg_id))
+        except ValueError:
+            self._LOG.debug("Dropped unknown message: %d (is_proto: %s)",
+                            clear_proto_bit(emsg_id),
+                            is_proto(emsg_id),
+                            )
+            return
 
         if not self.connected and emsg != EMsg.ClientLogOnResponse:
             self._LOG.debug("Dropped unexpected message: %s (is_proto: %s)",
@@ -281,9 +381,15 @@ class CMClient(EventEmitter):
         else:
             self._LOG.debug("Incoming: %s", repr(msg))
 
-        self.emit(emsg, msg)
+        if emsg == EMsg.Multi and self.inline_dispatch:
+            msg.parse()
+            self.__handle_multi(msg)
+            return emsg, msg
+
+        self._emit_message(emsg, msg)
         return emsg, msg
 
+    @concurrent
     def __handle_encrypt_request(self, req):
         self._LOG.debug("Securing channel")
 
@@ -327,32 +433,106 @@ class CMClient(EventEmitter):
         else:
             self._LOG.debug("Channel secured (legacy mode)")
 
+        self.channel_cipher = crypto.ChannelCipher(self.channel_key, self.channel_hmac)
+
         self.channel_secured = True
         self.emit(self.EVENT_CHANNEL_SECURED)
 
     def __handle_multi(self, msg):
         self._LOG.debug("Multi: Unpacking")
 
-        if msg.body.size_unzipped:
-            self._LOG.debug("Multi: Decompressing payload (%d -> %s)" % (
-                len(msg.body.message_body),
-                msg.body.size_unzipped,
-                ))
+        body = msg.body.message_body
+        size_unzipped = msg.body.size_unzipped
+        num_messages = total_size = 0
+
+        if size_unzipped:
+            self._LOG.debug("Multi: Decompressing payload (%d -> %s)" % (len(body), size_unzipped))
 
-            with GzipFile(fileobj=BytesIO(msg.body.message_body)) as f:
-                data = f.read()
+        messages = self._iter_multi(body, size_unzipped)
 
-            if len(data) != msg.body.size_unzipped:
-                self._LOG.fatal("Unzipped size mismatch")
+        while True:
+            try:
+                message = next(messages)
+            except StopIteration:
+                break
+            except EOFError as e:
+                # stream ended early, drop the rest but keep the session
+                self._LOG.error("Multi: Dropped payload: %s" % str(e))
+                return
+            except (zlib.error, struct.error, ValueError) as e:
+                self._LOG.fatal("Multi: Failed to unpack payload: %s" % str(e))
                 gevent.spawn(self.disconnect)
                 return
-        else:
-            data = msg.body.message_body
 
-        while len(data) > 0:
-            size, = struct.unpack_from("<I", data)
-            self._parse_message(data[4:4+size])
-            data = data[4+size:]
+            self._parse_message(message)
+            num_messages += 1
+            total_size += len(message)
+
+        self._LOG.debug("Multi: Unpacked %d messages (%d bytes)" % (num_messages, total_size))
+
+    def _iter_multi(self, body, size_unzipped=0):
+        """Iterate over the messages packed inside a Multi payload
+
+        Compressed payloads are inflated incrementally, so messages are yielded
+        as soon as they are fully decompressed.
+
+        :param body: ``message_body`` of ``CMsgMulti``
+        :type body: :class:`bytes`
+        :param size_unzipped: size of the decompressed payload, ``0`` if not compressed
+        :type size_unzipped: :class:`int`
+        :return: generator of messages
+        :rtype: :class:`bytes`
+        :raises: :class:`ValueError` when the payload is truncated or the unzipped size doesn't match,
+                 :class:`EOFError` when the gzip stream ends early
+        """
+        if not size_unzipped:
+            offset = 0
+
+            while offset < len(body):
+                size, = struct.unpack_from("<I", body, offset)
+
+                if offset + 4 + size > len(body):
+                    raise ValueError("Truncated payload")
+
+                yield body[offset+4:offset+4+size]
+                offset += 4 + size
+            return
+
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip container
+        chunk_size = self.multi_chunk_size
+        buf = bytearray()
+        total = 0
+
+        def inflate():
+            for i in range(0, len(body), chunk_size):
+                yield decompressor.decompress(body[i:i+chunk_size])
+            yield decompressor.flush()
+
+        for data in inflate():
+            buf += data
+            offset = 0
+
+            while len(buf) - offset >= 4:
+                size, = struct.unpack_from("<I", buf, offset)
+
+                if len(buf) - offset - 4 < size:
+                    break
+
+                view = memoryview(buf)
+                message = view[offset+4:offset+4+size].tobytes()
+                del view
+
+                yield message
+                offset += 4 + size
+
+            if offset:
+                del buf[:offset]
+                total += offset
+
+        if not decompressor.eof:
+            raise EOFError("Truncated gzip payload")
+        if buf or total != size_unzipped:
+            raise ValueError("Unzipped size mismatch")
 
     def __heartbeat(self, interval):
         message = MsgProto(EMsg.ClientHeartBeat)
@@ -384,7 +564,11 @@ class CMClient(EventEmitter):
             self._LOG.debug("Heartbeat started.")
 
             interval = msg.body.heartbeat_seconds
-            self._heartbeat_loop = gevent.spawn(self.__heartbeat, interval)
+
+            if self.heartbeat_timer is not None:
+                self.heartbeat_timer.add(self, interval)
+            else:
+                self._heartbeat_loop = gevent.spawn(self.__heartbeat, interval)
         else:
             self.emit(self.EVENT_ERROR, EResult(result))
             self.disconnect()
@@ -406,6 +590,60 @@ class CMClient(EventEmitter):
         gevent.idle()
 
 
+class HeartbeatTimer(object):
+    """
+    Sends heartbeats for many :class:`CMClient` instances from a single greenlet
+
+    .. code:: python
+
+        timer = HeartbeatTimer()
+        for client in clients:
+            client.heartbeat_timer = timer
+    """
+    resolution = 1  #: how often due heartbeats are checked, in seconds
+
+    def __init__(self):
+        self._clients = {}
+        self._loop = None
+
+    def __len__(self):
+        return len(self._clients)
+
+    def add(self, client, interval):
+        """Send heartbeats for client every ``interval`` seconds
+
+        :param client: logged on client
+        :type client: :class:`CMClient`
+        :param interval: seconds between heartbeats
+        :type interval: :class:`int`
+        """
+        self._clients[client] = [interval, time() + interval]
+
+        if self._loop is None or self._loop.dead:
+            self._loop = gevent.spawn(self._run)
+
+    def remove(self, client):
+        """Stop sending heartbeats for client
+
+        :param client: client
+        :type client: :class:`CMClient`
+        """
+        self._clients.pop(client, None)
+
+    def _run(self):
+        while self._clients:
+            now = time()
+
+            for client, entry in list(self._clients.items()):
+                interval, due = entry
+
+                if due <= now:
+                    entry[1] = now + interval
+                    client.send(MsgProto(EMsg.ClientHeartBeat))
+
+            gevent.sleep(self.resolution)
+
+
 class CMServerList(object):
     """
     Managing object for CM servers
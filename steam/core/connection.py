@@ -1,5 +1,7 @@
+import os
 import struct
 import logging
+from collections import Counter
 
 import gevent
 from gevent import socket
@@ -9,11 +11,23 @@ from gevent.select import select as gselect
 
 logger = logging.getLogger("Connection")
 
+try:
+    IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, ValueError, OSError):
+    IOV_MAX = 1024
+
+if IOV_MAX <= 0:
+    IOV_MAX = 1024
+
 
 class Connection(object):
     MAGIC = b'VT01'
     FMT = '<I4s'
     FMT_SIZE = struct.calcsize(FMT)
+    recv_size = 16384       #: max number of bytes to read from the socket in one call
+    send_batch_size = 64    #: max number of queued messages written to the socket in one call
+    send_flush_delay = 0    #: seconds to wait for more messages before writing a batch
+    recv_queue_size = None  #: max number of received messages waiting to be processed (``None`` for unbounded)
 
     def __init__(self):
         self.socket = None
@@ -22,9 +36,12 @@ class Connection(object):
 
         self._reader = None
         self._writer = None
-        self._readbuf = b''
+        self._readbuf = bytearray()
+        self._readbuf_start = 0
+        self._readbuf_end = 0
         self.send_queue = queue.Queue()
-        self.recv_queue = queue.Queue()
+        self.recv_queue = queue.Queue(self.recv_queue_size)
+        self.send_batch_sizes = Counter()   #: number of written batches, keyed by batch size
 
         self.event_connected = event.Event()
 
@@ -66,7 +83,8 @@ class Connection(object):
             self._writer.kill(block=False)
             self._writer = None
 
-        self._readbuf = b''
+        self._readbuf = bytearray()
+        self._readbuf_start = self._readbuf_end = 0
         self.send_queue.queue.clear()
         self.recv_queue.queue.clear()
         self.recv_queue.put(StopIteration)
@@ -83,53 +101,102 @@ class Connection(object):
 
     def _writer_loop(self):
         while True:
-            message = self.send_queue.get()
-            packet = struct.pack(Connection.FMT, len(message), Connection.MAGIC) + message
+            messages = [self.send_queue.get()]
+
+            if self.send_flush_delay:
+                gevent.sleep(self.send_flush_delay)
+
+            while len(messages) < self.send_batch_size:
+                try:
+                    messages.append(self.send_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            buffers = []
+
+            for message in messages:
+                buffers.append(struct.pack(Connection.FMT, len(message), Connection.MAGIC))
+                buffers.append(message)
+
             try:
-                self._write_data(packet)
+                self._write_buffers(buffers)
             except:
                 logger.debug("Connection error (writer).")
                 self.disconnect()
                 return
 
+            self.send_batch_sizes[len(messages)] += 1
+
     def _reader_loop(self):
         while True:
             rlist, _, _ = gselect([self.socket], [], [])
 
             if self.socket in rlist:
-                data = self._read_data()
+                self._reserve_readbuf(self.recv_size)
+
+                end = self._readbuf_end
+                view = memoryview(self._readbuf)[end:end + self.recv_size]
+                nbytes = self._read_into(view)
+                del view
 
-                if not data:
+                if not nbytes:
                     logger.debug("Connection error (reader).")
                     self.disconnect()
                     return
 
-                self._readbuf += data
+                self._readbuf_end += nbytes
                 self._read_packets()
 
+    def _reserve_readbuf(self, size):
+        """Make sure there are at least ``size`` free bytes after the end of the read buffer
+
+        Unprocessed data is moved to the front of the buffer, and the buffer
+        is only grown when that doesn't free up enough space.
+        """
+        buf = self._readbuf
+        start, end = self._readbuf_start, self._readbuf_end
+
+        if len(buf) - end >= size:
+            return
+
+        pending = end - start
+
+        if start:
+            buf[:pending] = buf[start:end]
+            self._readbuf_start, self._readbuf_end = 0, pending
+
+        if len(buf) - pending < size:
+            buf.extend(bytearray(size - (len(buf) - pending)))
+
     def _read_packets(self):
         header_size = Connection.FMT_SIZE
         buf = self._readbuf
+        pos, end = self._readbuf_start, self._readbuf_end
+        view = memoryview(buf)
 
-        while len(buf) > header_size:
-            message_length, magic = struct.unpack_from(Connection.FMT, buf)
+        while end - pos > header_size:
+            message_length, magic = struct.unpack_from(Connection.FMT, buf, pos)
 
             if magic != Connection.MAGIC:
                 logger.debug("invalid magic, got %s" % repr(magic))
+                del view
                 self.disconnect()
                 return
 
             packet_length = header_size + message_length
 
-            if len(buf) < packet_length:
-                return
+            if end - pos < packet_length:
+                break
 
-            message = buf[header_size:packet_length]
-            buf = buf[packet_length:]
+            self.recv_queue.put(view[pos + header_size:pos + packet_length].tobytes())
+            pos += packet_length
 
-            self.recv_queue.put(message)
+        del view
 
-        self._readbuf = buf
+        if pos == end:
+            self._readbuf_start = self._readbuf_end = 0
+        else:
+            self._readbuf_start = pos
 
 
 class TCPConnection(Connection):
@@ -139,14 +206,30 @@ class TCPConnection(Connection):
     def _connect(self, server_addr):
         self.socket.connect(server_addr)
 
-    def _read_data(self):
+    def _read_into(self, view):
         try:
-            return self.socket.recv(16384)
+            return self.socket.recv_into(view)
         except socket.error:
-            return ''
+            return 0
+
+    def _write_buffers(self, buffers):
+        if not hasattr(self.socket, 'sendmsg'):
+            self.socket.sendall(b''.join(buffers))
+            return
+
+        i = 0
+
+        while i < len(buffers):
+            # sendmsg fails with EMSGSIZE when given more than IOV_MAX buffers
+            sent = self.socket.sendmsg(buffers[i:i + IOV_MAX])
+
+            # skip over fully sent buffers, and trim the partially sent one
+            while i < len(buffers) and sent >= len(buffers[i]):
+                sent -= len(buffers[i])
+                i += 1
 
-    def _write_data(self, data):
-        self.socket.sendall(data)
+            if sent:
+                buffers[i] = memoryview(buffers[i])[sent:]
 
 
 class UDPConnection(Connection):
@@ -156,8 +239,8 @@ class UDPConnection(Connection):
     def _connect(self, server_addr):
         pass
 
-    def _read_data(self):
+    def _read_into(self, view):
         pass
 
-    def _write_data(self, data):
+    def _write_buffers(self, buffers):
         pass
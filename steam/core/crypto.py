@@ -2,9 +2,12 @@
 All function in this module take and return :class:`bytes`
 """
 import sys
+import hmac as _hmac
+import hashlib
 from os import urandom as random_bytes
 from struct import pack
 from base64 import b64decode
+from binascii import hexlify, unhexlify
 
 from Cryptodome.Hash import MD5, SHA1, HMAC
 from Cryptodome.PublicKey.RSA import import_key as rsa_import_key, construct as rsa_construct
@@ -27,8 +30,78 @@ pad = lambda s: s + (BS - len(s) % BS) * pack('B', BS - len(s) % BS)
 
 if sys.version_info < (3,):
     unpad = lambda s: s[0:-ord(s[-1])]
+    xor = lambda a, b: unhexlify('%0*x' % (len(a) * 2, int(hexlify(a), 16) ^ int(hexlify(b), 16))) if a else b''
 else:
     unpad = lambda s: s[0:-s[-1]]
+    xor = lambda a, b: (int.from_bytes(a, 'big') ^ int.from_bytes(b, 'big')).to_bytes(len(a), 'big')
+
+
+class ChannelCipher(object):
+    #: messages up to this size are decrypted with the cached ECB cipher, larger ones with CBC
+    ecb_decrypt_max = 4096
+
+    def __init__(self, key, hmac_secret=None):
+        """Encryption for a secured CM channel
+
+        Compatible with :func:`symmetric_encrypt_HMAC` and :func:`symmetric_decrypt_HMAC`,
+        or :func:`symmetric_encrypt` and :func:`symmetric_decrypt` without ``hmac_secret``.
+        The ECB cipher and HMAC state are created once, instead of for every message.
+
+        :param key: channel key
+        :type  key: :class:`bytes`
+        :param hmac_secret: HMAC secret
+        :type  hmac_secret: :class:`bytes`
+        """
+        self.key = key
+        self.hmac_secret = hmac_secret
+        self._ecb = AES.new(key, AES.MODE_ECB)
+        self._hmac = _hmac.new(hmac_secret, digestmod=hashlib.sha1) if hmac_secret else None
+
+    def _hmac_sha1(self, prefix, message):
+        hmac = self._hmac.copy()
+        hmac.update(prefix)
+        hmac.update(message)
+        return hmac.digest()
+
+    def encrypt(self, message):
+        """
+        :param message: message
+        :type  message: :class:`bytes`
+        :return: encrypted message
+        :rtype: :class:`bytes`
+        """
+        if self._hmac:
+            prefix = random_bytes(3)
+            iv = self._hmac_sha1(prefix, message)[:13] + prefix
+        else:
+            iv = random_bytes(BS)
+
+        return self._ecb.encrypt(iv) + AES.new(self.key, AES.MODE_CBC, iv).encrypt(pad(message))
+
+    def decrypt(self, cyphertext):
+        """
+        :param cyphertext: encrypted message
+        :type  cyphertext: :class:`bytes`
+        :return: message
+        :rtype: :class:`bytes`
+        :raises: :class:`RuntimeError` when the message is invalid or HMAC verification fails
+        """
+        if len(cyphertext) < BS * 2 or len(cyphertext) % BS:
+            raise RuntimeError("Unable to decrypt message. Invalid length: %d" % len(cyphertext))
+
+        if len(cyphertext) <= self.ecb_decrypt_max:
+            # CBC: plaintext block = decrypted block XOR previous cyphertext block
+            decrypted = self._ecb.decrypt(cyphertext)
+            iv = decrypted[:BS]
+            message = unpad(xor(decrypted[BS:], iv + cyphertext[BS:-BS]))
+        else:
+            iv = self._ecb.decrypt(cyphertext[:BS])
+            message = unpad(AES.new(self.key, AES.MODE_CBC, iv).decrypt(cyphertext[BS:]))
+
+        if self._hmac and iv[:13] != self._hmac_sha1(iv[-3:], message)[:13]:
+            raise RuntimeError("Unable to decrypt message. HMAC does not match.")
+
+        return message
 
 
 def generate_session_key(hmac_secret=b''):
@@ -69,6 +142,53 @@ def symmetric_decrypt(cyphertext, key):
     iv = symmetric_decrypt_iv(cyphertext, key)
     return symmetric_decrypt_with_iv(cyphertext, key, iv)
 
+def symmetric_decrypt_many(cyphertexts, key):
+    """Decrypt many messages from :func:`symmetric_encrypt` at once
+
+    All blocks are decrypted in a single ECB pass, and CBC chaining is undone
+    with one XOR over the combined data. Much faster than calling
+    :func:`symmetric_decrypt` for each of many short messages.
+
+    :param cyphertexts: encrypted messages
+    :type  cyphertexts: :class:`list` [:class:`bytes`]
+    :param key: key
+    :type  key: :class:`bytes`
+    :rtype: :class:`list` [:class:`bytes`]
+    :raises: :class:`ValueError` for messages that are not whole blocks
+    """
+    for cyphertext in cyphertexts:
+        if len(cyphertext) < BS * 2 or len(cyphertext) % BS:
+            raise ValueError("Invalid cyphertext length: %d" % len(cyphertext))
+
+    if not cyphertexts:
+        return []
+
+    decrypted = AES.new(key, AES.MODE_ECB).decrypt(b''.join(cyphertexts))
+
+    # CBC: plaintext block = decrypted block XOR previous cyphertext block,
+    # where the first "previous" block is the IV, itself the first decrypted block
+    blocks = []
+    chained = []
+    pos = 0
+
+    for cyphertext in cyphertexts:
+        blocks.append(decrypted[pos + BS:pos + len(cyphertext)])
+        chained.append(decrypted[pos:pos + BS])
+        chained.append(cyphertext[BS:-BS])
+        pos += len(cyphertext)
+
+    plain = xor(b''.join(blocks), b''.join(chained))
+
+    messages = []
+    pos = 0
+
+    for cyphertext in cyphertexts:
+        size = len(cyphertext) - BS
+        messages.append(unpad(plain[pos:pos + size]))
+        pos += size
+
+    return messages
+
 def symmetric_decrypt_ecb(cyphertext, key):
     return unpad(AES.new(key, AES.MODE_ECB).decrypt(cyphertext))
 
@@ -1,20 +1,38 @@
 
+from array import array
 from base64 import b64decode
 from io import BytesIO
 from zipfile import ZipFile, ZIP_DEFLATED, BadZipFile
 from struct import pack
 from datetime import datetime
-from fnmatch import fnmatch
+from fnmatch import translate
 import os.path
+import re
 
 from steam.enums import EDepotFileFlag
-from steam.core.crypto import symmetric_decrypt
+from steam.core.crypto import symmetric_decrypt_many
 from steam.utils.binary import StructReader
 from steam.protobufs.content_manifest_pb2 import (ContentManifestMetadata,
                                                   ContentManifestPayload,
                                                   ContentManifestSignature)
 
 
+_pattern_cache = {}
+_case_sensitive = os.path.normcase('A') == 'A'
+
+
+def _compile_pattern(pattern):
+    """Compile a :func:`.fnmatch` pattern, with caching"""
+    match = _pattern_cache.get(pattern)
+
+    if match is None:
+        if len(_pattern_cache) >= 1024:
+            _pattern_cache.clear()
+        match = _pattern_cache[pattern] = re.compile(translate(pattern)).match
+
+    return match
+
+
 class DepotFile(object):
     def __init__(self, manifest, file_mapping):
         """Depot file
@@ -22,11 +40,11 @@ class DepotFile(object):
         :param manifest: depot manifest
         :type  manifest: :class:`.DepotManifest`
         :param file_mapping: depot file mapping instance
-        :type  file_mapping: ContentManifestPayload.FileMapping
+        :type  file_mapping: ContentManifestPayload.FileMapping, :class:`.CompactFileMapping`
         """
         if not isinstance(manifest, DepotManifest):
             raise TypeError("Expected 'manifest' to be of type DepotManifest")
-        if not isinstance(file_mapping, ContentManifestPayload.FileMapping):
+        if not isinstance(file_mapping, (ContentManifestPayload.FileMapping, CompactFileMapping)):
             raise TypeError("Expected 'file_mapping' to be of type ContentManifestPayload.FileMapping")
 
         self.manifest = manifest
@@ -134,6 +152,298 @@ class DepotFile(object):
         return self.flags & EDepotFileFlag.Executable > 0
 
 
+class CompactChunkData(object):
+    __slots__ = ('sha', 'crc', 'offset', 'cb_original', 'cb_compressed')
+
+    def __init__(self, sha, crc, offset, cb_original, cb_compressed):
+        """Chunk of a :class:`.CompactFileMapping`, with the same fields
+        as ``ContentManifestPayload.FileMapping.ChunkData``
+        """
+        self.sha = sha
+        self.crc = crc
+        self.offset = offset
+        self.cb_original = cb_original
+        self.cb_compressed = cb_compressed
+
+
+class CompactFileMapping(object):
+    __slots__ = ('table', 'index', '_chunks')
+
+    def __init__(self, table, index):
+        """Read-only view of one row of :class:`.CompactFileMappings`, with the same fields
+        as ``ContentManifestPayload.FileMapping``
+
+        :param table: compact file mappings
+        :type  table: :class:`.CompactFileMappings`
+        :param index: row index
+        :type  index: int
+        """
+        self.table = table
+        self.index = index
+        self._chunks = None
+
+    @property
+    def filename(self):
+        return self.table.names[self.table.name_offsets[self.index]:self.table.name_offsets[self.index + 1]]
+
+    @property
+    def linktarget(self):
+        return self.table.linktargets.get(self.index, '')
+
+    @property
+    def size(self):
+        return self.table.sizes[self.index]
+
+    @property
+    def flags(self):
+        return self.table.flags[self.index]
+
+    @property
+    def sha_content(self):
+        return self.table.sha_content[self.index]
+
+    @property
+    def sha_filename(self):
+        return self.table.sha_filename[self.index]
+
+    @property
+    def chunks(self):
+        if self._chunks is None:
+            self._chunks = self.table.get_chunks(self.index)
+        return self._chunks
+
+
+class CompactFileMappings(object):
+    def __init__(self, mappings):
+        """Columnar copy of ``ContentManifestPayload.mappings``
+
+        Filenames are kept in a single string, numeric fields and chunk SHAs in
+        :class:`array.array` and :class:`bytes` columns, so a large manifest is a few
+        dozen objects instead of several per file and chunk. Rows are read through
+        :class:`.CompactFileMapping` views created on access.
+
+        :param mappings: file mappings
+        :type  mappings: :class:`list` [ContentManifestPayload.FileMapping]
+        """
+        names = []
+        self.name_offsets = array('Q', [0])
+        self.linktargets = {}  #: only set for symlinks, ``{index: linktarget}``
+        self.sizes = array('Q')
+        self.flags = array('I')
+        self.sha_content = _ShaColumn()
+        self.sha_filename = _ShaColumn()
+
+        self.chunk_offsets = array('Q', [0])  #: first chunk index of each file, plus total
+        chunk_sha = []
+        self.chunk_crc = array('I')
+        self.chunk_offset = array('Q')
+        self.chunk_cb_original = array('I')
+        self.chunk_cb_compressed = array('I')
+
+        for index, mapping in enumerate(mappings):
+            names.append(mapping.filename)
+            self.name_offsets.append(self.name_offsets[-1] + len(mapping.filename))
+            if mapping.linktarget:
+                self.linktargets[index] = mapping.linktarget
+            self.sizes.append(mapping.size)
+            self.flags.append(mapping.flags)
+            self.sha_content.append(mapping.sha_content)
+            self.sha_filename.append(mapping.sha_filename)
+
+            for chunk in mapping.chunks:
+                if len(chunk.sha) != 20:
+                    raise ValueError("Expected 20 byte chunk SHA, got %d" % len(chunk.sha))
+                chunk_sha.append(chunk.sha)
+                self.chunk_crc.append(chunk.crc)
+                self.chunk_offset.append(chunk.offset)
+                self.chunk_cb_original.append(chunk.cb_original)
+                self.chunk_cb_compressed.append(chunk.cb_compressed)
+
+            self.chunk_offsets.append(len(chunk_sha))
+
+        self.names = ''.join(names)
+        self.chunk_sha = b''.join(chunk_sha)
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("mapping index out of range")
+        return CompactFileMapping(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield CompactFileMapping(self, index)
+
+    def iter_filenames(self):
+        """Iterate over filenames, without creating row views
+
+        :rtype: :class:`generator` [:class:`str`]
+        """
+        names = self.names
+        offsets = self.name_offsets
+
+        for index in range(len(offsets) - 1):
+            yield names[offsets[index]:offsets[index + 1]]
+
+    def get_chunks(self, index):
+        """Chunks of a file
+
+        :param index: row index
+        :type  index: int
+        :rtype: :class:`list` [:class:`.CompactChunkData`]
+        """
+        chunk_sha = self.chunk_sha
+
+        return [CompactChunkData(chunk_sha[i * 20:i * 20 + 20],
+                                 self.chunk_crc[i],
+                                 self.chunk_offset[i],
+                                 self.chunk_cb_original[i],
+                                 self.chunk_cb_compressed[i],
+                                 )
+                for i in range(self.chunk_offsets[index], self.chunk_offsets[index + 1])]
+
+    def map_names(self, func):
+        """Replace all filenames and link targets
+
+        :param func: called with a :class:`list` of values, returns a :class:`list` of new values
+        :type  func: :class:`callable`
+        """
+        link_indexes = list(self.linktargets)
+        values = func(list(self.iter_filenames()) + [self.linktargets[i] for i in link_indexes])
+        names = values[:len(self)]
+
+        self.name_offsets = array('Q', [0])
+        for name in names:
+            self.name_offsets.append(self.name_offsets[-1] + len(name))
+
+        self.names = ''.join(names)
+        self.linktargets = dict(zip(link_indexes, values[len(self):]))
+
+    def to_payload(self, payload=None):
+        """Rebuild protobuf file mappings
+
+        :param payload: message to append the mappings to
+        :type  payload: ContentManifestPayload
+        :rtype: ContentManifestPayload
+        """
+        if payload is None:
+            payload = ContentManifestPayload()
+
+        for row in self:
+            mapping = payload.mappings.add(filename=row.filename, size=row.size, flags=row.flags)
+
+            if row.sha_filename:
+                mapping.sha_filename = row.sha_filename
+            if row.sha_content:
+                mapping.sha_content = row.sha_content
+            if row.linktarget:
+                mapping.linktarget = row.linktarget
+
+            for chunk in row.chunks:
+                mapping.chunks.add(sha=chunk.sha,
+                                   crc=chunk.crc,
+                                   offset=chunk.offset,
+                                   cb_original=chunk.cb_original,
+                                   cb_compressed=chunk.cb_compressed,
+                                   )
+
+        return payload
+
+
+class _ShaColumn(object):
+    """Fixed width SHA1 column, keeping empty values apart from all-zero ones"""
+    def __init__(self):
+        self.data = bytearray()
+        self.present = bytearray()
+
+    def append(self, sha):
+        if sha and len(sha) != 20:
+            raise ValueError("Expected 20 byte SHA, got %d" % len(sha))
+        self.data += sha or b'\x00' * 20
+        self.present.append(1 if sha else 0)
+
+    def __getitem__(self, index):
+        if not self.present[index]:
+            return b''
+        return bytes(self.data[index * 20:index * 20 + 20])
+
+
+class DepotManifestDiff(object):
+    def __init__(self, old_manifest, new_manifest):
+        """Changes between two manifests of the same depot
+
+        Files are matched by filename. Chunks needed by added or changed files are
+        split into ones that have to be downloaded, and ones that can be copied
+        from files of the old manifest.
+
+        :param old_manifest: old manifest
+        :type  old_manifest: :class:`.DepotManifest`
+        :param new_manifest: new manifest
+        :type  new_manifest: :class:`.DepotManifest`
+        """
+        self.old_manifest = old_manifest
+        self.new_manifest = new_manifest
+        self.added = []          #: :class:`list` of files only in the new manifest
+        self.removed = []        #: :class:`list` of files only in the old manifest
+        self.changed = []        #: :class:`list` of ``(old_file, new_file)`` tuples
+        self.new_chunks = {}     #: chunks to download, ``{sha: chunk}``
+        self.reused_chunks = {}  #: chunks available locally, ``{sha: (old_file, chunk)}``
+
+        old_files = dict((depot_file.filename_raw, depot_file) for depot_file in old_manifest)
+        new_filenames = set()
+
+        for new_file in new_manifest:
+            new_filenames.add(new_file.filename_raw)
+            old_file = old_files.get(new_file.filename_raw)
+
+            if old_file is None:
+                self.added.append(new_file)
+            elif (old_file.sha_content != new_file.sha_content
+                  or old_file.size != new_file.size
+                  or old_file.flags != new_file.flags
+                  or old_file.linktarget_raw != new_file.linktarget_raw):
+                self.changed.append((old_file, new_file))
+
+        for filename, old_file in old_files.items():
+            if filename not in new_filenames:
+                self.removed.append(old_file)
+
+        old_chunks = {}
+
+        for old_file in old_files.values():
+            for chunk in old_file.chunks:
+                old_chunks.setdefault(chunk.sha, (old_file, chunk))
+
+        for new_file in self.added + [new_file for _, new_file in self.changed]:
+            for chunk in new_file.chunks:
+                if chunk.sha in old_chunks:
+                    self.reused_chunks[chunk.sha] = old_chunks[chunk.sha]
+                else:
+                    self.new_chunks[chunk.sha] = chunk
+
+    def __repr__(self):
+        return "<%s(added=%d, removed=%d, changed=%d, new_chunks=%d, reused_chunks=%d)>" % (
+            self.__class__.__name__,
+            len(self.added),
+            len(self.removed),
+            len(self.changed),
+            len(self.new_chunks),
+            len(self.reused_chunks),
+            )
+
+    @property
+    def download_size(self):
+        """Total size of chunks that have to be downloaded
+
+        :type: int
+        """
+        return sum(chunk.cb_original for chunk in self.new_chunks.values())
+
+
 class DepotManifest(object):
     DepotFileClass = DepotFile
     PROTOBUF_PAYLOAD_MAGIC = 0x71F617D0
@@ -150,6 +460,10 @@ class DepotManifest(object):
         self.metadata = ContentManifestMetadata()
         self.payload = ContentManifestPayload()
         self.signature = ContentManifestSignature()
+        self.compact_mappings = None  #: :class:`.CompactFileMappings`, set by :meth:`compact`
+        self._path_index = None
+        self._dir_index = None
+        self._path_filenames = None
 
         if data:
             self.deserialize(data)
@@ -201,6 +515,26 @@ class DepotManifest(object):
         """:type: bool"""
         return self.metadata.filenames_encrypted
 
+    @property
+    def mappings(self):
+        """File mappings, from :attr:`payload` or :attr:`compact_mappings`
+
+        :type: :class:`list` [ContentManifestPayload.FileMapping], :class:`.CompactFileMappings`
+        """
+        if self.compact_mappings is not None:
+            return self.compact_mappings
+        return self.payload.mappings
+
+    def compact(self):
+        """Move file mappings from :attr:`payload` to :attr:`compact_mappings`
+
+        Uses considerably less memory for manifests with many files, at the cost of
+        creating row views on access. Iteration, :meth:`diff` and :meth:`serialize` work the same.
+        """
+        if self.compact_mappings is None:
+            self.compact_mappings = CompactFileMappings(self.payload.mappings)
+            del self.payload.mappings[:]
+
     def decrypt_filenames(self, depot_key):
         """Decrypt all filenames in the manifest
 
@@ -211,16 +545,27 @@ class DepotManifest(object):
         if not self.metadata.filenames_encrypted:
             return
 
-        try:
-            for m in self.payload.mappings:
-                m.filename = symmetric_decrypt(b64decode(m.filename), depot_key)
+        def decrypt(values):
+            return [value.decode('utf-8')
+                    for value in symmetric_decrypt_many([b64decode(value) for value in values], depot_key)]
 
-                if m.linktarget:
-                    m.linktarget = symmetric_decrypt(b64decode(m.linktarget), depot_key)
+        try:
+            if self.compact_mappings is not None:
+                self.compact_mappings.map_names(decrypt)
+            else:
+                mappings = self.payload.mappings
+                links = [m for m in mappings if m.linktarget]
+                values = decrypt([m.filename for m in mappings] + [m.linktarget for m in links])
+
+                for m, filename in zip(mappings, values):
+                    m.filename = filename
+                for m, linktarget in zip(links, values[len(mappings):]):
+                    m.linktarget = linktarget
         except Exception:
             raise RuntimeError("Unable to decrypt filename for depot manifest")
 
         self.metadata.filenames_encrypted = False
+        self._path_index = self._dir_index = None
 
     def deserialize(self, data):
         """Deserialize a manifest (compressed or uncompressed)
@@ -243,6 +588,8 @@ class DepotManifest(object):
 
         self.payload = ContentManifestPayload()
         self.payload.ParseFromString(data.read(length))
+        self.compact_mappings = None
+        self._path_index = self._dir_index = None
 
         magic, length = data.unpack('<II')
 
@@ -273,7 +620,12 @@ class DepotManifest(object):
         """
         data = BytesIO()
 
-        part = self.payload.SerializeToString()
+        if self.compact_mappings is not None:
+            payload = ContentManifestPayload()
+            payload.CopyFrom(self.payload)
+            part = self.compact_mappings.to_payload(payload).SerializeToString()
+        else:
+            part = self.payload.SerializeToString()
         data.write(pack('<II', DepotManifest.PROTOBUF_PAYLOAD_MAGIC, len(part)))
         data.write(part)
 
@@ -298,22 +650,168 @@ class DepotManifest(object):
 
     def __iter__(self):
         if not self.filenames_encrypted:
-            for mapping in self.payload.mappings:
+            for mapping in self.mappings:
                 yield self.DepotFileClass(self, mapping)
 
+    def _iter_filenames(self):
+        if self.compact_mappings is not None:
+            return self.compact_mappings.iter_filenames()
+        return (mapping.filename for mapping in self.payload.mappings)
+
+    def _build_path_index(self):
+        self._path_index = path_index = {}
+        self._dir_index = dir_index = {'': ([], set())}
+        self._path_filenames = filenames = []
+
+        for index, path in enumerate(self._iter_filenames()):
+            path = path.rstrip('\x00 \n\t')
+            filenames.append(path)
+
+            # a path can appear more than once in a manifest
+            if path in path_index:
+                path_index[path].append(index)
+            else:
+                path_index[path] = [index]
+
+            parent = path.rpartition('\\')[0]
+            if parent in dir_index:
+                dir_index[parent][0].append(index)
+                continue
+
+            dir_index[parent] = ([index], set())
+
+            # register implicit parent directories
+            while parent:
+                grandparent = parent.rpartition('\\')[0]
+                if grandparent in dir_index:
+                    dir_index[grandparent][1].add(parent)
+                    break
+                dir_index[grandparent] = ([], set([parent]))
+                parent = grandparent
+
+    def _iter_dir_indexes(self, path):
+        stack = [path]
+
+        while stack:
+            indexes, subdirs = self._dir_index.get(stack.pop(), ((), ()))
+
+            for index in indexes:
+                yield index
+
+            stack.extend(subdirs)
+
+    @staticmethod
+    def _normalize_path(path):
+        return path.replace('/', '\\').strip('\\')
+
+    def get_file(self, path):
+        """Get file by path
+
+        The path index is built on first use, and rebuilt after :meth:`deserialize`
+        or :meth:`decrypt_filenames`.
+
+        :param path: path with ``/`` or ``\\`` as separator
+        :type  path: str
+        :returns: file instance, or ``None`` when not found
+        :rtype: :class:`.DepotFile`
+        """
+        if self.filenames_encrypted:
+            return None
+        if self._path_index is None:
+            self._build_path_index()
+
+        indexes = self._path_index.get(self._normalize_path(path))
+
+        if indexes is None:
+            return None
+
+        return self.DepotFileClass(self, self.mappings[indexes[0]])
+
+    def list_dir(self, path=''):
+        """List files and directories directly inside a directory
+
+        Directories that have no entry of their own in the manifest, and only
+        exist as part of other paths, are listed after the entries, as directories.
+
+        :param path: directory path with ``/`` or ``\\`` as separator, root by default
+        :type  path: str
+        :rtype: :class:`list` [:class:`.DepotFile`]
+        """
+        if self.filenames_encrypted:
+            return []
+        if self._dir_index is None:
+            self._build_path_index()
+
+        indexes, subdirs = self._dir_index.get(self._normalize_path(path), ((), ()))
+        mappings = self.mappings
+        listed = set(self._path_filenames[index] for index in indexes)
+
+        entries = [self.DepotFileClass(self, mappings[index]) for index in indexes]
+
+        for subdir in sorted(subdirs):
+            if subdir not in listed:
+                entries.append(self.DepotFileClass(self, ContentManifestPayload.FileMapping(
+                    filename=subdir,
+                    flags=EDepotFileFlag.Directory,
+                    )))
+
+        return entries
+
     def iter_files(self, pattern=None):
         """
         :param pattern: unix shell wildcard pattern, see :func:`.fnmatch`
         :type  pattern: str
         """
-        if not self.filenames_encrypted:
-            for mapping in self.payload.mappings:
-                if (pattern is not None
-                   and not fnmatch(mapping.filename.rstrip('\x00 \n\t'), pattern)):
-                    continue
+        if self.filenames_encrypted:
+            return
+
+        if pattern is None:
+            for mapping in self.mappings:
                 yield self.DepotFileClass(self, mapping)
+            return
+
+        mappings = self.mappings
+
+        # same as fnmatch, which ignores case on Windows
+        if not _case_sensitive:
+            match = _compile_pattern(os.path.normcase(pattern))
+            for index, filename in enumerate(self._iter_filenames()):
+                if match(os.path.normcase(filename.rstrip('\x00 \n\t'))):
+                    yield self.DepotFileClass(self, mappings[index])
+            return
+
+        if self._path_index is None:
+            self._build_path_index()
+
+        magic = re.search(r'[*?[]', pattern)
+
+        # no wildcards, exact match
+        if magic is None:
+            for index in self._path_index.get(pattern, ()):
+                yield self.DepotFileClass(self, mappings[index])
+            return
+
+        # only scan files under the directory preceding the first wildcard
+        match = _compile_pattern(pattern)
+        directory = pattern[:magic.start()].rpartition('\\')[0]
+
+        filenames = self._path_filenames
+
+        for index in sorted(self._iter_dir_indexes(directory)):
+            if match(filenames[index]):
+                yield self.DepotFileClass(self, mappings[index])
+
+    def diff(self, other):
+        """Compare with a newer manifest of the same depot
+
+        :param other: new manifest
+        :type  other: :class:`.DepotManifest`
+        :returns: changes needed to go from this manifest to ``other``
+        :rtype: :class:`.DepotManifestDiff`
+        """
+        return DepotManifestDiff(self, other)
 
     def __len__(self):
-        return len(self.payload.mappings)
+        return len(self.mappings)
 
 
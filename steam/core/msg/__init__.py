@@ -1,84 +1,39 @@
-import fnmatch
+from importlib import import_module
 from steam.core.msg.unified import get_um
 from steam.core.msg.structs import get_struct
 from steam.core.msg.headers import MsgHdr, ExtendedMsgHdr, MsgHdrProtoBuf, GCMsgHdr, GCMsgHdrProto
+from steam.core.msg.cmsg_map import emsg_lookup
 from steam.enums import EResult
 from steam.enums.emsg import EMsg
 from steam.exceptions import SteamError
 from steam.core.msg.structs import StructMessage as _StructMessage
 from google.protobuf.message import Message as _ProtoMessageType
-from steam.protobufs import steammessages_base_pb2
-from steam.protobufs import steammessages_clientserver_pb2
-from steam.protobufs import steammessages_clientserver_2_pb2
-from steam.protobufs import steammessages_clientserver_friends_pb2
-from steam.protobufs import steammessages_clientserver_login_pb2
-from steam.protobufs import steammessages_clientserver_appinfo_pb2
-from steam.protobufs import steammessages_clientserver_gameservers_pb2
-from steam.protobufs import steammessages_clientserver_lbs_pb2
-from steam.protobufs import steammessages_clientserver_mms_pb2
-from steam.protobufs import steammessages_clientserver_ucm_pb2
-from steam.protobufs import steammessages_clientserver_uds_pb2
-from steam.protobufs import steammessages_clientserver_ufs_pb2
-from steam.protobufs import steammessages_clientserver_userstats_pb2
-
-
-cmsg_lookup_predefined = {
-    EMsg.Multi: steammessages_base_pb2.CMsgMulti,
-    EMsg.ClientToGC: steammessages_clientserver_2_pb2.CMsgGCClient,
-    EMsg.ClientFromGC: steammessages_clientserver_2_pb2.CMsgGCClient,
-    EMsg.ClientServiceMethodLegacy: steammessages_clientserver_2_pb2.CMsgClientServiceMethodLegacy,
-    EMsg.ClientServiceMethodLegacyResponse: steammessages_clientserver_2_pb2.CMsgClientServiceMethodLegacyResponse,
-    EMsg.ClientGetNumberOfCurrentPlayersDP: steammessages_clientserver_2_pb2.CMsgDPGetNumberOfCurrentPlayers,
-    EMsg.ClientGetNumberOfCurrentPlayersDPResponse: steammessages_clientserver_2_pb2.CMsgDPGetNumberOfCurrentPlayersResponse,
-#   EMsg.ClientEmailChange4: steammessages_clientserver_2_pb2.CMsgClientEmailChange,
-#   EMsg.ClientEmailChangeResponse4: steammessages_clientserver_2_pb2.CMsgClientEmailChangeResponse,
-    EMsg.ClientLogonGameServer: steammessages_clientserver_login_pb2.CMsgClientLogon,
-    EMsg.ClientCurrentUIMode: steammessages_clientserver_2_pb2.CMsgClientUIMode,
-    EMsg.ClientChatOfflineMessageNotification: steammessages_clientserver_2_pb2.CMsgClientOfflineMessageNotification,
-}
-
-cmsg_lookup = dict()
-
-for proto_module in [
-                    steammessages_clientserver_pb2,
-                    steammessages_clientserver_2_pb2,
-                    steammessages_clientserver_friends_pb2,
-                    steammessages_clientserver_login_pb2,
-                    steammessages_clientserver_appinfo_pb2,
-                    steammessages_clientserver_gameservers_pb2,
-                    steammessages_clientserver_lbs_pb2,
-                    steammessages_clientserver_mms_pb2,
-                    steammessages_clientserver_ucm_pb2,
-                    steammessages_clientserver_uds_pb2,
-                    steammessages_clientserver_ufs_pb2,
-                    steammessages_clientserver_userstats_pb2,
-                    ]:
-    cmsg_list = proto_module.__dict__
-    cmsg_list = fnmatch.filter(cmsg_list, 'CMsg*')
-    cmsg_lookup.update(dict(zip(map(lambda cmsg_name: cmsg_name.lower(), cmsg_list),
-                                map(lambda cmsg_name: getattr(proto_module, cmsg_name), cmsg_list)
-                               )))
+
+cmsg_lookup = {}
 
 
 def get_cmsg(emsg):
     """Get protobuf for a given EMsg
 
+    The protobuf module containing the message is imported the first time it's needed.
+
     :param emsg: EMsg
     :type  emsg: :class:`steam.enums.emsg.EMsg`, :class:`int`
     :return: protobuf message
     """
-    if not isinstance(emsg, EMsg):
-        emsg = EMsg(emsg)
-
-    if emsg in cmsg_lookup_predefined:
-        return cmsg_lookup_predefined[emsg]
+    try:
+        return cmsg_lookup[emsg]
+    except KeyError:
+        pass
+
+    if emsg in emsg_lookup:
+        module_name, cmsg_name = emsg_lookup[emsg]
+        cmsg = getattr(import_module('steam.protobufs.' + module_name), cmsg_name)
     else:
-        enum_name = emsg.name.lower()
-        if enum_name.startswith("econ"):  # special case for 'EconTrading_'
-            enum_name = enum_name[4:]
-        cmsg_name = "cmsg" + enum_name
+        cmsg = None
 
-    return cmsg_lookup.get(cmsg_name, None)
+    cmsg_lookup[emsg] = cmsg
+    return cmsg
 
 class Msg(object):
     proto = False
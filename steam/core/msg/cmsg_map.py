@@ -0,0 +1,281 @@
+"""EMsg to protobuf message lookup table
+
+Generated by ``make pb_gen_cmsg_map``. Do not edit by hand.
+"""
+
+emsg_lookup = {
+    1: ('steammessages_base_pb2', 'CMsgMulti'),  # Multi
+    703: ('steammessages_clientserver_login_pb2', 'CMsgClientHeartBeat'),  # ClientHeartBeat
+    706: ('steammessages_clientserver_login_pb2', 'CMsgClientLogOff'),  # ClientLogOff
+    710: ('steammessages_clientserver_pb2', 'CMsgClientConnectionStats'),  # ClientConnectionStats
+    714: ('steammessages_clientserver_friends_pb2', 'CMsgClientRemoveFriend'),  # ClientRemoveFriend
+    716: ('steammessages_clientserver_friends_pb2', 'CMsgClientChangeStatus'),  # ClientChangeStatus
+    718: ('steammessages_clientserver_friends_pb2', 'CMsgClientFriendMsg'),  # ClientFriendMsg
+    741: ('steammessages_clientserver_2_pb2', 'CMsgClientRedeemGuestPass'),  # ClientRedeemGuestPass
+    742: ('steammessages_clientserver_pb2', 'CMsgClientGamesPlayed'),  # ClientGamesPlayed
+    743: ('steammessages_clientserver_2_pb2', 'CMsgClientRegisterKey'),  # ClientRegisterKey
+    746: ('steammessages_clientserver_2_pb2', 'CMsgClientPurchaseWithMachineID'),  # ClientPurchaseWithMachineID
+    751: ('steammessages_clientserver_login_pb2', 'CMsgClientLogonResponse'),  # ClientLogOnResponse
+    757: ('steammessages_clientserver_login_pb2', 'CMsgClientLoggedOff'),  # ClientLoggedOff
+    758: ('steammessages_clientserver_pb2', 'CMsgGSApprove'),  # GSApprove
+    759: ('steammessages_clientserver_pb2', 'CMsgGSDeny'),  # GSDeny
+    760: ('steammessages_clientserver_pb2', 'CMsgGSKick'),  # GSKick
+    763: ('steammessages_clientserver_2_pb2', 'CMsgClientPurchaseResponse'),  # ClientPurchaseResponse
+    766: ('steammessages_clientserver_friends_pb2', 'CMsgClientPersonaState'),  # ClientPersonaState
+    767: ('steammessages_clientserver_friends_pb2', 'CMsgClientFriendsList'),  # ClientFriendsList
+    768: ('steammessages_clientserver_login_pb2', 'CMsgClientAccountInfo'),  # ClientAccountInfo
+    774: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSStatusReply'),  # GSStatusReply
+    779: ('steammessages_clientserver_pb2', 'CMsgClientGameConnectTokens'),  # ClientGameConnectTokens
+    780: ('steammessages_clientserver_pb2', 'CMsgClientLicenseList'),  # ClientLicenseList
+    783: ('steammessages_clientserver_pb2', 'CMsgClientCMList'),  # ClientCMList
+    791: ('steammessages_clientserver_friends_pb2', 'CMsgClientAddFriend'),  # ClientAddFriend
+    792: ('steammessages_clientserver_friends_pb2', 'CMsgClientAddFriendResponse'),  # ClientAddFriendResponse
+    797: ('steammessages_clientserver_2_pb2', 'CMsgClientRedeemGuestPassResponse'),  # ClientRedeemGuestPassResponse
+    800: ('steammessages_clientserver_pb2', 'CMsgClientChatInvite'),  # ClientChatInvite
+    815: ('steammessages_clientserver_friends_pb2', 'CMsgClientRequestFriendData'),  # ClientRequestFriendData
+    818: ('steammessages_clientserver_userstats_pb2', 'CMsgClientGetUserStats'),  # ClientGetUserStats
+    819: ('steammessages_clientserver_userstats_pb2', 'CMsgClientGetUserStatsResponse'),  # ClientGetUserStatsResponse
+    820: ('steammessages_clientserver_userstats_pb2', 'CMsgClientStoreUserStats'),  # ClientStoreUserStats
+    821: ('steammessages_clientserver_userstats_pb2', 'CMsgClientStoreUserStatsResponse'),  # ClientStoreUserStatsResponse
+    822: ('steammessages_clientserver_pb2', 'CMsgClientClanState'),  # ClientClanState
+    830: ('steammessages_clientserver_2_pb2', 'CMsgClientServiceModule'),  # ClientServiceModule
+    831: ('steammessages_clientserver_2_pb2', 'CMsgClientServiceCall'),  # ClientServiceCall
+    832: ('steammessages_clientserver_2_pb2', 'CMsgClientServiceCallResponse'),  # ClientServiceCallResponse
+    833: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPackageInfoRequest'),  # ClientPackageInfoRequest
+    834: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPackageInfoResponse'),  # ClientPackageInfoResponse
+    840: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientAppInfoRequest'),  # ClientAppInfoRequest
+    841: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientAppInfoResponse'),  # ClientAppInfoResponse
+    850: ('steammessages_clientserver_pb2', 'CMsgClientSessionToken'),  # ClientSessionToken
+    857: ('steammessages_clientserver_pb2', 'CMsgClientGetAppOwnershipTicket'),  # ClientGetAppOwnershipTicket
+    858: ('steammessages_clientserver_pb2', 'CMsgClientGetAppOwnershipTicketResponse'),  # ClientGetAppOwnershipTicketResponse
+    866: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientAppInfoUpdate'),  # ClientAppInfoUpdate
+    867: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientAppInfoChanges'),  # ClientAppInfoChanges
+    901: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSDisconnectNotice'),  # GSDisconnectNotice
+    905: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSUserPlaying'),  # GSUserPlaying
+    908: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSServerType'),  # GSServerType
+    909: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSPlayerList'),  # GSPlayerList
+    938: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSAssociateWithClan'),  # GSAssociateWithClan
+    939: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSAssociateWithClanResponse'),  # GSAssociateWithClanResponse
+    940: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSComputeNewPlayerCompatibility'),  # GSComputeNewPlayerCompatibility
+    941: ('steammessages_clientserver_gameservers_pb2', 'CMsgGSComputeNewPlayerCompatibilityResponse'),  # GSComputeNewPlayerCompatibilityResponse
+    1620: ('steammessages_clientserver_2_pb2', 'CMsgClientDPCheckSpecialSurvey'),  # ClientDPCheckSpecialSurvey
+    1621: ('steammessages_clientserver_2_pb2', 'CMsgClientDPCheckSpecialSurveyResponse'),  # ClientDPCheckSpecialSurveyResponse
+    1622: ('steammessages_clientserver_2_pb2', 'CMsgClientDPSendSpecialSurveyResponse'),  # ClientDPSendSpecialSurveyResponse
+    1623: ('steammessages_clientserver_2_pb2', 'CMsgClientDPSendSpecialSurveyResponseReply'),  # ClientDPSendSpecialSurveyResponseReply
+    1630: ('steammessages_clientserver_2_pb2', 'CMsgClientDPContentStatsReport'),  # ClientDPContentStatsReport
+    5202: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSUploadFileRequest'),  # ClientUFSUploadFileRequest
+    5203: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSUploadFileResponse'),  # ClientUFSUploadFileResponse
+    5205: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSUploadFileFinished'),  # ClientUFSUploadFileFinished
+    5206: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSGetFileListForApp'),  # ClientUFSGetFileListForApp
+    5207: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSGetFileListForAppResponse'),  # ClientUFSGetFileListForAppResponse
+    5210: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSDownloadRequest'),  # ClientUFSDownloadRequest
+    5211: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSDownloadResponse'),  # ClientUFSDownloadResponse
+    5213: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSLoginRequest'),  # ClientUFSLoginRequest
+    5214: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSLoginResponse'),  # ClientUFSLoginResponse
+    5216: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSTransferHeartbeat'),  # ClientUFSTransferHeartbeat
+    5219: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSDeleteFileRequest'),  # ClientUFSDeleteFileRequest
+    5220: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSDeleteFileResponse'),  # ClientUFSDeleteFileResponse
+    5226: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSGetUGCDetails'),  # ClientUFSGetUGCDetails
+    5227: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSGetUGCDetailsResponse'),  # ClientUFSGetUGCDetailsResponse
+    5230: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSGetSingleFileInfo'),  # ClientUFSGetSingleFileInfo
+    5231: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSGetSingleFileInfoResponse'),  # ClientUFSGetSingleFileInfoResponse
+    5232: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSShareFile'),  # ClientUFSShareFile
+    5233: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSShareFileResponse'),  # ClientUFSShareFileResponse
+    5251: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSUploadCommit'),  # ClientUFSUploadCommit
+    5252: ('steammessages_clientserver_ufs_pb2', 'CMsgClientUFSUploadCommitResponse'),  # ClientUFSUploadCommitResponse
+    5401: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestForgottenPasswordEmail'),  # ClientRequestForgottenPasswordEmail
+    5402: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestForgottenPasswordEmailResponse'),  # ClientRequestForgottenPasswordEmailResponse
+    5411: ('steammessages_clientserver_2_pb2', 'CMsgClientUpdateUserGameInfo'),  # ClientUpdateUserGameInfo
+    5414: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSSetScore'),  # ClientLBSSetScore
+    5415: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSSetScoreResponse'),  # ClientLBSSetScoreResponse
+    5416: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSFindOrCreateLB'),  # ClientLBSFindOrCreateLB
+    5417: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSFindOrCreateLBResponse'),  # ClientLBSFindOrCreateLBResponse
+    5418: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSGetLBEntries'),  # ClientLBSGetLBEntries
+    5419: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSGetLBEntriesResponse'),  # ClientLBSGetLBEntriesResponse
+    5427: ('steammessages_clientserver_friends_pb2', 'CMsgClientFriendMsgIncoming'),  # ClientFriendMsgIncoming
+    5429: ('steammessages_clientserver_pb2', 'CMsgClientTicketAuthComplete'),  # ClientTicketAuthComplete
+    5430: ('steammessages_clientserver_pb2', 'CMsgClientIsLimitedAccount'),  # ClientIsLimitedAccount
+    5432: ('steammessages_clientserver_pb2', 'CMsgClientAuthList'),  # ClientAuthList
+    5434: ('steammessages_clientserver_pb2', 'CMsgClientP2PConnectionInfo'),  # ClientP2PConnectionInfo
+    5435: ('steammessages_clientserver_pb2', 'CMsgClientP2PConnectionFailInfo'),  # ClientP2PConnectionFailInfo
+    5438: ('steammessages_clientserver_2_pb2', 'CMsgClientGetDepotDecryptionKey'),  # ClientGetDepotDecryptionKey
+    5439: ('steammessages_clientserver_2_pb2', 'CMsgClientGetDepotDecryptionKeyResponse'),  # ClientGetDepotDecryptionKeyResponse
+    5450: ('steammessages_clientserver_2_pb2', 'CMsgClientCheckAppBetaPassword'),  # ClientCheckAppBetaPassword
+    5451: ('steammessages_clientserver_2_pb2', 'CMsgClientCheckAppBetaPasswordResponse'),  # ClientCheckAppBetaPasswordResponse
+    5452: ('steammessages_clientserver_2_pb2', 'CMsgGCClient'),  # ClientToGC
+    5453: ('steammessages_clientserver_2_pb2', 'CMsgGCClient'),  # ClientFromGC
+    5456: ('steammessages_clientserver_2_pb2', 'CMsgClientEmailAddrInfo'),  # ClientEmailAddrInfo
+    5463: ('steammessages_clientserver_login_pb2', 'CMsgClientNewLoginKey'),  # ClientNewLoginKey
+    5464: ('steammessages_clientserver_login_pb2', 'CMsgClientNewLoginKeyAccepted'),  # ClientNewLoginKeyAccepted
+    5466: ('steammessages_clientserver_userstats_pb2', 'CMsgClientStoreUserStats2'),  # ClientStoreUserStats2
+    5467: ('steammessages_clientserver_userstats_pb2', 'CMsgClientStatsUpdated'),  # ClientStatsUpdated
+    5468: ('steammessages_clientserver_2_pb2', 'CMsgClientActivateOEMLicense'),  # ClientActivateOEMLicense
+    5469: ('steammessages_clientserver_2_pb2', 'CMsgClientRegisterOEMMachine'),  # ClientRegisterOEMMachine
+    5470: ('steammessages_clientserver_2_pb2', 'CMsgClientRegisterOEMMachineResponse'),  # ClientRegisterOEMMachineResponse
+    5480: ('steammessages_clientserver_pb2', 'CMsgClientRequestedClientStats'),  # ClientRequestedClientStats
+    5482: ('steammessages_clientserver_pb2', 'CMsgClientStat2'),  # ClientStat2
+    5501: ('steammessages_clientserver_pb2', 'CMsgClientServersAvailable'),  # ClientServersAvailable
+    5502: ('steammessages_clientserver_pb2', 'CMsgClientRegisterAuthTicketWithCM'),  # ClientRegisterAuthTicketWithCM
+    5511: ('steammessages_clientserver_pb2', 'CMsgClientDeregisterWithServer'),  # ClientDeregisterWithServer
+    5514: ('steammessages_clientserver_login_pb2', 'CMsgClientLogon'),  # ClientLogon
+    5515: ('steammessages_clientserver_uds_pb2', 'CMsgClientGetClientDetails'),  # ClientGetClientDetails
+    5516: ('steammessages_clientserver_uds_pb2', 'CMsgClientGetClientDetailsResponse'),  # ClientGetClientDetailsResponse
+    5517: ('steammessages_clientserver_pb2', 'CMsgClientReportOverlayDetourFailure'),  # ClientReportOverlayDetourFailure
+    5518: ('steammessages_clientserver_uds_pb2', 'CMsgClientGetClientAppList'),  # ClientGetClientAppList
+    5519: ('steammessages_clientserver_uds_pb2', 'CMsgClientGetClientAppListResponse'),  # ClientGetClientAppListResponse
+    5520: ('steammessages_clientserver_uds_pb2', 'CMsgClientInstallClientApp'),  # ClientInstallClientApp
+    5521: ('steammessages_clientserver_uds_pb2', 'CMsgClientInstallClientAppResponse'),  # ClientInstallClientAppResponse
+    5522: ('steammessages_clientserver_uds_pb2', 'CMsgClientUninstallClientApp'),  # ClientUninstallClientApp
+    5523: ('steammessages_clientserver_uds_pb2', 'CMsgClientUninstallClientAppResponse'),  # ClientUninstallClientAppResponse
+    5524: ('steammessages_clientserver_uds_pb2', 'CMsgClientSetClientAppUpdateState'),  # ClientSetClientAppUpdateState
+    5525: ('steammessages_clientserver_uds_pb2', 'CMsgClientSetClientAppUpdateStateResponse'),  # ClientSetClientAppUpdateStateResponse
+    5526: ('steammessages_clientserver_pb2', 'CMsgClientRequestEncryptedAppTicket'),  # ClientRequestEncryptedAppTicket
+    5527: ('steammessages_clientserver_pb2', 'CMsgClientRequestEncryptedAppTicketResponse'),  # ClientRequestEncryptedAppTicketResponse
+    5528: ('steammessages_clientserver_pb2', 'CMsgClientWalletInfoUpdate'),  # ClientWalletInfoUpdate
+    5529: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSSetUGC'),  # ClientLBSSetUGC
+    5530: ('steammessages_clientserver_lbs_pb2', 'CMsgClientLBSSetUGCResponse'),  # ClientLBSSetUGCResponse
+    5531: ('steammessages_clientserver_pb2', 'CMsgClientAMGetClanOfficers'),  # ClientAMGetClanOfficers
+    5532: ('steammessages_clientserver_pb2', 'CMsgClientAMGetClanOfficersResponse'),  # ClientAMGetClanOfficersResponse
+    5533: ('steammessages_clientserver_2_pb2', 'CMsgClientCheckFileSignature'),  # ClientCheckFileSignature
+    5534: ('steammessages_clientserver_2_pb2', 'CMsgClientCheckFileSignatureResponse'),  # ClientCheckFileSignatureResponse
+    5535: ('steammessages_clientserver_friends_pb2', 'CMsgClientFriendProfileInfo'),  # ClientFriendProfileInfo
+    5536: ('steammessages_clientserver_friends_pb2', 'CMsgClientFriendProfileInfoResponse'),  # ClientFriendProfileInfoResponse
+    5537: ('steammessages_clientserver_2_pb2', 'CMsgClientUpdateMachineAuth'),  # ClientUpdateMachineAuth
+    5538: ('steammessages_clientserver_2_pb2', 'CMsgClientUpdateMachineAuthResponse'),  # ClientUpdateMachineAuthResponse
+    5539: ('steammessages_clientserver_2_pb2', 'CMsgClientReadMachineAuth'),  # ClientReadMachineAuth
+    5540: ('steammessages_clientserver_2_pb2', 'CMsgClientReadMachineAuthResponse'),  # ClientReadMachineAuthResponse
+    5541: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestMachineAuth'),  # ClientRequestMachineAuth
+    5542: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestMachineAuthResponse'),  # ClientRequestMachineAuthResponse
+    5543: ('steammessages_clientserver_ucm_pb2', 'CMsgClientScreenshotsChanged'),  # ClientScreenshotsChanged
+    5546: ('steammessages_clientserver_2_pb2', 'CMsgClientGetCDNAuthToken'),  # ClientGetCDNAuthToken
+    5547: ('steammessages_clientserver_2_pb2', 'CMsgClientGetCDNAuthTokenResponse'),  # ClientGetCDNAuthTokenResponse
+    5549: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestAccountData'),  # ClientRequestAccountData
+    5550: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestAccountDataResponse'),  # ClientRequestAccountDataResponse
+    5552: ('steammessages_clientserver_friends_pb2', 'CMsgClientHideFriend'),  # ClientHideFriend
+    5553: ('steammessages_clientserver_friends_pb2', 'CMsgClientFriendsGroupsList'),  # ClientFriendsGroupsList
+    5554: ('steammessages_clientserver_2_pb2', 'CMsgClientGetClanActivityCounts'),  # ClientGetClanActivityCounts
+    5555: ('steammessages_clientserver_2_pb2', 'CMsgClientGetClanActivityCountsResponse'),  # ClientGetClanActivityCountsResponse
+    5556: ('steammessages_clientserver_2_pb2', 'CMsgClientOGSReportString'),  # ClientOGSReportString
+    5557: ('steammessages_clientserver_2_pb2', 'CMsgClientOGSReportBug'),  # ClientOGSReportBug
+    5558: ('steammessages_clientserver_2_pb2', 'CMsgClientSentLogs'),  # ClientSentLogs
+    5559: ('steammessages_clientserver_login_pb2', 'CMsgClientLogon'),  # ClientLogonGameServer
+    5570: ('steammessages_clientserver_pb2', 'CMsgClientAMGetPersonaNameHistory'),  # ClientAMGetPersonaNameHistory
+    5571: ('steammessages_clientserver_pb2', 'CMsgClientAMGetPersonaNameHistoryResponse'),  # ClientAMGetPersonaNameHistoryResponse
+    5572: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestFreeLicense'),  # ClientRequestFreeLicense
+    5573: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestFreeLicenseResponse'),  # ClientRequestFreeLicenseResponse
+    5575: ('steammessages_clientserver_pb2', 'CMsgClientAuthListAck'),  # ClientAuthListAck
+    5576: ('steammessages_clientserver_2_pb2', 'CMsgClientItemAnnouncements'),  # ClientItemAnnouncements
+    5577: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestItemAnnouncements'),  # ClientRequestItemAnnouncements
+    5582: ('steammessages_clientserver_2_pb2', 'CMsgClientCommentNotifications'),  # ClientCommentNotifications
+    5583: ('steammessages_clientserver_2_pb2', 'CMsgClientRequestCommentNotifications'),  # ClientRequestCommentNotifications
+    5585: ('steammessages_clientserver_login_pb2', 'CMsgClientRequestWebAPIAuthenticateUserNonce'),  # ClientRequestWebAPIAuthenticateUserNonce
+    5586: ('steammessages_clientserver_login_pb2', 'CMsgClientRequestWebAPIAuthenticateUserNonceResponse'),  # ClientRequestWebAPIAuthenticateUserNonceResponse
+    5587: ('steammessages_clientserver_friends_pb2', 'CMsgClientPlayerNicknameList'),  # ClientPlayerNicknameList
+    5592: ('steammessages_clientserver_2_pb2', 'CMsgDPGetNumberOfCurrentPlayers'),  # ClientGetNumberOfCurrentPlayersDP
+    5593: ('steammessages_clientserver_2_pb2', 'CMsgDPGetNumberOfCurrentPlayersResponse'),  # ClientGetNumberOfCurrentPlayersDPResponse
+    5594: ('steammessages_clientserver_2_pb2', 'CMsgClientServiceMethodLegacy'),  # ClientServiceMethodLegacy
+    5595: ('steammessages_clientserver_2_pb2', 'CMsgClientServiceMethodLegacyResponse'),  # ClientServiceMethodLegacyResponse
+    5596: ('steammessages_clientserver_2_pb2', 'CMsgClientFriendUserStatusPublished'),  # ClientFriendUserStatusPublished
+    5597: ('steammessages_clientserver_2_pb2', 'CMsgClientUIMode'),  # ClientCurrentUIMode
+    5598: ('steammessages_clientserver_2_pb2', 'CMsgClientVanityURLChangedNotification'),  # ClientVanityURLChangedNotification
+    5599: ('steammessages_clientserver_2_pb2', 'CMsgClientUserNotifications'),  # ClientUserNotifications
+    5621: ('steammessages_clientserver_pb2', 'CMsgClientNetworkingCertRequest'),  # ClientNetworkingCertRequest
+    5623: ('steammessages_clientserver_login_pb2', 'CMsgClientChallengeRequest'),  # ClientChallengeRequest
+    5624: ('steammessages_clientserver_login_pb2', 'CMsgClientChallengeResponse'),  # ClientChallengeResponse
+    5625: ('steammessages_clientserver_2_pb2', 'CMsgBadgeCraftedNotification'),  # BadgeCraftedNotification
+    5626: ('steammessages_clientserver_pb2', 'CMsgClientNetworkingMobileCertRequest'),  # ClientNetworkingMobileCertRequest
+    6403: ('steammessages_clientserver_gameservers_pb2', 'CMsgClientGMSServerQuery'),  # ClientGMSServerQuery
+    6404: ('steammessages_clientserver_gameservers_pb2', 'CMsgGMSClientServerQueryResponse'),  # GMSClientServerQueryResponse
+    6407: ('steammessages_clientserver_gameservers_pb2', 'CMsgGameServerOutOfDate'),  # GameServerOutOfDate
+    6501: ('steammessages_clientserver_2_pb2', 'CMsgClientAuthorizeLocalDeviceRequest'),  # ClientAuthorizeLocalDeviceRequest
+    6503: ('steammessages_clientserver_2_pb2', 'CMsgClientDeauthorizeDeviceRequest'),  # ClientDeauthorizeDeviceRequest
+    6504: ('steammessages_clientserver_2_pb2', 'CMsgClientDeauthorizeDevice'),  # ClientDeauthorizeDevice
+    6505: ('steammessages_clientserver_2_pb2', 'CMsgClientUseLocalDeviceAuthorizations'),  # ClientUseLocalDeviceAuthorizations
+    6506: ('steammessages_clientserver_2_pb2', 'CMsgClientGetAuthorizedDevices'),  # ClientGetAuthorizedDevices
+    6507: ('steammessages_clientserver_2_pb2', 'CMsgClientGetAuthorizedDevicesResponse'),  # ClientGetAuthorizedDevicesResponse
+    6509: ('steammessages_clientserver_2_pb2', 'CMsgClientAuthorizeLocalDeviceNotification'),  # ClientAuthorizeLocalDeviceNotification
+    6601: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSCreateLobby'),  # ClientMMSCreateLobby
+    6602: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSCreateLobbyResponse'),  # ClientMMSCreateLobbyResponse
+    6603: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSJoinLobby'),  # ClientMMSJoinLobby
+    6604: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSJoinLobbyResponse'),  # ClientMMSJoinLobbyResponse
+    6605: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSLeaveLobby'),  # ClientMMSLeaveLobby
+    6606: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSLeaveLobbyResponse'),  # ClientMMSLeaveLobbyResponse
+    6607: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSGetLobbyList'),  # ClientMMSGetLobbyList
+    6608: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSGetLobbyListResponse'),  # ClientMMSGetLobbyListResponse
+    6609: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSetLobbyData'),  # ClientMMSSetLobbyData
+    6610: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSetLobbyDataResponse'),  # ClientMMSSetLobbyDataResponse
+    6611: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSGetLobbyData'),  # ClientMMSGetLobbyData
+    6612: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSLobbyData'),  # ClientMMSLobbyData
+    6613: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSendLobbyChatMsg'),  # ClientMMSSendLobbyChatMsg
+    6614: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSLobbyChatMsg'),  # ClientMMSLobbyChatMsg
+    6615: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSetLobbyOwner'),  # ClientMMSSetLobbyOwner
+    6616: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSetLobbyOwnerResponse'),  # ClientMMSSetLobbyOwnerResponse
+    6617: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSetLobbyGameServer'),  # ClientMMSSetLobbyGameServer
+    6618: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSLobbyGameServerSet'),  # ClientMMSLobbyGameServerSet
+    6619: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSUserJoinedLobby'),  # ClientMMSUserJoinedLobby
+    6620: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSUserLeftLobby'),  # ClientMMSUserLeftLobby
+    6621: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSInviteToLobby'),  # ClientMMSInviteToLobby
+    6624: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSetLobbyLinked'),  # ClientMMSSetLobbyLinked
+    6625: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSSetRatelimitPolicyOnClient'),  # ClientMMSSetRatelimitPolicyOnClient
+    6626: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSGetLobbyStatus'),  # ClientMMSGetLobbyStatus
+    6627: ('steammessages_clientserver_mms_pb2', 'CMsgClientMMSGetLobbyStatusResponse'),  # ClientMMSGetLobbyStatusResponse
+    7001: ('steammessages_clientserver_uds_pb2', 'CMsgClientUDSP2PSessionStarted'),  # ClientUDSP2PSessionStarted
+    7002: ('steammessages_clientserver_uds_pb2', 'CMsgClientUDSP2PSessionEnded'),  # ClientUDSP2PSessionEnded
+    7005: ('steammessages_clientserver_pb2', 'CMsgClientInviteToGame'),  # ClientInviteToGame
+    7301: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMAddScreenshot'),  # ClientUCMAddScreenshot
+    7302: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMAddScreenshotResponse'),  # ClientUCMAddScreenshotResponse
+    7309: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMDeleteScreenshot'),  # ClientUCMDeleteScreenshot
+    7310: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMDeleteScreenshotResponse'),  # ClientUCMDeleteScreenshotResponse
+    7311: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMPublishFile'),  # ClientUCMPublishFile
+    7312: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMPublishFileResponse'),  # ClientUCMPublishFileResponse
+    7315: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMDeletePublishedFile'),  # ClientUCMDeletePublishedFile
+    7316: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMDeletePublishedFileResponse'),  # ClientUCMDeletePublishedFileResponse
+    7325: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMUpdatePublishedFile'),  # ClientUCMUpdatePublishedFile
+    7326: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMUpdatePublishedFileResponse'),  # ClientUCMUpdatePublishedFileResponse
+    7364: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMSetUserPublishedFileAction'),  # ClientUCMSetUserPublishedFileAction
+    7365: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMSetUserPublishedFileActionResponse'),  # ClientUCMSetUserPublishedFileActionResponse
+    7366: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMEnumeratePublishedFilesByUserAction'),  # ClientUCMEnumeratePublishedFilesByUserAction
+    7367: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMEnumeratePublishedFilesByUserActionResponse'),  # ClientUCMEnumeratePublishedFilesByUserActionResponse
+    7378: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMEnumerateUserSubscribedFilesWithUpdates'),  # ClientUCMEnumerateUserSubscribedFilesWithUpdates
+    7379: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMEnumerateUserSubscribedFilesWithUpdatesResponse'),  # ClientUCMEnumerateUserSubscribedFilesWithUpdatesResponse
+    7381: ('steammessages_clientserver_ucm_pb2', 'CMsgClientUCMPublishedFileUpdated'),  # ClientUCMPublishedFileUpdated
+    7382: ('steammessages_clientserver_ucm_pb2', 'CMsgClientWorkshopItemChangesRequest'),  # ClientWorkshopItemChangesRequest
+    7383: ('steammessages_clientserver_ucm_pb2', 'CMsgClientWorkshopItemChangesResponse'),  # ClientWorkshopItemChangesResponse
+    7501: ('steammessages_clientserver_2_pb2', 'CMsgClientRichPresenceUpload'),  # ClientRichPresenceUpload
+    7502: ('steammessages_clientserver_2_pb2', 'CMsgClientRichPresenceRequest'),  # ClientRichPresenceRequest
+    7503: ('steammessages_clientserver_2_pb2', 'CMsgClientRichPresenceInfo'),  # ClientRichPresenceInfo
+    7523: ('steammessages_clientserver_2_pb2', 'CMsgClientOfflineMessageNotification'),  # ClientChatOfflineMessageNotification
+    7525: ('steammessages_clientserver_2_pb2', 'CMsgClientChatGetFriendMessageHistory'),  # ClientChatGetFriendMessageHistory
+    7526: ('steammessages_clientserver_2_pb2', 'CMsgClientChatGetFriendMessageHistoryResponse'),  # ClientChatGetFriendMessageHistoryResponse
+    7527: ('steammessages_clientserver_2_pb2', 'CMsgClientChatGetFriendMessageHistoryForOfflineMessages'),  # ClientChatGetFriendMessageHistoryForOfflineMessages
+    7528: ('steammessages_clientserver_2_pb2', 'CMsgClientFSGetFriendsSteamLevels'),  # ClientFSGetFriendsSteamLevels
+    7529: ('steammessages_clientserver_2_pb2', 'CMsgClientFSGetFriendsSteamLevelsResponse'),  # ClientFSGetFriendsSteamLevelsResponse
+    7701: ('steammessages_clientserver_2_pb2', 'CMsgTrading_InitiateTradeRequest'),  # EconTrading_InitiateTradeRequest
+    7703: ('steammessages_clientserver_2_pb2', 'CMsgTrading_InitiateTradeResponse'),  # EconTrading_InitiateTradeResponse
+    7705: ('steammessages_clientserver_2_pb2', 'CMsgTrading_StartSession'),  # EconTrading_StartSession
+    7706: ('steammessages_clientserver_2_pb2', 'CMsgTrading_CancelTradeRequest'),  # EconTrading_CancelTradeRequest
+    7901: ('steammessages_clientserver_2_pb2', 'CMsgClientUGSGetGlobalStats'),  # ClientUGSGetGlobalStats
+    7902: ('steammessages_clientserver_2_pb2', 'CMsgClientUGSGetGlobalStatsResponse'),  # ClientUGSGetGlobalStatsResponse
+    8503: ('steammessages_clientserver_2_pb2', 'CMsgCREItemVoteSummary'),  # CREItemVoteSummary
+    8504: ('steammessages_clientserver_2_pb2', 'CMsgCREItemVoteSummaryResponse'),  # CREItemVoteSummaryResponse
+    8507: ('steammessages_clientserver_2_pb2', 'CMsgCREUpdateUserPublishedItemVote'),  # CREUpdateUserPublishedItemVote
+    8508: ('steammessages_clientserver_2_pb2', 'CMsgCREUpdateUserPublishedItemVoteResponse'),  # CREUpdateUserPublishedItemVoteResponse
+    8509: ('steammessages_clientserver_2_pb2', 'CMsgCREGetUserPublishedItemVoteDetails'),  # CREGetUserPublishedItemVoteDetails
+    8510: ('steammessages_clientserver_2_pb2', 'CMsgCREGetUserPublishedItemVoteDetailsResponse'),  # CREGetUserPublishedItemVoteDetailsResponse
+    8901: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPICSChangesSinceRequest'),  # ClientPICSChangesSinceRequest
+    8902: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPICSChangesSinceResponse'),  # ClientPICSChangesSinceResponse
+    8903: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPICSProductInfoRequest'),  # ClientPICSProductInfoRequest
+    8904: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPICSProductInfoResponse'),  # ClientPICSProductInfoResponse
+    8905: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPICSAccessTokenRequest'),  # ClientPICSAccessTokenRequest
+    8906: ('steammessages_clientserver_appinfo_pb2', 'CMsgClientPICSAccessTokenResponse'),  # ClientPICSAccessTokenResponse
+    9330: ('steammessages_clientserver_friends_pb2', 'CMsgClientGetEmoticonList'),  # ClientGetEmoticonList
+    9331: ('steammessages_clientserver_friends_pb2', 'CMsgClientEmoticonList'),  # ClientEmoticonList
+    9405: ('steammessages_clientserver_2_pb2', 'CMsgClientSharedLibraryLockStatus'),  # ClientSharedLibraryLockStatus
+    9406: ('steammessages_clientserver_2_pb2', 'CMsgClientSharedLibraryStopPlaying'),  # ClientSharedLibraryStopPlaying
+    9600: ('steammessages_clientserver_2_pb2', 'CMsgClientPlayingSessionState'),  # ClientPlayingSessionState
+    9601: ('steammessages_clientserver_2_pb2', 'CMsgClientKickPlayingSession'),  # ClientKickPlayingSession
+    9800: ('steammessages_clientserver_2_pb2', 'CMsgClientVoiceCallPreAuthorize'),  # ClientVoiceCallPreAuthorize
+    9801: ('steammessages_clientserver_2_pb2', 'CMsgClientVoiceCallPreAuthorizeResponse'),  # ClientVoiceCallPreAuthorizeResponse
+    9802: ('steammessages_clientserver_login_pb2', 'CMsgClientServerTimestampRequest'),  # ClientServerTimestampRequest
+    9803: ('steammessages_clientserver_login_pb2', 'CMsgClientServerTimestampResponse'),  # ClientServerTimestampResponse
+}
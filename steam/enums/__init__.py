@@ -17,7 +17,27 @@ They also provide a easy way to resolve a name or value for a specific enum.
     True
 
 .. note::
-    all enums from :py:mod:`steam.enum.common` can be imported directly from :py:mod:`steam.enum`
+    all enums from :py:mod:`steam.enum.common` can be imported directly from :py:mod:`steam.enum`.
+    On Python 3.7+ :py:mod:`steam.enum.common` is only loaded when one of them is first accessed.
 """
+import sys
 
-from steam.enums.common import *
+if sys.version_info < (3, 7):
+    from steam.enums.common import *
+else:
+    from importlib import import_module
+
+    def __getattr__(name):
+        if name == '__all__' or name[:1].isupper():
+            common = import_module('steam.enums.common')
+
+            if name == '__all__':
+                return common.__all__
+            if name in common.__all__:
+                value = globals()[name] = getattr(common, name)
+                return value
+
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+    def __dir__():
+        return sorted(set(globals()) | set(import_module('steam.enums.common').__all__))
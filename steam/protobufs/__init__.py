@@ -0,0 +1,19 @@
+"""
+Protobuf modules compiled from ``protobufs/*.proto``
+
+The modules are imported on first access (e.g. ``steam.protobufs.steammessages_player_pb2``)
+"""
+from importlib import import_module
+
+
+def __getattr__(name):
+    if name.endswith('_pb2'):
+        module_name = '%s.%s' % (__name__, name)
+
+        try:
+            return import_module(module_name)
+        except ImportError as exp:
+            if getattr(exp, 'name', None) != module_name:
+                raise
+
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
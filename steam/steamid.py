@@ -2,7 +2,6 @@ import struct
 import json
 import sys
 import re
-import requests
 from steam.enums.base import SteamIntEnum
 from steam.enums import EType, EUniverse, EInstanceFlag
 from steam.core.crypto import md5_hash
@@ -560,6 +559,8 @@ def steam64_from_url(url, http_timeout=30):
     if not match:
         return None
 
+    import requests
+
     web = make_requests_session()
 
     try:
@@ -1,4 +1,3 @@
-import requests
 from binascii import hexlify
 from steam.core.crypto import sha1_hash, random_bytes
 
@@ -7,6 +6,8 @@ def make_requests_session():
     :returns: requests session
     :rtype: :class:`requests.Session`
     """
+    import requests
+
     session = requests.Session()
 
     version = __import__('steam').__version__
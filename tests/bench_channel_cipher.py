@@ -0,0 +1,28 @@
+"""Compare ChannelCipher with the per-message functions in steam.core.crypto
+
+    python tests/bench_channel_cipher.py
+"""
+import os
+import timeit
+
+from steam.core import crypto
+
+key = os.urandom(32)
+hmac_secret = key[:16]
+cipher = crypto.ChannelCipher(key, hmac_secret)
+
+print("%8s %14s %14s %14s %14s" % ('size', 'encrypt', 'ChannelCipher', 'decrypt', 'ChannelCipher'))
+
+for size in [100, 1024, 4096, 16384, 65536]:
+    message = os.urandom(size)
+    cyphertext = crypto.symmetric_encrypt_HMAC(message, key, hmac_secret)
+    number = 200000 // size + 1000
+
+    results = [timeit.timeit(func, number=number) / number * 1e6
+               for func in [lambda: crypto.symmetric_encrypt_HMAC(message, key, hmac_secret),
+                            lambda: cipher.encrypt(message),
+                            lambda: crypto.symmetric_decrypt_HMAC(cyphertext, key, hmac_secret),
+                            lambda: cipher.decrypt(cyphertext),
+                            ]]
+
+    print("%8d %12.1fus %12.1fus %12.1fus %12.1fus" % tuple([size] + results))
@@ -0,0 +1,64 @@
+"""Compare memory use and iter_files time of protobuf and compact() manifests
+
+    python tests/bench_manifest_memory.py [num_files]
+"""
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+
+from steam.core.manifest import DepotManifest
+
+num_files = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+chunks_per_file = 3
+
+
+def build_manifest_data():
+    manifest = DepotManifest()
+    manifest.metadata.depot_id = 1
+    manifest.metadata.gid_manifest = 1
+
+    for i in range(num_files):
+        mapping = manifest.payload.mappings.add()
+        mapping.filename = os.path.join('game', 'dir%03d' % (i % 500), 'file%06d.dat' % i)
+        mapping.size = chunks_per_file * 1024**2
+        mapping.sha_filename = os.urandom(20)
+        mapping.sha_content = os.urandom(20)
+
+        for j in range(chunks_per_file):
+            chunk = mapping.chunks.add()
+            chunk.sha = os.urandom(20)
+            chunk.crc = j
+            chunk.offset = j * 1024**2
+            chunk.cb_original = 1024**2
+            chunk.cb_compressed = 512 * 1024
+
+    return manifest.serialize(compress=False)
+
+
+def measure(compact):
+    gc.collect()
+    tracemalloc.start()
+
+    manifest = DepotManifest(data)
+
+    if compact:
+        manifest.compact()
+
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    seconds = timeit.timeit(lambda: sum(1 for _ in manifest.iter_files()), number=3) / 3
+    return size, seconds
+
+
+data = build_manifest_data()
+
+print("%d files, %d chunks per file" % (num_files, chunks_per_file))
+print("%10s %12s %12s" % ('', 'memory', 'iter_files'))
+
+for name, compact in [('protobuf', False), ('compact', True)]:
+    size, seconds = measure(compact)
+    print("%10s %10.1fMB %10.1fms" % (name, size / 1024.**2, seconds * 1e3))
@@ -0,0 +1,584 @@
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+from mock import patch
+from binascii import hexlify
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from zipfile import ZipFile, ZIP_DEFLATED
+from zlib import adler32
+import gevent
+from gevent.pool import Pool as GPool
+from gevent.threadpool import ThreadPoolExecutor as GThreadPoolExecutor
+
+from steam.enums import EDepotFileFlag
+from steam.exceptions import SteamError
+from steam.core.crypto import sha1_hash, symmetric_encrypt
+from steam.client.cdn import CDNClient, CDNDepotManifest, ContentServer
+from steam.client.cdn import MemoryChunkStore, DiskChunkStore, TieredChunkStore, DiskManifestStore
+from steam.protobufs.content_manifest_pb2 import ContentManifestPayload
+
+
+def make_chunk(data):
+    return hexlify(sha1_hash(data)).decode('ascii'), data
+
+
+def encode_chunk(data, depot_key):
+    """Encode chunk data the way a content server serves it"""
+    zbuff = BytesIO()
+    with ZipFile(zbuff, 'w', ZIP_DEFLATED) as zf:
+        zf.writestr('z', data)
+
+    return symmetric_encrypt(zbuff.getvalue(), depot_key)
+
+
+class ChunkStore_Tests(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+    def test_memory_store(self):
+        store = MemoryChunkStore(max_bytes=20)
+        chunk_a, data_a = make_chunk(b'a' * 10)
+        chunk_b, data_b = make_chunk(b'b' * 10)
+        chunk_c, data_c = make_chunk(b'c' * 10)
+
+        store.put(chunk_a, data_a)
+        store.put(chunk_b, data_b)
+        self.assertEqual(store.get(chunk_a), data_a)
+
+        store.put(chunk_c, data_c)
+        self.assertEqual(store.get(chunk_a), data_a)
+        self.assertIsNone(store.get(chunk_b))
+
+        # larger than the whole store
+        store.put(*make_chunk(b'd' * 30))
+
+    def test_disk_store(self):
+        store = DiskChunkStore(self.path, max_bytes=25)
+        chunk_a, data_a = make_chunk(b'a' * 10)
+        chunk_b, data_b = make_chunk(b'b' * 10)
+
+        self.assertIsNone(store.get(chunk_a))
+
+        store.put(chunk_a, data_a)
+        store.put(chunk_b, data_b)
+
+        self.assertEqual(store.get(chunk_a), data_a)
+        self.assertEqual(DiskChunkStore(self.path).get(chunk_b), data_b)
+
+        # make chunk_a the most recently used
+        os.utime(store._chunk_path(chunk_b), (0, 0))
+
+        store.put(*make_chunk(b'c' * 10))
+
+        self.assertIsNone(store.get(chunk_b))
+        self.assertEqual(store.get(chunk_a), data_a)
+
+    def test_disk_store_evict_low_water(self):
+        store = DiskChunkStore(self.path, max_bytes=100)
+        chunks = [make_chunk(bytes(bytearray([65 + i])) * 20) for i in range(5)]
+
+        for chunk_id, data in chunks:
+            store.put(chunk_id, data)
+
+        # overwriting doesn't count the chunk twice
+        store.put(*chunks[0])
+        self.assertEqual(store._size, 100)
+
+        for i, (chunk_id, _) in enumerate(chunks):
+            os.utime(store._chunk_path(chunk_id), (i, i))
+
+        with patch.object(DiskChunkStore, 'evict', wraps=store.evict) as mock_evict:
+            store.put(*make_chunk(b'f' * 20))
+            self.assertEqual(mock_evict.call_count, 1)
+            self.assertEqual(store._size, 80)
+            self.assertIsNone(store.get(chunks[0][0]))
+            self.assertIsNone(store.get(chunks[1][0]))
+
+            # room left below max_bytes, no scan
+            store.put(*make_chunk(b'g' * 20))
+            self.assertEqual(mock_evict.call_count, 1)
+
+    def test_disk_store_verify(self):
+        store = DiskChunkStore(self.path)
+        chunk_a, data_a = make_chunk(b'a' * 10)
+
+        store.put(chunk_a, b'corrupted')
+
+        self.assertIsNone(store.get(chunk_a))
+        self.assertFalse(os.path.exists(store._chunk_path(chunk_a)))
+
+    def test_tiered_store(self):
+        memory = MemoryChunkStore()
+        disk = DiskChunkStore(self.path)
+        store = TieredChunkStore(memory, disk)
+        chunk_a, data_a = make_chunk(b'a' * 10)
+
+        disk.put(chunk_a, data_a)
+
+        self.assertIsNone(memory.get(chunk_a))
+        self.assertEqual(store.get(chunk_a), data_a)
+        self.assertEqual(memory.get(chunk_a), data_a)
+
+
+def make_cdn_client():
+    with patch.object(CDNClient, 'fetch_content_servers'), patch.object(CDNClient, 'load_licenses'):
+        return CDNClient(mock.MagicMock(cell_id=0), chunk_store=MemoryChunkStore())
+
+
+def make_manifest(cdn, files):
+    manifest = CDNDepotManifest(cdn, 10, None)
+    manifest.metadata.depot_id = 11
+    manifest.metadata.gid_manifest = 1234
+
+    for filename, chunks in files:
+        mapping = manifest.payload.mappings.add()
+        mapping.filename = filename
+
+        if chunks is None:
+            mapping.flags = EDepotFileFlag.Directory
+            continue
+
+        offset = 0
+
+        for data in chunks:
+            chunk = mapping.chunks.add()
+            chunk.sha = sha1_hash(data)
+            chunk.crc = adler32(data, 0) & 0xffffffff
+            chunk.offset = offset
+            chunk.cb_original = len(data)
+            offset += len(data)
+
+        mapping.size = offset
+        mapping.sha_content = sha1_hash(b''.join(chunks))
+
+    return manifest
+
+
+def serve_chunks(cdn):
+    """Mock ``cdn.get_chunk`` to serve chunk data from the returned dict, keyed by chunk id"""
+    chunks = {}
+    cdn.get_chunk = mock.Mock(side_effect=lambda app_id, depot_id, chunk_id, server=None, chunk=None: chunks[chunk_id])
+    return chunks
+
+
+def make_served_manifest(cdn, chunks, files):
+    """Same as :func:`make_manifest`, but also adds the file chunks to ``chunks``, see :func:`serve_chunks`"""
+    for _, file_chunks in files:
+        chunks.update(map(make_chunk, file_chunks or []))
+
+    return make_manifest(cdn, files)
+
+
+class CDNClient_ManifestStore(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+        self.cdn = make_cdn_client()
+        self.cdn.manifest_store = self.store = DiskManifestStore(self.path)
+        self.cdn.cdn_cmd = mock.Mock()
+        self.cdn.get_depot_key = mock.Mock(return_value=b'1' * 32)
+        self.manifest = make_manifest(self.cdn, [('a.txt', [b'aaaa'])])
+
+    def test_disk_store(self):
+        self.assertIsNone(self.store.get(11, 1234))
+
+        self.store.put(self.manifest)
+
+        self.assertEqual(self.store.get(11, 1234), self.manifest.serialize())
+
+        filepath = self.store._manifest_path(11, 1234)
+        with open(filepath, 'r+b') as fp:
+            fp.seek(30)
+            fp.write(b'x')
+
+        self.assertIsNone(self.store.get(11, 1234))
+        self.assertFalse(os.path.exists(filepath))
+
+    def test_get_manifest(self):
+        self.cdn.cdn_cmd.return_value = mock.Mock(ok=True, content=self.manifest.serialize())
+
+        self.cdn.get_manifest(10, 11, 1234, manifest_request_code=5)
+        self.cdn.clear_cache()
+        manifest = self.cdn.get_manifest(10, 11, 1234)
+
+        self.assertEqual(self.cdn.cdn_cmd.call_count, 1)
+        self.assertEqual([f.filename_raw for f in manifest], ['a.txt'])
+
+    def test_get_manifests(self):
+        self.store.put(self.manifest)
+        self.cdn.get_app_depot_info = mock.Mock(return_value={
+            'branches': {'public': {}},
+            '11': {'name': 'depot', 'manifests': {'public': '1234'}},
+            })
+        self.cdn.licensed_depot_ids.add(11)
+        self.cdn.get_manifest_request_code = mock.Mock()
+
+        manifests = self.cdn.get_manifests(10)
+
+        self.assertEqual([(m.name, m.gid) for m in manifests], [('depot', 1234)])
+        self.cdn.get_manifest_request_code.assert_not_called()
+        self.cdn.cdn_cmd.assert_not_called()
+
+
+class CDNClient_DownloadDepot(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+        self.cdn = make_cdn_client()
+        self.chunks = serve_chunks(self.cdn)
+
+        files = [('dir', None),
+                 ('dir\\a.txt', [b'aaaa', b'shared']),
+                 ('b.txt', [b'shared', b'bbbbbbbbbb', b'b']),
+                 ('empty.txt', []),
+                 ]
+
+        self.manifest = make_served_manifest(self.cdn, self.chunks, files)
+
+    def read_file(self, *path):
+        with open(os.path.join(self.path, *path), 'rb') as fp:
+            return fp.read()
+
+    def test_download(self):
+        stats = self.cdn.download_depot(self.manifest, self.path)
+
+        self.assertEqual(self.read_file('dir', 'a.txt'), b'aaaashared')
+        self.assertEqual(self.read_file('b.txt'), b'sharedbbbbbbbbbbb')
+        self.assertEqual(self.read_file('empty.txt'), b'')
+        self.assertEqual(self.cdn.get_chunk.call_count, 4)
+        self.assertEqual(stats['files'], 3)
+        self.assertEqual(stats['chunks'], 4)
+        self.assertEqual(stats['chunks_skipped'], 0)
+
+    def test_resume(self):
+        self.cdn.download_depot(self.manifest, self.path)
+
+        with open(os.path.join(self.path, 'b.txt'), 'r+b') as fp:
+            fp.seek(8)
+            fp.write(b'XX')
+
+        self.cdn.get_chunk.reset_mock()
+        stats = self.cdn.download_depot(self.manifest, self.path)
+
+        self.assertEqual(self.read_file('b.txt'), b'sharedbbbbbbbbbbb')
+        self.assertEqual(self.cdn.get_chunk.call_count, 1)
+        self.assertEqual(stats['chunks_skipped'], 4)
+
+    def test_verification_failure(self):
+        # download through the real get_chunk, so the corrupt chunk reaches its verification
+        del self.cdn.get_chunk
+        self.cdn.depot_keys[11] = b'9' * 32
+        self.chunks[make_chunk(b'aaaa')[0]] = b'aaab'
+
+        def cdn_cmd(command, args, server=None):
+            return mock.MagicMock(content=encode_chunk(self.chunks[args.split('/')[-1]], b'9' * 32))
+
+        self.cdn.cdn_cmd = mock.Mock(side_effect=cdn_cmd)
+
+        with self.assertRaises(SteamError):
+            self.cdn.download_depot(self.manifest, self.path)
+
+        self.assertIsNone(self.cdn.chunk_store.get(make_chunk(b'aaaa')[0]))
+
+
+class CDNClient_UpdateDepot(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.path)
+
+        self.cdn = make_cdn_client()
+        self.chunks = serve_chunks(self.cdn)
+
+    def make_manifest(self, files):
+        return make_served_manifest(self.cdn, self.chunks, files)
+
+    def read_file(self, *path):
+        with open(os.path.join(self.path, *path), 'rb') as fp:
+            return fp.read()
+
+    def test_update(self):
+        old_manifest = self.make_manifest([('same.txt', [b'same']),
+                                           ('changed.txt', [b'one', b'two']),
+                                           ('old', None),
+                                           ('old\\removed.txt', [b'removed']),
+                                           ])
+        new_manifest = self.make_manifest([('same.txt', [b'same']),
+                                           ('changed.txt', [b'two', b'three', b'one']),
+                                           ('added.txt', [b'removed', b'added']),
+                                           ])
+
+        self.cdn.download_depot(old_manifest, self.path)
+        self.cdn.get_chunk.reset_mock()
+
+        stats = self.cdn.update_depot(old_manifest, new_manifest, self.path)
+
+        self.assertEqual(self.read_file('same.txt'), b'same')
+        self.assertEqual(self.read_file('changed.txt'), b'twothreeone')
+        self.assertEqual(self.read_file('added.txt'), b'removedadded')
+        self.assertFalse(os.path.exists(os.path.join(self.path, 'old')))
+        self.assertEqual(sorted(os.listdir(self.path)), ['added.txt', 'changed.txt', 'same.txt'])
+
+        self.assertEqual(self.cdn.get_chunk.call_count, 2)
+        self.assertEqual(stats['chunks_reused'], 3)
+        self.assertEqual(stats['files_added'], 1)
+        self.assertEqual(stats['files_changed'], 1)
+        self.assertEqual(stats['files_removed'], 2)
+
+
+def make_server(host, weighted_load):
+    server = ContentServer()
+    server.host = host
+    server.port = 80
+    server.weighted_load = weighted_load
+    return server
+
+
+class CDNClient_ContentServers(unittest.TestCase):
+    def setUp(self):
+        self.cdn = make_cdn_client()
+        self.cdn.servers = deque([make_server('a', 100), make_server('b', 100), make_server('c', 10000)])
+        self.cdn.web = mock.MagicMock()
+
+    def test_weighted_selection(self):
+        picks = [self.cdn.get_content_server().host for _ in range(300)]
+
+        self.assertGreater(picks.count('a'), picks.count('c'))
+        self.assertGreater(picks.count('b'), picks.count('c'))
+
+    def test_backoff(self):
+        server_a, server_b, server_c = self.cdn.servers
+        server_a.mark_failure()
+        server_c.mark_failure()
+
+        self.assertFalse(server_a.is_available)
+        self.assertEqual(set(self.cdn.get_content_server().host for _ in range(20)), {'b'})
+
+        server_b.mark_failure()
+        server_b.mark_failure()
+
+        # all servers are backing off, pick the one that recovers first
+        self.assertIn(self.cdn.get_content_server(), (server_a, server_c))
+
+        server_a.mark_success(0.1)
+
+        self.assertTrue(server_a.is_available)
+        self.assertEqual(server_a.failures, 0)
+        self.assertEqual(server_a.latency, 0.1)
+
+    def test_pick_content_servers(self):
+        server_a, server_b, server_c = self.cdn.servers
+        server_a.mark_failure()
+
+        for _ in range(10):
+            servers = self.cdn._pick_content_servers(2)
+            self.assertNotIn(server_a, servers)
+            self.assertEqual(len(set(servers)), len(servers))
+
+        self.assertEqual(set(self.cdn._pick_content_servers(5)), set([server_b, server_c]))
+
+        self.cdn.servers = deque()
+        self.assertEqual(self.cdn._pick_content_servers(2), [None])
+
+    def test_http_pool_size(self):
+        adapter = make_cdn_client().web.get_adapter('https://')
+
+        self.assertEqual(adapter._pool_connections, CDNClient.http_pool_size)
+        self.assertEqual(adapter._pool_maxsize, CDNClient.http_pool_size)
+
+    def test_cdn_cmd_failover(self):
+        server_a, server_b, server_c = self.cdn.servers
+        server_c.mark_failure()
+
+        def get(url, timeout):
+            if '//a:' in url:
+                raise IOError("connection reset")
+            return mock.MagicMock(ok=True)
+
+        self.cdn.web.get.side_effect = get
+
+        resp = self.cdn.cdn_cmd('depot', '1/chunk/abc', server=server_a)
+
+        self.assertTrue(resp.ok)
+        self.assertEqual(server_a.failures, 1)
+        self.assertFalse(server_a.is_available)
+        self.assertIsNotNone(server_b.latency)
+        self.assertEqual(self.cdn.web.get.call_args_list[-1][0][0], 'http://b:80/depot/1/chunk/abc')
+
+
+class CDNClient_GetChunk(unittest.TestCase):
+    def setUp(self):
+        self.cdn = make_cdn_client()
+        self.cdn.depot_keys[11] = self.depot_key = b'9' * 32
+
+        self.chunk_id = hexlify(sha1_hash(b'chunk data' * 100)).decode('ascii')
+
+        self.cdn.cdn_cmd = mock.Mock(return_value=mock.MagicMock(
+            content=encode_chunk(b'chunk data' * 100, self.depot_key)))
+
+    def test_decode_inline(self):
+        self.assertEqual(self.cdn.get_chunk(10, 11, self.chunk_id), b'chunk data' * 100)
+        self.assertEqual(self.cdn.get_chunk(10, 11, self.chunk_id), b'chunk data' * 100)
+        self.cdn.cdn_cmd.assert_called_once_with('depot', '11/chunk/%s' % self.chunk_id, server=None)
+
+    def test_decode_gevent_threadpool(self):
+        self.cdn.chunk_executor = GThreadPoolExecutor(2)
+        self.addCleanup(self.cdn.chunk_executor.shutdown)
+
+        self.assertEqual(self.cdn.get_chunk(10, 11, self.chunk_id), b'chunk data' * 100)
+
+    def test_decode_executor(self):
+        self.cdn.chunk_executor = ThreadPoolExecutor(2)
+        self.addCleanup(self.cdn.chunk_executor.shutdown)
+
+        self.assertEqual(self.cdn.get_chunk(10, 11, self.chunk_id), b'chunk data' * 100)
+
+    def test_decode_invalid(self):
+        self.cdn.cdn_cmd.return_value.content = symmetric_encrypt(b'VZa' + b'\0' * 20, self.depot_key)
+
+        with self.assertRaises(SteamError):
+            self.cdn.get_chunk(10, 11, self.chunk_id)
+
+    def test_corrupt_not_stored(self):
+        chunk_id = hexlify(sha1_hash(b'other data')).decode('ascii')
+
+        with self.assertRaises(SteamError):
+            self.cdn.get_chunk(10, 11, chunk_id)
+
+        self.assertIsNone(self.cdn.chunk_store.get(chunk_id))
+
+        chunk = ContentManifestPayload.FileMapping.ChunkData(sha=sha1_hash(b'chunk data' * 100),
+                                                             crc=1, cb_original=1000)
+
+        with self.assertRaises(SteamError):
+            self.cdn.get_chunk(10, 11, self.chunk_id, chunk=chunk)
+
+        self.assertIsNone(self.cdn.chunk_store.get(self.chunk_id))
+
+
+class CDNDepotFile_Read(unittest.TestCase):
+    def setUp(self):
+        self.cdn = make_cdn_client()
+        self.chunks = serve_chunks(self.cdn)
+
+        chunks = [b'0123456789', b'abcdefghij', b'ABCDEFGHIJ', b'klmnopqrst']
+
+        self.data = b''.join(chunks)
+        self.manifest = make_served_manifest(self.cdn, self.chunks, [('file.txt', chunks)])
+        self.depot_file = next(self.manifest.iter_files())
+
+    def test_read(self):
+        fp = self.depot_file
+
+        self.assertEqual(fp.read(5), self.data[:5])
+        self.assertEqual(fp.read(10), self.data[5:15])
+        fp.seek(28)
+        self.assertEqual(fp.read(3), self.data[28:31])
+        fp.seek(3)
+        self.assertEqual(fp.read(), self.data[3:])
+        self.assertEqual(fp.read(), b'')
+        fp.seek(-4, 2)
+        self.assertEqual(fp.read(100), self.data[-4:])
+
+    def test_read_ahead(self):
+        fp = self.depot_file
+        fp.read_ahead = 2
+
+        self.assertEqual(fp.read(5), self.data[:5])
+        self.cdn.gpool.join()
+
+        self.assertEqual(self.cdn.get_chunk.call_count, 3)
+
+        self.assertEqual(fp.read(20), self.data[5:25])
+        self.cdn.gpool.join()
+
+        self.assertEqual(self.cdn.get_chunk.call_count, 4)
+        self.assertEqual(fp.read(), self.data[25:])
+        self.assertEqual(self.cdn.get_chunk.call_count, 4)
+
+    def test_read_ahead_pool_full(self):
+        fp = self.depot_file
+        fp.read_ahead = 2
+        self.cdn.gpool = GPool(1)
+        busy = self.cdn.gpool.spawn(gevent.sleep, 10)
+        self.addCleanup(busy.kill)
+
+        with gevent.Timeout(1):
+            self.assertEqual(fp.read(5), self.data[:5])
+
+        self.assertEqual(fp._prefetch, {})
+
+    def test_read_ahead_readline(self):
+        chunks = [b'line 1\nline', b' 2\n\nline 4', b'\nline 5']
+        fp = next(make_served_manifest(self.cdn, self.chunks, [('file.txt', chunks)]).iter_files())
+        fp.read_ahead = 1
+
+        self.assertEqual(fp.readline(), b'line 1\n')
+        self.assertEqual(list(fp._prefetch), [fp.chunks[1].sha])
+        self.assertEqual(fp.readline(), b'line 2\n')
+        self.assertEqual(list(fp._prefetch), [fp.chunks[2].sha])
+
+    def test_read_ahead_random_access(self):
+        fp = self.depot_file
+        fp.read_ahead = 2
+
+        self.assertEqual(fp.read(5), self.data[:5])
+        self.assertEqual(len(fp._prefetch), 2)
+
+        # seeking drops prefetches, and doesn't read ahead
+        fp.seek(32)
+        self.assertEqual(fp.read(3), self.data[32:35])
+        self.assertEqual(fp._prefetch, {})
+        self.cdn.gpool.join()
+
+        # sequential again
+        fp.seek(12)
+        self.assertEqual(fp.read(3), self.data[12:15])
+        self.assertEqual(fp.read(3), self.data[15:18])
+        self.assertEqual([chunk.sha for chunk in fp.chunks if chunk.sha in fp._prefetch],
+                         [fp.chunks[2].sha, fp.chunks[3].sha])
+
+        for i in range(50):
+            fp.seek(i * 7 % 40)
+            fp.read(5)
+
+        self.assertLessEqual(len(fp._prefetch), 2)
+
+    def test_readline(self):
+        self.chunks.clear()
+        chunks = [b'line 1\nline', b' 2\n\nline 4', b'\nline 5']
+        fp = next(make_served_manifest(self.cdn, self.chunks, [('file.txt', chunks)]).iter_files())
+
+        self.assertEqual(fp.readlines(), [b'line 1\n', b'line 2\n', b'\n', b'line 4\n', b'line 5'])
+
+        with fp.open('r', encoding='utf-8') as tfp:
+            self.assertEqual(list(tfp), ['line 1\n', 'line 2\n', '\n', 'line 4\n', 'line 5'])
+
+    def test_open(self):
+        with self.depot_file.open(buffer_size=8) as fp:
+            self.assertEqual(fp.read(3), self.data[:3])
+            fp.seek(15)
+            self.assertEqual(fp.read(), self.data[15:])
+            self.assertEqual(fp.tell(), len(self.data))
+
+        buf = bytearray(12)
+        self.assertEqual(self.depot_file.readinto(buf), 12)
+        self.assertEqual(bytes(buf), self.data[:12])
+
+    def test_open_zipfile(self):
+        zbuff = BytesIO()
+        with ZipFile(zbuff, 'w', ZIP_DEFLATED) as zf:
+            zf.writestr('inner.txt', b'inner file contents')
+
+        data = zbuff.getvalue()
+        chunks = [data[i:i+16] for i in range(0, len(data), 16)]
+        depot_file = next(make_served_manifest(self.cdn, self.chunks, [('file.zip', chunks)]).iter_files())
+
+        with ZipFile(depot_file.open()) as zf:
+            self.assertEqual(zf.read('inner.txt'), b'inner file contents')
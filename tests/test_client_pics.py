@@ -0,0 +1,359 @@
+import os
+import shutil
+import tempfile
+import unittest
+import mock
+import gevent
+import vdf
+
+from steam.enums.emsg import EMsg
+from steam.core.msg import MsgProto
+from steam.client.builtins.apps import Apps
+from steam.client.pics import ProductInfoCache, PICSWatcher, ProductInfo, LazyProductInfo
+
+
+def app_buffer(app_id, name):
+    return vdf.dumps({'appinfo': {'appid': str(app_id), 'common': {'name': name}}}).encode('utf-8') + b'\x00'
+
+
+class FakeClient(Apps):
+    EVENT_DISCONNECTED = 'disconnected'
+
+    def __init__(self, apps):
+        self.apps = apps  # {app_id: (change_number, buffer)}
+        self.requests = []
+        Apps.__init__(self)
+
+    def on(self, event, callback):
+        pass
+
+    def send_job(self, message):
+        self.requests.append(message.body)
+        return len(self.requests) - 1
+
+    def wait_event(self, job_id, timeout=None, raises=False):
+        request = self.requests[job_id]
+        gevent.sleep(0)
+        response = MsgProto(EMsg.ClientPICSProductInfoResponse)
+
+        for app in request.apps:
+            change_number, buffer = self.apps[app.appid]
+            entry = response.body.apps.add(appid=app.appid,
+                                           change_number=change_number,
+                                           sha=b'%020d' % change_number,
+                                           size=len(buffer))
+            if not request.meta_data_only:
+                entry.buffer = buffer
+
+        return [response]
+
+
+class ProductInfoCache_Tests(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient({10: (1, app_buffer(10, 'CS')),
+                                  20: (5, app_buffer(20, 'TF')),
+                                  })
+        self.client.product_info_cache = ProductInfoCache()
+
+    def get_names(self):
+        result = self.client.get_product_info(apps=[10, 20], auto_access_tokens=False)
+        return dict((app_id, info['common']['name']) for app_id, info in result['apps'].items())
+
+    def test_cache(self):
+        cache = self.client.product_info_cache
+
+        self.assertEqual(self.get_names(), {10: 'CS', 20: 'TF'})
+        self.assertEqual([(r.meta_data_only, [a.appid for a in r.apps]) for r in self.client.requests],
+                         [(True, [10, 20]), (False, [10, 20])])
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.stats, {'misses': 2})
+
+        # only app 20 changed
+        self.client.apps[20] = (6, app_buffer(20, 'TF2'))
+        self.client.requests = []
+
+        self.assertEqual(self.get_names(), {10: 'CS', 20: 'TF2'})
+        self.assertEqual([(r.meta_data_only, [a.appid for a in r.apps]) for r in self.client.requests],
+                         [(True, [10, 20]), (False, [20])])
+        self.assertEqual(cache.stats, {'misses': 3, 'hits': 1})
+
+        result = self.client.get_product_info(apps=[10], auto_access_tokens=False)
+        self.assertEqual(result['apps'][10]['_change_number'], 1)
+        self.assertEqual(result['apps'][10]['_sha'], '3030303030303030303030303030303030303031')
+
+    def test_meta_data_only(self):
+        result = self.client.get_product_info(apps=[10], meta_data_only=True, auto_access_tokens=False)
+
+        self.assertEqual(result['apps'][10]['_change_number'], 1)
+        self.assertEqual(len(self.client.requests), 1)
+        self.assertEqual(len(self.client.product_info_cache), 0)
+
+
+class IterProductInfo_Tests(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient(dict((app_id, (1, app_buffer(app_id, 'app%d' % app_id)))
+                                      for app_id in range(1, 11)))
+        self.client.product_info_batch_size = 3
+
+    def test_batches(self):
+        entries = list(self.client.iter_product_info(apps=list(range(1, 11)), auto_access_tokens=False))
+
+        self.assertEqual([[a.appid for a in r.apps] for r in self.client.requests],
+                         [[1, 2, 3], [4, 5, 6], [7, 8, 9], [10]])
+        self.assertEqual([(kind, app_id, info['common']['name']) for kind, app_id, info in entries],
+                         [('apps', app_id, 'app%d' % app_id) for app_id in range(1, 11)])
+
+    def test_max_jobs(self):
+        self.client.product_info_max_jobs = 2
+        entries = self.client.iter_product_info(apps=list(range(1, 11)), auto_access_tokens=False)
+
+        next(entries)
+        self.assertLessEqual(len(self.client.requests), 3)
+        self.assertEqual(len(list(entries)), 9)
+
+    def test_failed_batch_kills_others(self):
+        self.client.product_info_max_jobs = 2
+        waiting = []
+        wait_event = self.client.wait_event
+
+        def failing_wait_event(job_id, timeout=None, raises=False):
+            if job_id == 0:
+                raise gevent.Timeout()
+            waiting.append(gevent.getcurrent())
+            gevent.sleep(10)
+            return wait_event(job_id, timeout, raises)
+
+        self.client.wait_event = failing_wait_event
+
+        with self.assertRaises(gevent.Timeout):
+            list(self.client.iter_product_info(apps=list(range(1, 11)), auto_access_tokens=False))
+
+        self.assertTrue(waiting)
+        self.assertTrue(all(greenlet.dead for greenlet in waiting))
+
+    def test_get_product_info(self):
+        result = self.client.get_product_info(apps=list(range(1, 11)), auto_access_tokens=False)
+
+        self.assertEqual(sorted(result['apps']), list(range(1, 11)))
+        self.assertEqual(result['packages'], {})
+        self.assertEqual(len(self.client.requests), 4)
+
+    def test_merged_tokens(self):
+        token_requests = []
+
+        def get_access_tokens(app_ids=[], package_ids=[]):
+            token_requests.append(app_ids)
+            return {'apps': dict((app_id, 1000 + app_id) for app_id in app_ids), 'packages': {}}
+
+        self.client.get_access_tokens = get_access_tokens
+        self.client.get_product_info(apps=list(range(1, 10)) + [{'appid': 10, 'access_token': 5}])
+
+        self.assertEqual(token_requests, [list(range(1, 10))])
+        self.assertEqual([[(a.appid, a.access_token) for a in r.apps] for r in self.client.requests][-1],
+                         [(10, 5)])
+        self.assertEqual(self.client.requests[0].apps[0].access_token, 1001)
+
+
+class AccessTokenCache_Tests(unittest.TestCase):
+    def setUp(self):
+        self.client = FakeClient({})
+        self.token_requests = []
+        self.client.send_job_and_wait = self.send_job_and_wait
+
+    def send_job_and_wait(self, message, body_params=None, timeout=None, raises=False):
+        self.token_requests.append((list(body_params['appids']), list(body_params['packageids'])))
+        resp = MsgProto(EMsg.ClientPICSAccessTokenResponse).body
+
+        for app_id in body_params['appids']:
+            if app_id % 2:
+                resp.app_access_tokens.add(appid=app_id, access_token=1000 + app_id)
+            else:
+                resp.app_denied_tokens.append(app_id)
+        for package_id in body_params['packageids']:
+            resp.package_access_tokens.add(packageid=package_id, access_token=2000 + package_id)
+
+        return resp
+
+    def test_cache(self):
+        expected = {'apps': {1: 1001, 3: 1003}, 'packages': {5: 2005}}
+
+        self.assertEqual(self.client.get_access_tokens([1, 2, 3], [5]), expected)
+        self.assertEqual(self.client.get_access_tokens([1, 2, 3], [5]), expected)
+        self.assertEqual(self.client.get_access_tokens([1, 4], []), {'apps': {1: 1001}, 'packages': {}})
+        self.assertEqual(self.token_requests, [([1, 2, 3], [5]), ([4], [])])
+
+    def test_ttl(self):
+        with mock.patch('steam.client.builtins.apps.time', return_value=1000):
+            self.client.get_access_tokens([1], [])
+        with mock.patch('steam.client.builtins.apps.time', return_value=1000 + self.client.access_token_ttl):
+            self.client.get_access_tokens([1], [])
+
+        self.assertEqual(self.token_requests, [([1], []), ([1], [])])
+
+    def test_timeout(self):
+        self.client.get_access_tokens([1], [])
+        self.client.send_job_and_wait = mock.Mock(return_value=None)
+
+        self.assertEqual(self.client.get_access_tokens([1, 3], [5]), {'apps': {1: 1001}, 'packages': {}})
+        self.assertEqual(self.client.get_access_tokens([3], []), {'apps': {}, 'packages': {}})
+
+        # nothing is cached for a timed out request
+        self.client.send_job_and_wait = self.send_job_and_wait
+        self.assertEqual(self.client.get_access_tokens([3], [5]), {'apps': {3: 1003}, 'packages': {5: 2005}})
+        self.assertEqual(self.token_requests, [([1], []), ([3], [5])])
+
+    def test_disabled(self):
+        self.client.access_token_ttl = 0
+        self.client.get_access_tokens([1], [])
+        self.client.get_access_tokens([1], [])
+
+        self.assertEqual(len(self.token_requests), 2)
+
+    def test_license_list_clears(self):
+        self.client.get_access_tokens([1], [])
+        self.client._handle_licenses(MsgProto(EMsg.ClientLicenseList))
+        self.client.get_access_tokens([1], [])
+
+        self.assertEqual(len(self.token_requests), 2)
+
+
+class LazyProductInfo_Tests(unittest.TestCase):
+    appinfo = {'appinfo': {'appid': '10',
+                           'common': {'name': 'CS', 'type': 'Game'},
+                           'depots': {'11': {'manifests': {'public': '123'}},
+                                      'branches': {'public': {'buildid': '5'}}},
+                           }}
+
+    def make(self, buffer, kind='apps'):
+        return LazyProductInfo(kind, 10, ProductInfo(7, False, b'\x01' * 20, len(buffer), buffer))
+
+    def test_section(self):
+        info = self.make(vdf.dumps(self.appinfo, pretty=True).encode('utf-8') + b'\x00')
+
+        self.assertEqual(info['_change_number'], 7)
+        self.assertEqual(info['depots'], self.appinfo['appinfo']['depots'])
+        self.assertEqual(info.get('common', {}).get('name'), 'CS')
+        self.assertEqual(info['appid'], '10')
+        self.assertNotIn('extended', info)
+        self.assertFalse(info.parsed)
+
+        common = info['common']
+        self.assertEqual(len(info), 7)
+        self.assertTrue(info.parsed)
+        self.assertIs(info['common'], common)
+
+    def test_full_parse(self):
+        # not formatted with tabs
+        info = self.make(vdf.dumps(self.appinfo).encode('utf-8') + b'\x00')
+
+        self.assertEqual(info['common']['name'], 'CS')
+        self.assertTrue(info.parsed)
+
+        expected = dict(self.appinfo['appinfo'], _change_number=7, _missing_token=False,
+                        _sha='01' * 20, _size=info['_size'])
+        self.assertEqual(dict(info), expected)
+
+    def test_package(self):
+        buffer = b'\x00' * 4 + vdf.binary_dumps({'10': {'packageid': 10, 'appids': {'0': 570}}})
+        info = self.make(buffer, 'packages')
+
+        self.assertEqual(info['appids'], {'0': 570})
+        info['extra'] = 1
+        self.assertEqual(sorted(info)[:3], ['_change_number', '_missing_token', '_sha'])
+
+    def test_get_product_info(self):
+        client = FakeClient({10: (1, app_buffer(10, 'CS'))})
+        client.lazy_product_info = True
+        info = client.get_product_info(apps=[10], auto_access_tokens=False)['apps'][10]
+
+        self.assertIsInstance(info, LazyProductInfo)
+        self.assertEqual(info['common']['name'], 'CS')
+
+
+class WatcherClient(FakeClient):
+    logged_on = True
+
+    def __init__(self):
+        FakeClient.__init__(self, dict((app_id, (100, app_buffer(app_id, 'app%d' % app_id)))
+                                       for app_id in range(1, 10)))
+        self.product_info_batch_size = 2
+        self.current = 100
+        self.changes = []
+        self.force_full_update = False
+        self.since = []
+        self.fail = False
+
+    def get_access_tokens(self, app_ids=[], package_ids=[]):
+        return None
+
+    def get_changes_since(self, change_number, app_changes=True, package_changes=False):
+        self.since.append(change_number)
+        resp = MsgProto(EMsg.ClientPICSChangesSinceResponse).body
+        resp.current_change_number = self.current
+        resp.since_change_number = change_number
+        resp.force_full_update = self.force_full_update
+
+        for app_id in self.changes:
+            resp.app_changes.add(appid=app_id, change_number=self.current)
+
+        return resp
+
+    def wait_event(self, job_id, timeout=None, raises=False):
+        if self.fail:
+            raise gevent.Timeout()
+        return FakeClient.wait_event(self, job_id, timeout, raises)
+
+
+class PICSWatcher_Tests(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.cursor_path = os.path.join(self.temp_dir, 'cursor.json')
+        self.client = WatcherClient()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_poll(self):
+        watcher = PICSWatcher(self.client, cursor_path=self.cursor_path, change_number=90)
+        events = []
+        watcher.on(None, lambda event, *args: events.append((event, args)))
+
+        self.client.changes = [5, 1, 3, 5, 2]
+        self.assertTrue(watcher.poll())
+        gevent.sleep(0.01)
+
+        self.assertEqual(self.client.since, [90])
+        self.assertEqual([[a.appid for a in r.apps] for r in self.client.requests], [[1, 2], [3, 5]])
+        self.assertEqual(events[0], ('changes', (100, [1, 2, 3, 5], [])))
+        self.assertEqual([(event, args[:2], args[2]['common']['name']) for event, args in events[1:]],
+                         [('product_info', ('apps', app_id), 'app%d' % app_id) for app_id in [1, 2, 3, 5]])
+
+        # nothing new
+        self.assertFalse(watcher.poll())
+
+        # cursor is persisted
+        self.assertEqual(PICSWatcher(self.client, cursor_path=self.cursor_path).change_number, 100)
+
+    def test_poll_failed(self):
+        watcher = PICSWatcher(self.client, cursor_path=self.cursor_path, change_number=90)
+        self.client.changes = [1]
+        self.client.fail = True
+
+        with self.assertRaises(gevent.Timeout):
+            watcher.poll()
+
+        self.assertEqual(watcher.change_number, 90)
+        self.assertFalse(os.path.exists(self.cursor_path))
+
+    def test_full_update(self):
+        watcher = PICSWatcher(self.client)
+        events = []
+        watcher.on(None, lambda event, *args: events.append((event, args)))
+
+        self.client.force_full_update = True
+        self.assertTrue(watcher.poll())
+        gevent.sleep(0.01)
+
+        self.assertEqual(events, [('full_update', (100,))])
+        self.assertEqual(self.client.requests, [])
+        self.assertEqual(watcher.change_number, 100)
@@ -0,0 +1,85 @@
+import unittest
+from time import time
+import mock
+from mock import patch
+import gevent
+
+from steam.enums import EResult
+from steam.enums.emsg import EMsg
+from steam.core.cm import HeartbeatTimer
+from steam.client import SteamClient
+from steam.client.pool import SteamClientPool
+
+
+class SteamClientPool_Tests(unittest.TestCase):
+    def setUp(self):
+        self.pool = SteamClientPool()
+        self.pool.cm_servers.merge_list([('127.0.0.1', 27017), ('127.0.0.2', 27017)])
+
+    def test_shared_state(self):
+        a = self.pool.create_client()
+        b = self.pool.create_client()
+
+        self.assertIsInstance(a, SteamClient)
+        self.assertIs(a.cm_servers, b.cm_servers)
+        self.assertIs(a.heartbeat_timer, b.heartbeat_timer)
+        self.assertIs(a._make_web_session().get_adapter('https://steamcommunity.com'), self.pool.web_adapter)
+
+        a.cm_servers.mark_bad(('127.0.0.1', 27017))
+        self.assertEqual(self.pool.get_metrics()['cm_servers_bad'], 1)
+
+        self.pool.remove_client(a)
+
+        self.assertEqual(self.pool.clients, [b])
+        self.assertIsNot(a.cm_servers, b.cm_servers)
+        self.assertIsNone(a.heartbeat_timer)
+
+    def test_logon_rate_limit(self):
+        self.pool.logon_interval = 0.05
+        clients = [self.pool.create_client() for _ in range(3)]
+        times = []
+
+        def login(*args):
+            times.append(time())
+            return EResult.OK
+
+        for client in clients:
+            client.login = mock.Mock(side_effect=login)
+
+        gevent.joinall([gevent.spawn(self.pool.login, client, 'user', 'pass') for client in clients])
+
+        for client in clients:
+            client.login.assert_called_once_with('user', 'pass')
+
+        self.assertEqual(len(times), 3)
+        self.assertGreaterEqual(times[2] - times[0], 0.09)
+        self.assertEqual(self.pool.get_metrics()['total_logon_attempts'], 3)
+
+    def test_bootstrap_once(self):
+        self.pool.cm_servers.clear()
+
+        with patch.object(self.pool.cm_servers, 'bootstrap_from_webapi') as mock_webapi:
+            mock_webapi.side_effect = lambda: self.pool.cm_servers.merge_list([('127.0.0.1', 27017)]) or True
+
+            gevent.joinall([gevent.spawn(self.pool.bootstrap) for _ in range(3)])
+
+        mock_webapi.assert_called_once_with()
+
+
+class HeartbeatTimer_Tests(unittest.TestCase):
+    def test_heartbeats(self):
+        timer = HeartbeatTimer()
+        timer.resolution = 0.01
+        a, b = mock.Mock(), mock.Mock()
+
+        timer.add(a, 0.02)
+        timer.add(b, 10)
+        gevent.sleep(0.1)
+        timer.remove(a)
+        timer.remove(b)
+        gevent.sleep(0.02)
+
+        self.assertGreaterEqual(a.send.call_count, 2)
+        self.assertEqual(a.send.call_args[0][0].msg, EMsg.ClientHeartBeat)
+        b.send.assert_not_called()
+        self.assertTrue(timer._loop.dead)
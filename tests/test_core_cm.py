@@ -1,9 +1,14 @@
+import struct
+from gzip import GzipFile
+from io import BytesIO
 import unittest
 from mock import patch
 import gevent
 import gevent.queue
 
-from steam.core.cm import CMClient
+from steam.core.cm import CMClient, concurrent
+from steam.core.msg import MsgProto
+from steam.enums.emsg import EMsg
 
 class CMClient_Scenarios(unittest.TestCase):
     test_channel_key = b'SESSION KEY LOL'
@@ -15,23 +20,11 @@ class CMClient_Scenarios(unittest.TestCase):
         self.gen_skey = patcher.start()
         self.gen_skey.return_value = (self.test_channel_key, b'PUBKEY ENCRYPTED SESSION KEY')
 
-        patcher = patch('steam.core.crypto.symmetric_encrypt')
+        patcher = patch('steam.core.crypto.ChannelCipher')
         self.addCleanup(patcher.stop)
-        self.s_enc = patcher.start()
-        self.s_enc.side_effect = lambda m, k: m
-        patcher = patch('steam.core.crypto.symmetric_encrypt_HMAC')
-        self.addCleanup(patcher.stop)
-        self.s_enc_hmac = patcher.start()
-        self.s_enc_hmac.side_effect = lambda m, k, mac: m
-
-        patcher = patch('steam.core.crypto.symmetric_decrypt')
-        self.addCleanup(patcher.stop)
-        self.s_dec = patcher.start()
-        self.s_dec.side_effect = lambda c, k: c
-        patcher = patch('steam.core.crypto.symmetric_decrypt_HMAC')
-        self.addCleanup(patcher.stop)
-        self.s_dec_hmac = patcher.start()
-        self.s_dec_hmac.side_effect = lambda c, k, mac: c
+        self.cipher = patcher.start().return_value
+        self.cipher.encrypt.side_effect = lambda m: m
+        self.cipher.decrypt.side_effect = lambda c: c
 
         # mock out TCPConnection
         patcher = patch('steam.core.cm.TCPConnection', autospec=True)
@@ -137,4 +130,164 @@ class CMClient_Scenarios(unittest.TestCase):
 
         cm.wait_event('channel_secured', timeout=2, raises=True)
 
-        
+        self.assertIs(cm.channel_cipher, self.cipher)
+
+    def test_inline_dispatch_multi(self):
+        # setup
+        sub_messages = [MsgProto(EMsg.ClientHeartBeat).serialize(),
+                        MsgProto(EMsg.ClientLogOff).serialize(),
+                        ]
+
+        multi = MsgProto(EMsg.Multi)
+        multi.body.message_body = b''.join(struct.pack('<I', len(m)) + m for m in sub_messages)
+
+        # run
+        cm = CMClient()
+        cm.connected = True
+        cm.inline_dispatch = True
+        emitted = []
+        cm.on(None, lambda event, *args: emitted.append(event))
+        gevent.spawn(cm._recv_messages)
+
+        self.conn_in.put(multi.serialize())
+        self.conn_in.put(MsgProto(EMsg.ClientPlayingSessionState).serialize())
+        gevent.idle(); gevent.idle()
+
+        # verify
+        self.assertEqual(emitted, [EMsg.ClientHeartBeat, EMsg.ClientLogOff, EMsg.ClientPlayingSessionState])
+
+    def test_inline_dispatch_bad_message(self):
+        cm = CMClient()
+        cm.connected = True
+        cm.inline_dispatch = True
+        emitted = []
+        cm.on(None, lambda event, *args: emitted.append(event))
+        gevent.spawn(cm._recv_messages)
+
+        self.conn_in.put(b'\x01')  # too short for an EMsg
+        self.conn_in.put(MsgProto(EMsg.ClientPlayingSessionState).serialize())
+        gevent.idle(); gevent.idle()
+
+        self.assertEqual(emitted, [EMsg.ClientPlayingSessionState])
+        self.assertFalse(cm._parse_loop.dead)
+
+    def test_inline_dispatch_concurrent(self):
+        cm = CMClient()
+        cm.connected = True
+        cm.inline_dispatch = True
+        calls = []
+
+        @concurrent
+        def blocking(msg):
+            cm.wait_event(EMsg.ClientLogOff, timeout=2, raises=True)
+            calls.append('blocking')
+
+        cm.on(EMsg.ClientHeartBeat, blocking)
+        cm.on(EMsg.ClientLogOff, lambda msg: calls.append('inline'))
+        gevent.spawn(cm._recv_messages)
+
+        self.conn_in.put(MsgProto(EMsg.ClientHeartBeat).serialize())
+        gevent.sleep(0.01)
+        self.assertEqual(calls, [])
+        self.conn_in.put(MsgProto(EMsg.ClientLogOff).serialize())
+
+        with gevent.Timeout(2):
+            while len(calls) < 2:
+                gevent.sleep(0.01)
+
+        self.assertEqual(calls, ['inline', 'blocking'])
+
+    @patch.object(CMClient, 'disconnect')
+    def test_multi_truncated_gzip(self, mock_disconnect):
+        payload = MsgProto(EMsg.ClientHeartBeat).serialize()
+        payload = struct.pack('<I', len(payload)) + payload
+
+        body = BytesIO()
+        with GzipFile(fileobj=body, mode='wb') as f:
+            f.write(payload)
+
+        multi = MsgProto(EMsg.Multi)
+        multi.body.message_body = body.getvalue()[:-4]
+        multi.body.size_unzipped = len(payload)
+        multi.parse()
+
+        cm = CMClient()
+        cm.connected = True
+
+        with patch.object(cm._LOG, 'error') as mock_error:
+            cm._CMClient__handle_multi(multi)
+
+        self.assertEqual(mock_error.call_count, 1)
+        mock_disconnect.assert_not_called()
+
+    @patch.object(CMClient, 'disconnect')
+    @patch.object(CMClient, 'emit')
+    def test_multi_unknown_emsg(self, mock_emit, mock_disconnect):
+        unknown = MsgProto(EMsg.ClientHeartBeat).serialize()
+        unknown = struct.pack('<I', 99999 | 0x80000000) + unknown[4:]
+        sub_messages = [MsgProto(EMsg.ClientHeartBeat).serialize(), unknown]
+
+        multi = MsgProto(EMsg.Multi)
+        multi.body.message_body = b''.join(struct.pack('<I', len(m)) + m for m in sub_messages)
+        multi.parse()
+
+        cm = CMClient()
+        cm.connected = True
+        cm._CMClient__handle_multi(multi)
+        gevent.idle()
+
+        self.assertEqual([call[0][0] for call in mock_emit.call_args_list], [EMsg.ClientHeartBeat])
+        mock_disconnect.assert_not_called()
+
+    def test_decrypt_in_thread(self):
+        messages = [MsgProto(EMsg.ClientHeartBeat).serialize(),
+                    MsgProto(EMsg.ClientLogOff).serialize(),
+                    MsgProto(EMsg.ClientPlayingSessionState).serialize(),
+                    ]
+
+        cm = CMClient()
+        cm.connected = True
+        cm.inline_dispatch = True
+        cm.decrypt_thread_min_size = 0
+        cm.channel_cipher = self.cipher
+        self.cipher.decrypt.side_effect = lambda c: c[1:]
+        emitted = []
+        cm.on(None, lambda event, *args: emitted.append(event))
+        gevent.spawn(cm._recv_messages)
+
+        for message in messages:
+            self.conn_in.put(b'X' + message)
+
+        with gevent.Timeout(2):
+            while len(emitted) < 3:
+                gevent.sleep(0.01)
+
+        self.assertEqual(emitted, [EMsg.ClientHeartBeat, EMsg.ClientLogOff, EMsg.ClientPlayingSessionState])
+
+    def test_iter_multi(self):
+        sub_messages = [b'A' * 10, b'', b'B' * 100000, b'C']
+        payload = b''.join(struct.pack('<I', len(m)) + m for m in sub_messages)
+
+        cm = CMClient()
+        cm.multi_chunk_size = 1000
+
+        self.assertEqual(list(cm._iter_multi(payload)), sub_messages)
+
+        body = BytesIO()
+        with GzipFile(fileobj=body, mode='wb') as f:
+            f.write(payload)
+
+        self.assertEqual(list(cm._iter_multi(body.getvalue(), len(payload))), sub_messages)
+
+        # truncated gzip trailer
+        with self.assertRaises(EOFError):
+            list(cm._iter_multi(body.getvalue()[:-4], len(payload)))
+
+        # chunk size doesn't divide the body
+        cm.multi_chunk_size = 7
+        self.assertEqual(list(cm._iter_multi(body.getvalue(), len(payload))), sub_messages)
+
+        with self.assertRaises(ValueError):
+            list(cm._iter_multi(body.getvalue(), len(payload) + 1))
+        with self.assertRaises(ValueError):
+            list(cm._iter_multi(payload[:-1]))
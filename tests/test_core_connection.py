@@ -0,0 +1,169 @@
+import struct
+import unittest
+import mock
+from mock import patch
+import gevent
+from gevent import socket
+
+from steam.core.connection import Connection, TCPConnection
+
+
+def make_packet(message):
+    return struct.pack(Connection.FMT, len(message), Connection.MAGIC) + message
+
+
+class Connection_Framing(unittest.TestCase):
+    def setUp(self):
+        self.conn = Connection()
+        self.conn.recv_size = 8
+
+    def feed(self, data):
+        while data:
+            self.conn._reserve_readbuf(self.conn.recv_size)
+            chunk, data = data[:self.conn.recv_size], data[self.conn.recv_size:]
+            end = self.conn._readbuf_end
+            self.conn._readbuf[end:end + len(chunk)] = chunk
+            self.conn._readbuf_end += len(chunk)
+            self.conn._read_packets()
+
+    def received(self):
+        return list(self.conn.recv_queue.queue)
+
+    def test_split_packets(self):
+        messages = [b'first message', b'2', b'x' * 100]
+        self.feed(b''.join(map(make_packet, messages)))
+
+        self.assertEqual(self.received(), messages)
+        self.assertEqual(self.conn._readbuf_start, 0)
+        self.assertEqual(self.conn._readbuf_end, 0)
+
+    def test_partial_packet(self):
+        data = make_packet(b'hello world')
+        self.feed(data[:-3])
+
+        self.assertEqual(self.received(), [])
+
+        self.feed(data[-3:])
+
+        self.assertEqual(self.received(), [b'hello world'])
+
+    def test_invalid_magic(self):
+        with patch.object(Connection, 'disconnect') as mock_disconnect:
+            self.feed(struct.pack(Connection.FMT, 4, b'XXXX') + b'data')
+
+        mock_disconnect.assert_called_once_with()
+        self.assertEqual(self.received(), [])
+
+
+class TCPConnection_Reader(unittest.TestCase):
+    def setUp(self):
+        self.a, self.b = socket.socketpair()
+        self.addCleanup(self.a.close)
+        self.addCleanup(self.b.close)
+
+        self.conn = TCPConnection()
+        self.conn.socket = self.a
+        self.conn.recv_size = 8
+        self.reader = gevent.spawn(self.conn._reader_loop)
+        self.addCleanup(self.reader.kill)
+
+    def test_reader_loop(self):
+        messages = [b'first message', b'2', b'x' * 100, b'last']
+        data = b''.join(map(make_packet, messages))
+
+        # packets split across writes, and so across reads
+        for i in range(0, len(data), 5):
+            self.b.sendall(data[i:i+5])
+            gevent.sleep(0)
+
+        with gevent.Timeout(2):
+            received = [self.conn.recv_queue.get() for _ in messages]
+
+        self.assertEqual(received, messages)
+        self.assertEqual(self.conn._readbuf_start, 0)
+        self.assertEqual(self.conn._readbuf_end, 0)
+
+    def test_reader_loop_closed(self):
+        self.conn.event_connected.set()
+        self.b.sendall(make_packet(b'hello')[:-2])
+        self.b.close()
+
+        with gevent.Timeout(2):
+            self.assertIs(self.conn.recv_queue.get(), StopIteration)
+
+        self.assertTrue(self.reader.dead)
+
+
+class Connection_Writer(unittest.TestCase):
+    def setUp(self):
+        self.conn = Connection()
+        self.conn._write_buffers = self.written = mock.Mock()
+
+    def run_writer(self):
+        writer = gevent.spawn(self.conn._writer_loop)
+        gevent.sleep(0.01)
+        writer.kill()
+
+    def test_batching(self):
+        for i in range(5):
+            self.conn.put_message(b'message %d' % i)
+
+        self.conn.send_batch_size = 3
+        self.run_writer()
+
+        self.assertEqual(self.written.call_count, 2)
+        self.assertEqual(self.written.call_args_list[0][0][0],
+                         [make_packet(b'message 0')[:8], b'message 0',
+                          make_packet(b'message 1')[:8], b'message 1',
+                          make_packet(b'message 2')[:8], b'message 2',
+                          ])
+        self.assertEqual(self.conn.send_batch_sizes, {3: 1, 2: 1})
+
+
+class TCPConnection_Writer(unittest.TestCase):
+    def test_write_buffers(self):
+        a, b = socket.socketpair()
+        self.addCleanup(a.close)
+        self.addCleanup(b.close)
+
+        conn = TCPConnection()
+        conn.socket = a
+
+        messages = [b'x' * 100, b'y' * 50000, b'z']
+        conn._write_buffers(list(map(make_packet, messages)))
+        a.shutdown(socket.SHUT_WR)
+
+        data = b''
+        while True:
+            chunk = b.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+
+        self.assertEqual(data, b''.join(map(make_packet, messages)))
+
+    def test_write_buffers_iov_max(self):
+        a, b = socket.socketpair()
+        self.addCleanup(a.close)
+        self.addCleanup(b.close)
+
+        conn = TCPConnection()
+        conn.socket = mock.Mock(spec=['sendmsg'])
+        conn.socket.sendmsg.side_effect = a.sendmsg
+
+        buffers = [b'%d,' % i for i in range(3000)]
+
+        with mock.patch('steam.core.connection.IOV_MAX', 1000):
+            conn._write_buffers(list(buffers))
+
+        self.assertEqual([len(call[0][0]) for call in conn.socket.sendmsg.call_args_list], [1000, 1000, 1000])
+        a.shutdown(socket.SHUT_WR)
+
+        data = b''
+        while True:
+            chunk = b.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+
+        self.assertEqual(data, b''.join(buffers))
@@ -54,6 +54,39 @@ class crypto_testcase(unittest.TestCase):
 
         self.assertEqual(message, dmessage)
 
+    def test_encryption_many(self):
+        messages = [b'', b'My secret message', b'x' * 16, b'y' * 100]
+        key = b'9' * 32
+
+        cyphertexts = [crypto.symmetric_encrypt(message, key) for message in messages]
+
+        self.assertEqual(crypto.symmetric_decrypt_many(cyphertexts, key), messages)
+        self.assertEqual(crypto.symmetric_decrypt_many([], key), [])
+
+        with self.assertRaises(ValueError):
+            crypto.symmetric_decrypt_many([cyphertexts[0][:-1]], key)
+
+    def test_channel_cipher(self):
+        key = b'9' * 32
+        hmac = b'3' * 16
+
+        for size in [0, 15, 16, 100, 5000]:
+            message = b'x' * size
+
+            cipher = crypto.ChannelCipher(key, hmac)
+            cyphertext = cipher.encrypt(message)
+            self.assertEqual(cyphertext, crypto.symmetric_encrypt_HMAC(message, key, hmac))
+            self.assertEqual(cipher.decrypt(cyphertext), message)
+
+            cipher = crypto.ChannelCipher(key)
+            self.assertEqual(cipher.decrypt(crypto.symmetric_encrypt(message, key)), message)
+            self.assertEqual(crypto.symmetric_decrypt(cipher.encrypt(message), key), message)
+
+        with self.assertRaises(RuntimeError):
+            crypto.ChannelCipher(key, b'4' * 16).decrypt(crypto.symmetric_encrypt_HMAC(b'message', key, hmac))
+        with self.assertRaises(RuntimeError):
+            crypto.ChannelCipher(key).decrypt(b'short')
+
     def test_encryption_ecb(self):
         message = b'My secret message'
         key = b'9' * 32
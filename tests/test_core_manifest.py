@@ -0,0 +1,154 @@
+import unittest
+from base64 import b64encode
+
+from steam.core.crypto import sha1_hash, symmetric_encrypt
+from steam.core.manifest import DepotManifest
+
+
+def make_manifest(files):
+    manifest = DepotManifest()
+
+    for filename, chunks in files:
+        mapping = manifest.payload.mappings.add()
+        mapping.filename = filename
+        offset = 0
+
+        for data in chunks:
+            chunk = mapping.chunks.add()
+            chunk.sha = sha1_hash(data)
+            chunk.offset = offset
+            chunk.cb_original = len(data)
+            offset += len(data)
+
+        mapping.size = offset
+        mapping.sha_content = sha1_hash(b''.join(chunks))
+
+    return manifest
+
+
+class DepotManifest_Diff(unittest.TestCase):
+    def test_diff(self):
+        old = make_manifest([('a.txt', [b'a1', b'a2']),
+                             ('b.txt', [b'b1']),
+                             ('c.txt', [b'c1']),
+                             ])
+        new = make_manifest([('a.txt', [b'a1', b'a2']),
+                             ('b.txt', [b'b1', b'c1', b'b2']),
+                             ('d.txt', [b'd1', b'a2']),
+                             ])
+
+        diff = old.diff(new)
+
+        self.assertEqual([f.filename_raw for f in diff.added], ['d.txt'])
+        self.assertEqual([f.filename_raw for f in diff.removed], ['c.txt'])
+        self.assertEqual([(o.filename_raw, n.filename_raw) for o, n in diff.changed], [('b.txt', 'b.txt')])
+        self.assertEqual(set(diff.new_chunks), set(map(sha1_hash, [b'b2', b'd1'])))
+        self.assertEqual(set(diff.reused_chunks), set(map(sha1_hash, [b'b1', b'c1', b'a2'])))
+        self.assertEqual(diff.download_size, 4)
+
+        old_file, chunk = diff.reused_chunks[sha1_hash(b'c1')]
+        self.assertEqual(old_file.filename_raw, 'c.txt')
+        self.assertEqual(chunk.offset, 0)
+
+
+class DepotManifest_Compact(unittest.TestCase):
+    def setUp(self):
+        self.manifest = make_manifest([('a.txt', [b'a1', b'a2']),
+                                       ('dir', []),
+                                       ('dir\\b.txt', [b'b1']),
+                                       ])
+        self.manifest.payload.mappings[1].flags = 64
+        self.manifest.payload.mappings[1].linktarget = 'a.txt'
+
+    def test_files(self):
+        expected = [(f.filename, f.size, f.flags, f.sha_content, f.linktarget_raw,
+                     [(c.sha, c.offset, c.cb_original) for c in f.chunks])
+                    for f in self.manifest]
+
+        self.manifest.compact()
+
+        self.assertEqual(len(self.manifest.payload.mappings), 0)
+        self.assertEqual(len(self.manifest), 3)
+        self.assertEqual([(f.filename, f.size, f.flags, f.sha_content, f.linktarget_raw,
+                           [(c.sha, c.offset, c.cb_original) for c in f.chunks])
+                          for f in self.manifest],
+                         expected)
+        self.assertEqual([f.filename_raw for f in self.manifest.iter_files('dir*')], ['dir', 'dir\\b.txt'])
+
+    def test_serialize(self):
+        self.manifest.compact()
+        copy = DepotManifest(self.manifest.serialize())
+
+        self.assertIsNone(copy.compact_mappings)
+        self.assertEqual([(f.filename_raw, f.size, f.flags, f.sha_content, f.linktarget_raw,
+                           [(c.sha, c.offset, c.cb_original) for c in f.chunks])
+                          for f in copy],
+                         [(f.filename_raw, f.size, f.flags, f.sha_content, f.linktarget_raw,
+                           [(c.sha, c.offset, c.cb_original) for c in f.chunks])
+                          for f in self.manifest])
+
+    def test_diff(self):
+        new = make_manifest([('a.txt', [b'a1', b'a3'])])
+        self.manifest.compact()
+        new.compact()
+
+        diff = self.manifest.diff(new)
+
+        self.assertEqual([f.filename_raw for f in diff.changed[0]], ['a.txt', 'a.txt'])
+        self.assertEqual(set(diff.new_chunks), set([sha1_hash(b'a3')]))
+
+    def test_decrypt_filenames(self):
+        key = b'1' * 32
+        manifest = make_manifest([(b64encode(symmetric_encrypt(b'dir\\a.txt', key)).decode(), [b'a1'])])
+        manifest.metadata.filenames_encrypted = True
+        manifest.compact()
+
+        manifest.decrypt_filenames(key)
+
+        self.assertEqual([f.filename_raw for f in manifest], ['dir\\a.txt'])
+
+
+class DepotManifest_PathIndex(unittest.TestCase):
+    def setUp(self):
+        self.manifest = make_manifest([('readme.txt', [b'r']),
+                                       ('game', []),
+                                       ('game\\bin', []),
+                                       ('game\\bin\\app.exe', [b'x']),
+                                       ('game\\data\\a.pak', [b'a']),
+                                       ('game\\data\\b.pak', [b'b']),
+                                       ('other\\game.txt', [b'o']),
+                                       ])
+
+    def test_get_file(self):
+        self.assertEqual(self.manifest.get_file('game/bin/app.exe').filename_raw, 'game\\bin\\app.exe')
+        self.assertEqual(self.manifest.get_file('game\\data\\a.pak').size, 1)
+        self.assertIsNone(self.manifest.get_file('game/missing'))
+
+    def test_list_dir(self):
+        self.assertEqual([f.filename_raw for f in self.manifest.list_dir()], ['readme.txt', 'game', 'other'])
+        self.assertEqual([f.filename_raw for f in self.manifest.list_dir('game')], ['game\\bin', 'game\\data'])
+        self.assertTrue(self.manifest.list_dir()[2].is_directory)
+        self.assertEqual([f.filename_raw for f in self.manifest.list_dir('game/data/')],
+                         ['game\\data\\a.pak', 'game\\data\\b.pak'])
+        self.assertEqual(self.manifest.list_dir('nope'), [])
+
+    def test_iter_files(self):
+        def iter_files(pattern):
+            return [f.filename_raw for f in self.manifest.iter_files(pattern)]
+
+        self.assertEqual(iter_files('game\\*'),
+                         ['game\\bin', 'game\\bin\\app.exe', 'game\\data\\a.pak', 'game\\data\\b.pak'])
+        self.assertEqual(iter_files('game\\data\\?.pak'), ['game\\data\\a.pak', 'game\\data\\b.pak'])
+        self.assertEqual(iter_files('*game*'),
+                         ['game', 'game\\bin', 'game\\bin\\app.exe', 'game\\data\\a.pak',
+                          'game\\data\\b.pak', 'other\\game.txt'])
+        self.assertEqual(iter_files('readme.txt'), ['readme.txt'])
+        self.assertEqual(iter_files('readme'), [])
+        self.assertEqual(len(iter_files(None)), 7)
+
+    def test_iter_files_duplicate_path(self):
+        manifest = make_manifest([('dup.txt', [b'1']), ('dup.txt', [b'22'])])
+
+        self.assertEqual([f.size for f in manifest.iter_files('dup.txt')], [1, 2])
+        self.assertEqual([f.size for f in manifest.iter_files('dup.*')], [1, 2])
+        self.assertEqual(manifest.get_file('dup.txt').size, 1)